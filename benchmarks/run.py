@@ -0,0 +1,161 @@
+"""Throughput benchmarks for the parser, scorer and formatters.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json   # exit 1 on regressions
+"""
+from __future__ import annotations
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from rich.console import Console
+
+from benchmarks.synthetic import generate_diff
+from cdkdiff.formatters.compact import print_compact
+from cdkdiff.formatters.github_fmt import format_github
+from cdkdiff.formatters.json_fmt import format_json
+from cdkdiff.formatters.terminal import print_summary
+from cdkdiff.models import DiffSummary
+from cdkdiff.parser import parse, parse_columnar
+from cdkdiff.scorer import score_summary
+
+# Metrics where a larger value is better; all others (seconds, bytes) are lower-is-better
+_THROUGHPUT_METRICS = {"lines_per_sec", "changes_per_sec"}
+
+
+def _best_time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _render_terminal(summary: DiffSummary) -> None:
+    print_summary(summary, console=Console(file=io.StringIO(), width=160, force_terminal=True))
+
+
+def run_benchmarks(
+    stacks: int = 10,
+    resources: int = 100,
+    iam_rows: int = 10,
+    property_lines: int = 4,
+    repeat: int = 5,
+) -> dict[str, Any]:
+    """Run every benchmark once per `repeat` and return the best timings as a dict."""
+    text = generate_diff(stacks, resources, iam_rows, property_lines)
+    lines = text.count("\n")
+    summary = score_summary(parse(text))
+    changes = summary.total_changes
+
+    parse_s = _best_time(lambda: parse(text), repeat)
+    score_s = _best_time(lambda: score_summary(summary), repeat)
+    columnar_s = _best_time(lambda: parse_columnar(text), repeat)
+    results: dict[str, dict[str, float]] = {
+        "parse": {
+            "seconds": parse_s,
+            "lines_per_sec": lines / parse_s,
+            "peak_bytes": _peak_memory(lambda: parse(text)),
+        },
+        "parse_columnar": {
+            "seconds": columnar_s,
+            "lines_per_sec": lines / columnar_s,
+            "peak_bytes": _peak_memory(lambda: parse_columnar(text)),
+        },
+        "score_summary": {"seconds": score_s, "changes_per_sec": changes / score_s},
+    }
+    formatters: dict[str, Callable[[], Any]] = {
+        "format_json": lambda: format_json(summary),
+        "format_github": lambda: format_github(summary),
+        "print_summary": lambda: _render_terminal(summary),
+        "print_compact": lambda: print_compact(summary, io.StringIO()),
+    }
+    for name, render in formatters.items():
+        results[name] = {
+            "seconds": _best_time(render, repeat),
+            "peak_bytes": _peak_memory(render),
+        }
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+        },
+        "params": {
+            "stacks": stacks, "resources": resources, "iam_rows": iam_rows,
+            "property_lines": property_lines, "repeat": repeat,
+            "lines": lines, "changes": changes,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Return a description of every metric that is more than `tolerance` worse than baseline."""
+    regressions = []
+    for bench, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline.get("results", {}).get(bench, {}).get(metric)
+            if not old:
+                continue
+            ratio = value / old
+            if metric in _THROUGHPUT_METRICS:
+                worse = ratio < 1 - tolerance
+            else:
+                worse = ratio > 1 + tolerance
+            if worse:
+                regressions.append(f"{bench}.{metric}: {old:.4g} -> {value:.4g} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stacks", type=int, default=10)
+    parser.add_argument("--resources", type=int, default=100, help="resource changes per stack")
+    parser.add_argument("--iam-rows", type=int, default=10, help="IAM statement rows per stack")
+    parser.add_argument("--property-lines", type=int, default=4, help="property lines per update")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; best is kept")
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against earlier results")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.stacks, args.resources, args.iam_rows, args.property_lines, args.repeat,
+    )
+    for bench, metrics in report["results"].items():
+        print(f"{bench:<14} " + "  ".join(f"{k}={v:,.4g}" for k, v in metrics.items()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Deterministic generator of realistic `cdk diff` output for benchmarks."""
+from __future__ import annotations
+import random
+
+_RESOURCE_TYPES = (
+    "AWS::Lambda::Function",
+    "AWS::S3::Bucket",
+    "AWS::DynamoDB::Table",
+    "AWS::IAM::Role",
+    "AWS::SQS::Queue",
+    "AWS::EC2::SecurityGroup",
+    "AWS::RDS::DBInstance",
+    "AWS::KMS::Key",
+)
+_IAM_HEADER = (
+    "IAM Statement Changes",
+    "┌───┬──────────────────────────────┬────────┬──────────────────────────────┐",
+    "│   │ Resource                     │ Effect │ Action                       │",
+    "├───┼──────────────────────────────┼────────┼──────────────────────────────┤",
+)
+_IAM_FOOTER = "└───┴──────────────────────────────┴────────┴──────────────────────────────┘"
+
+
+def _property_tree(rng: random.Random, property_lines: int) -> list[str]:
+    """Render a property tree in cdk's layout with roughly `property_lines` value lines."""
+    lines = []
+    groups = max(1, property_lines // 4)
+    for g in range(groups):
+        last_group = g == groups - 1
+        branch, rail = ("└─", "    ") if last_group else ("├─", "│   ")
+        lines.append(f" {branch} [~] Group{g}")
+        lines.append(f" {rail}└─ [~] .Settings:")
+        lines.append(f" {rail}    ├─ [-] Removed: .OLD_{g}")
+        lines.append(f" {rail}    ├─ [+] Added: .KEY_{g}")
+        lines.append(f" {rail}    └─ [~] .Size:")
+        lines.append(f" {rail}        ├─ [-] {rng.randrange(1024)}")
+        lines.append(f" {rail}        └─ [+] {rng.randrange(1024)}")
+    return lines
+
+
+def generate_diff(
+    stacks: int = 10,
+    resources: int = 100,
+    iam_rows: int = 10,
+    property_lines: int = 4,
+    seed: int = 0,
+) -> str:
+    """Return `cdk diff` output for `stacks` stacks of `resources` resource changes each.
+
+    Every stack has an IAM table with `iam_rows` changed statements, and every update
+    carries a property tree of about `property_lines` value lines. Output is identical
+    for the same arguments.
+    """
+    rng = random.Random(seed)
+    out: list[str] = []
+    for s in range(stacks):
+        out.append(f"Stack BenchStack{s}")
+        out.append("")
+        if iam_rows:
+            out.extend(_IAM_HEADER)
+            for r in range(iam_rows):
+                sign = "+" if r % 2 else "-"
+                ref = f"${{Role{r}/Resource}}".ljust(28)
+                out.append(f"│ {sign} │ {ref} │ Allow  │ s3:GetObject                 │")
+            out.append(_IAM_FOOTER)
+            out.append("")
+        out.append("Resources")
+        for r in range(resources):
+            resource_type = _RESOURCE_TYPES[rng.randrange(len(_RESOURCE_TYPES))]
+            kind = rng.random()
+            if kind < 0.2:
+                out.append(f"[+] {resource_type} Resource{r} Resource{r}ABC")
+            elif kind < 0.3:
+                out.append(f"[-] {resource_type} Resource{r} Resource{r}ABC destroy")
+            else:
+                suffix = " replace" if kind > 0.95 else ""
+                out.append(f"[~] {resource_type} Resource{r} Resource{r}ABC{suffix}")
+                if property_lines:
+                    out.extend(_property_tree(rng, property_lines))
+        out.append("")
+    out.append(f"✨  Number of stacks with differences: {stacks}")
+    return "\n".join(out) + "\n"
@@ -0,0 +1,175 @@
+"""Compact binary archive of a scored diff, for storing CI results and re-rendering them.
+
+An archive is the columnar layout of `ColumnarSummary` written out as raw
+little-endian arrays behind a fixed header:
+
+    header      magic, then counts of strings, stacks, changes and property changes
+    strings     code-point offsets into the UTF-8 string blob (n_strings + 1)
+    stacks      name, error, unchanged, first change row
+    changes     resource type, logical ID, change type, risk, details, replacement, rule
+    properties  change row, path, change type, old, new, replacement
+    blob        every distinct string, concatenated
+
+Strings are referenced by index into one deduplicated table; `_NONE` marks a missing
+optional string. Reading maps the file and copies each section straight into an array,
+so loading costs a handful of bulk copies rather than parsing.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import BinaryIO
+
+from cdkdiff.columnar import CHANGE_TYPE_CODES, CHANGE_TYPES, ColumnarSummary
+from cdkdiff.models import DiffSummary, PropertyChange
+
+MAGIC = b"CDKDIFF\x01"
+_HEADER = struct.Struct("<8sIIII")
+_NONE = 0xFFFFFFFF
+
+# (column, typecode) of each section, in file order
+_STACK_COLUMNS = (("name", "I"), ("error", "I"), ("unchanged", "B"), ("start", "I"))
+_CHANGE_COLUMNS = (
+    ("resource_type", "I"), ("logical_id", "I"), ("change_type", "B"), ("risk", "B"),
+    ("details", "I"), ("requires_replacement", "B"), ("rule", "I"),
+)
+_PROPERTY_COLUMNS = (
+    ("row", "I"), ("path", "I"), ("change_type", "B"), ("old", "I"), ("new", "I"),
+    ("requires_replacement", "B"),
+)
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def id(self, value: str | None) -> int:
+        if value is None:
+            return _NONE
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder != "little" and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def write_archive(summary: DiffSummary | ColumnarSummary, out: BinaryIO) -> None:
+    """Write `summary` to the binary stream `out` in the archive format."""
+    table = _StringTable()
+    stacks = {name: array(code) for name, code in _STACK_COLUMNS}
+    changes = {name: array(code) for name, code in _CHANGE_COLUMNS}
+    props = {name: array(code) for name, code in _PROPERTY_COLUMNS}
+
+    row = 0
+    for stack in summary.stacks:
+        stacks["name"].append(table.id(stack.name))
+        stacks["error"].append(table.id(stack.error))
+        stacks["unchanged"].append(stack.unchanged)
+        stacks["start"].append(row)
+        for c in stack.changes:
+            changes["resource_type"].append(table.id(c.resource_type))
+            changes["logical_id"].append(table.id(c.logical_id))
+            changes["change_type"].append(CHANGE_TYPE_CODES[c.change_type])
+            changes["risk"].append(c.risk.rank)
+            changes["details"].append(table.id(c.details))
+            changes["requires_replacement"].append(c.requires_replacement)
+            changes["rule"].append(table.id(c.rule))
+            for p in c.properties:
+                props["row"].append(row)
+                props["path"].append(table.id(p.path))
+                props["change_type"].append(CHANGE_TYPE_CODES[p.change_type])
+                props["old"].append(table.id(p.old))
+                props["new"].append(table.id(p.new))
+                props["requires_replacement"].append(p.requires_replacement)
+            row += 1
+
+    offsets = array("I", [0])
+    for s in table.strings:
+        offsets.append(offsets[-1] + len(s))
+
+    out.write(_HEADER.pack(
+        MAGIC, len(table.strings), len(summary.stacks), row, len(props["row"]),
+    ))
+    out.writelines(
+        _little_endian(column).tobytes()
+        for column in (offsets, *stacks.values(), *changes.values(), *props.values())
+    )
+    out.write("".join(table.strings).encode())
+
+
+def is_archive(path: str) -> bool:
+    """Return True if the file at `path` starts with the archive magic."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _Reader:
+    def __init__(self, buffer: mmap.mmap, offset: int) -> None:
+        self.buffer = buffer
+        self.offset = offset
+
+    def column(self, typecode: str, count: int) -> array:
+        column = array(typecode)
+        end = self.offset + column.itemsize * count
+        if end > len(self.buffer):
+            raise ValueError("archive is truncated")
+        column.frombytes(self.buffer[self.offset:end])
+        self.offset = end
+        if sys.byteorder != "little" and column.itemsize > 1:
+            column.byteswap()
+        return column
+
+
+def read_archive(path: str) -> ColumnarSummary:
+    """Load an archive written by `write_archive` as a `ColumnarSummary`.
+
+    Raises ValueError if the file is not an archive or is truncated.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise ValueError("not a cdkdiff archive")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with buffer:
+        magic, n_strings, n_stacks, n_changes, n_props = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("not a cdkdiff archive")
+        reader = _Reader(buffer, _HEADER.size)
+        offsets = reader.column("I", n_strings + 1)
+        stacks = {name: reader.column(code, n_stacks) for name, code in _STACK_COLUMNS}
+        changes = {name: reader.column(code, n_changes) for name, code in _CHANGE_COLUMNS}
+        props = {name: reader.column(code, n_props) for name, code in _PROPERTY_COLUMNS}
+        blob = buffer[reader.offset:].decode()
+    if len(blob) != offsets[-1]:
+        raise ValueError("archive is truncated")
+
+    strings = [blob[offsets[i]:offsets[i + 1]] for i in range(n_strings)]
+
+    def text(index: int) -> str | None:
+        return None if index == _NONE else strings[index]
+
+    properties: dict[int, list[PropertyChange]] = {}
+    for i in range(n_props):
+        properties.setdefault(props["row"][i], []).append(PropertyChange(
+            path=strings[props["path"][i]],
+            change_type=CHANGE_TYPES[props["change_type"][i]],
+            old=text(props["old"][i]),
+            new=text(props["new"][i]),
+            requires_replacement=bool(props["requires_replacement"][i]),
+        ))
+    starts = [*stacks["start"], n_changes]
+    return ColumnarSummary.from_columns(strings, changes, properties, (
+        (strings[stacks["name"][i]], starts[i], starts[i + 1], text(stacks["error"][i]),
+         bool(stacks["unchanged"][i]))
+        for i in range(n_stacks)
+    ))
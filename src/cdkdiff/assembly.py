@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import subprocess
+from collections.abc import Callable, Iterator
+
+from cdkdiff.cache import default_cache_dir, load_state, save_state
+from cdkdiff.runner import synth
+
+# Directories that never affect synthesized output
+_IGNORED_DIRS = {
+    ".git", ".hg", "node_modules", "cdk.out", "__pycache__", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+}
+_STAMP_FILE = ".cdkdiff-source-hash"
+_STACK_ARTIFACT = "aws:cloudformation:stack"
+_NESTED_ASSEMBLY = "cdk:cloud-assembly"
+_ASSET_MANIFEST = "cdk:asset-manifest"
+_STACK_LIST_FILE = "stack-lists.json"
+_MAX_STACK_LISTS = 64  # apps remembered in the stack list cache
+
+
+def walk_sources(root: str, skip: str | None = None) -> Iterator[tuple[str, list[str], list[str]]]:
+    """Walk `root` like `os.walk`, sorted and without directories that never affect synth.
+
+    The directory `skip` is left out too. As with `os.walk`, callers can prune the
+    yielded directory list further.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in _IGNORED_DIRS and os.path.join(dirpath, d) != skip
+        )
+        yield dirpath, dirnames, sorted(filenames)
+
+
+def source_fingerprint(context_path: str = ".", output_dir: str = "cdk.out") -> str:
+    """Return a sha256 over every source file path and its contents under `context_path`."""
+    root = os.path.abspath(context_path)
+    skip_abs = os.path.abspath(os.path.join(root, output_dir))
+    digest = hashlib.sha256()
+    for dirpath, _, filenames in walk_sources(root, skip_abs):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(path, root).encode())
+            digest.update(b"\0")
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 16), b""):
+                        digest.update(chunk)
+            except OSError:
+                continue  # unreadable or vanished mid-walk — path alone is hashed
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_assembly(path: str) -> bool:
+    """Return True if `path` looks like a synthesized cloud assembly directory."""
+    return os.path.isfile(os.path.join(path, "manifest.json"))
+
+
+def ensure_assembly(context_path: str = ".", output_dir: str = "cdk.out") -> str:
+    """Return a cloud assembly for `context_path`, synthesizing only if it is stale.
+
+    The source fingerprint is stamped into the assembly after each synth, so repeated
+    cdkdiff invocations against an unchanged tree skip `cdk synth` entirely.
+    """
+    assembly = os.path.abspath(os.path.join(context_path, output_dir))
+    stamp_path = os.path.join(assembly, _STAMP_FILE)
+    fingerprint = source_fingerprint(context_path, output_dir)
+
+    if is_assembly(assembly):
+        try:
+            with open(stamp_path) as f:
+                if f.read().strip() == fingerprint:
+                    return assembly
+        except OSError:
+            pass  # no stamp — treat as stale
+
+    assembly = synth(context_path, output_dir)
+    with open(stamp_path, "w") as f:
+        f.write(fingerprint)
+    return assembly
+
+
+def _file_reader(assembly_dir: str) -> Callable[[str], bytes]:
+    def read(relpath: str) -> bytes:
+        with open(os.path.join(assembly_dir, relpath), "rb") as f:
+            return f.read()
+    return read
+
+
+def _stack_artifacts(
+    read: Callable[[str], bytes], prefix: str = ""
+) -> Iterator[tuple[str, str, list[str]]]:
+    """Yield (stack name, template path, asset manifest paths) from a cloud assembly manifest.
+
+    Paths are relative to the assembly root; nested assemblies (CDK stages) are followed.
+    """
+    manifest = json.loads(read(posixpath.join(prefix, "manifest.json")))
+    artifacts = manifest.get("artifacts", {})
+    for artifact_id, artifact in artifacts.items():
+        props = artifact.get("properties", {})
+        if artifact.get("type") == _STACK_ARTIFACT:
+            asset_manifests = [
+                posixpath.join(prefix, artifacts[dep]["properties"]["file"])
+                for dep in artifact.get("dependencies", [])
+                if artifacts.get(dep, {}).get("type") == _ASSET_MANIFEST
+            ]
+            name = artifact.get("displayName") or artifact_id
+            yield name, posixpath.join(prefix, props["templateFile"]), asset_manifests
+        elif artifact.get("type") == _NESTED_ASSEMBLY:
+            yield from _stack_artifacts(read, posixpath.join(prefix, props["directoryName"]))
+
+
+def assembly_stacks(assembly_dir: str) -> dict[str, str]:
+    """Return stack name → template path for every stack in a cloud assembly.
+
+    Stacks are named as `cdk list` shows them (the display path, e.g. `Stage/Stack`).
+    Nested assemblies (CDK stages) are followed. Without a manifest, falls back to
+    the `*.template.json` files in the directory.
+    """
+    if not is_assembly(assembly_dir):
+        return {
+            f[: -len(".template.json")]: os.path.join(assembly_dir, f)
+            for f in sorted(os.listdir(assembly_dir))
+            if f.endswith(".template.json")
+        }
+    return {
+        name: os.path.join(assembly_dir, template)
+        for name, template, _ in _stack_artifacts(_file_reader(assembly_dir))
+    }
+
+
+def _stack_dependencies(
+    read: Callable[[str], bytes], prefix: str = ""
+) -> Iterator[tuple[str, list[str]]]:
+    manifest = json.loads(read(posixpath.join(prefix, "manifest.json")))
+    artifacts = manifest.get("artifacts", {})
+    for artifact_id, artifact in artifacts.items():
+        if artifact.get("type") == _STACK_ARTIFACT:
+            yield artifact.get("displayName") or artifact_id, [
+                artifacts[dep].get("displayName") or dep
+                for dep in artifact.get("dependencies", [])
+                if artifacts.get(dep, {}).get("type") == _STACK_ARTIFACT
+            ]
+        elif artifact.get("type") == _NESTED_ASSEMBLY:
+            directory = artifact.get("properties", {})["directoryName"]
+            yield from _stack_dependencies(read, posixpath.join(prefix, directory))
+
+
+def stack_dependencies(assembly_dir: str) -> dict[str, list[str]]:
+    """Return stack name → names of the stacks it depends on, from the assembly manifest.
+
+    Empty without a manifest. Dependencies are resolved within each (nested) assembly.
+    """
+    if not is_assembly(assembly_dir):
+        return {}
+    return dict(_stack_dependencies(_file_reader(assembly_dir)))
+
+
+def cached_stack_list(
+    context_path: str,
+    app: str | None,
+    list_stacks: Callable[..., list[str]],
+) -> list[str]:
+    """Return the app's stack names, running `list_stacks` (`cdk list`) only when needed.
+
+    A cloud assembly's manifest is read directly. Otherwise the listing is cached in the
+    cache directory under the app path and its source fingerprint, which covers
+    `cdk.json`, so it is reused until a source file changes.
+    """
+    if app and is_assembly(app):
+        return list(assembly_stacks(app))
+    material = "\0".join((os.path.abspath(context_path), source_fingerprint(context_path)))
+    key = hashlib.sha256(material.encode()).hexdigest()
+    path = os.path.join(default_cache_dir(), _STACK_LIST_FILE)
+    lists = load_state(path)
+    if isinstance(cached := lists.get(key), list):
+        return cached
+
+    names = list_stacks(context_path, app=app)
+    lists.pop(key, None)
+    lists[key] = names
+    save_state(path, lists, _MAX_STACK_LISTS)
+    return names
+
+
+def file_digest(path: str) -> str:
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def template_hashes(assembly_dir: str) -> dict[str, str]:
+    """Return stack name → sha256 of its synthesized template."""
+    return {name: file_digest(path) for name, path in assembly_stacks(assembly_dir).items()}
+
+
+def stack_fingerprints(
+    assembly_dir: str, read: Callable[[str], bytes] | None = None
+) -> dict[str, str]:
+    """Return stack name → hash of its template plus the source hashes of its assets.
+
+    Two assemblies yield the same fingerprint for a stack exactly when its template and
+    every file/Docker asset it deploys are unchanged. `read` loads a path relative to
+    the assembly root and defaults to the filesystem.
+    """
+    read = read or _file_reader(assembly_dir)
+    fingerprints: dict[str, str] = {}
+    for name, template, asset_manifests in _stack_artifacts(read):
+        digest = hashlib.sha256(read(template))
+        for asset_manifest in asset_manifests:
+            assets = json.loads(read(asset_manifest))
+            for section in ("files", "dockerImages"):
+                for source_hash in sorted(assets.get(section, {})):
+                    digest.update(source_hash.encode())
+        fingerprints[name] = digest.hexdigest()
+    return fingerprints
+
+
+def _git_reader(ref: str, assembly_dir: str) -> Callable[[str], bytes]:
+    """Read files of `assembly_dir` as committed at `ref`."""
+    try:
+        toplevel = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            cwd=assembly_dir, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise RuntimeError(f"{assembly_dir} is not inside a git repository: {e}") from e
+    prefix = os.path.relpath(os.path.realpath(assembly_dir), os.path.realpath(toplevel))
+
+    def read(relpath: str) -> bytes:
+        spec = f"{ref}:{posixpath.join(prefix.replace(os.sep, '/'), relpath)}"
+        result = subprocess.run(["git", "show", spec], cwd=toplevel, capture_output=True,
+                                check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"git show {spec} failed: {result.stderr.decode().strip()}")
+        return result.stdout
+    return read
+
+
+def baseline_fingerprints(since: str, assembly_dir: str) -> dict[str, str]:
+    """Load per-stack fingerprints of a baseline assembly.
+
+    `since` is a previous assembly directory, its `manifest.json`, or a git ref at which
+    the current assembly directory was committed.
+    """
+    if os.path.isdir(since):
+        return stack_fingerprints(since)
+    if os.path.isfile(since) and os.path.basename(since) == "manifest.json":
+        return stack_fingerprints(os.path.dirname(os.path.abspath(since)))
+    return stack_fingerprints(assembly_dir, read=_git_reader(since, assembly_dir))
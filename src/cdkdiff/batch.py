@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from cdkdiff.assembly import walk_sources
+from cdkdiff.models import DiffSummary, StackDiff
+from cdkdiff.parser import parse
+from cdkdiff.rules import RuleSet
+from cdkdiff.runner import run_cdk_diff
+from cdkdiff.scorer import score_summary
+
+_APP_MARKER = "cdk.json"
+
+
+def discover_apps(roots: list[str]) -> list[str]:
+    """Return every CDK app directory (one holding `cdk.json`) under `roots`.
+
+    Apps are returned in walk order and are not searched for further apps.
+    """
+    apps: list[str] = []
+    for root in roots:
+        for dirpath, dirnames, filenames in walk_sources(root):
+            if _APP_MARKER in filenames:
+                apps.append(os.path.normpath(dirpath))
+                dirnames[:] = []
+    return list(dict.fromkeys(apps))
+
+
+def diff_app(app_dir: str, rules: RuleSet | None = None) -> DiffSummary:
+    """Diff and score every stack of one CDK app. Runs in a worker process."""
+    return score_summary(parse(run_cdk_diff([], context_path=app_dir)), rules)
+
+
+def run_batch(apps: list[str], jobs: int = 4, rules: RuleSet | None = None) -> DiffSummary:
+    """Diff `apps` in a pool of at most `jobs` processes and combine the results.
+
+    Stacks are named `<app>:<stack>` and keep the order of `apps`. An app whose
+    `cdk diff` fails is reported as a single errored entry named after the app.
+    """
+    if not apps:
+        return DiffSummary()
+    stacks: list[StackDiff] = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(apps))) as pool:
+        futures = [pool.submit(diff_app, app, rules) for app in apps]
+        for app, future in zip(apps, futures):
+            try:
+                summary = future.result()
+            except subprocess.TimeoutExpired as e:
+                stacks.append(StackDiff(name=app, error=f"cdk diff timed out after {e.timeout:g}s"))
+                continue
+            except RuntimeError as e:
+                stacks.append(StackDiff(name=app, error=str(e)))
+                continue
+            stacks.extend(
+                StackDiff(f"{app}:{s.name}", s.changes, error=s.error, unchanged=s.unchanged)
+                for s in summary.stacks
+            )
+    return DiffSummary(stacks=stacks)
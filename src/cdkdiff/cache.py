@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from functools import cache
+
+from cdkdiff.formatters.json_fmt import stack_from_dict, stack_to_dict
+from cdkdiff.models import StackDiff
+
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_ENTRY_SUFFIX = ".json"
+_RESULTS_DIR = "results"  # kept apart from the state files, which eviction must not touch
+
+
+def default_cache_dir() -> str:
+    """Return `$CDKDIFF_CACHE_DIR`, else `$XDG_CACHE_HOME/cdkdiff`, else `~/.cache/cdkdiff`."""
+    if path := os.environ.get("CDKDIFF_CACHE_DIR"):
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cdkdiff")
+
+
+def write_text_atomic(path: str, text: str, mode: int | None = None) -> None:
+    """Replace `path` with `text` via a temporary file and rename, so concurrent readers
+    never see a partial file. `mode` sets its permissions (0o600 otherwise). Raises OSError.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _write_json(path: str, data: object) -> None:
+    write_text_atomic(path, json.dumps(data))
+
+
+def load_state(path: str) -> dict:
+    """Return the JSON object in the state file at `path`; empty if absent or corrupt."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(path: str, state: dict, max_entries: int) -> None:
+    """Write a state file, first dropping its oldest keys beyond `max_entries`.
+
+    Callers re-insert a key when they use it, so insertion order is recency. State only
+    saves work on later runs, so filesystem errors are ignored.
+    """
+    while len(state) > max_entries:
+        del state[next(iter(state))]
+    try:
+        _write_json(path, state)
+    except OSError:
+        pass
+
+
+@cache
+def tool_version() -> str:
+    """Return the installed cdkdiff version, which covers parser and engine changes."""
+    from importlib import metadata  # slow to import, and only needed with the cache
+    try:
+        return metadata.version("cdkdiff")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def cache_key(stack: str, template_hash: str, deployed_fingerprint: str,
+              rules_version: str) -> str:
+    """Return the content address for one stack's diff result under this cdkdiff version.
+
+    The stack name is part of the key: stacks built from one construct can share a
+    template and deployed state, but their results carry their own names.
+    """
+    material = (
+        f"{tool_version()}\0{stack}\0{template_hash}\0{deployed_fingerprint}\0{rules_version}"
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class DiffCache:
+    """Content-addressed on-disk store of scored `StackDiff` results.
+
+    Entries are single JSON files; reading one refreshes its mtime, and `evict`, called
+    once per run, removes the least recently used entries beyond `max_bytes`.
+    """
+
+    def __init__(self, root: str | None = None, max_bytes: int = _DEFAULT_MAX_BYTES) -> None:
+        self.root = root or os.path.join(default_cache_dir(), _RESULTS_DIR)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + _ENTRY_SUFFIX)
+
+    def get(self, key: str) -> StackDiff | None:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                stack = stack_from_dict(json.load(f))
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            self.misses += 1  # absent, or corrupt — the next put overwrites it
+            return None
+        self.hits += 1
+        return stack
+
+    def put(self, key: str, stack: StackDiff) -> None:
+        """Store a result. Caching is best effort, so filesystem errors are ignored."""
+        try:
+            _write_json(self._path(key), stack_to_dict(stack))
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        try:
+            scan = list(os.scandir(self.root))
+        except OSError:
+            return  # nothing cached yet
+        for entry in scan:
+            if not entry.name.endswith(_ENTRY_SUFFIX):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # removed by another process
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    @property
+    def stats(self) -> str:
+        return f"cache: {self.hits} hit(s), {self.misses} miss(es)"
@@ -1,58 +1,568 @@
 from __future__ import annotations
+import json
 import os
 import re
 import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, cast
 import click
-from rich.console import Console
-from cdkdiff.parser import parse
-from cdkdiff.scorer import score_summary
-from cdkdiff.runner import run_cdk_diff, expand_stack_patterns
-from cdkdiff.formatters.json_fmt import format_json
-from cdkdiff.formatters.github_fmt import format_github
-from cdkdiff.formatters.terminal import print_summary
-from cdkdiff.models import RiskLevel
+from cdkdiff.parser import parse, parse_stream
+from cdkdiff.scorer import rules_version, score_stack, score_summary
+from cdkdiff.runner import (
+    StackRun, expand_stack_patterns, list_stacks, run_cdk_diff, run_cdk_diff_parallel,
+    stream_cdk_diff,
+)
+from cdkdiff.assembly import (
+    assembly_stacks, baseline_fingerprints, ensure_assembly, file_digest, is_assembly,
+    stack_dependencies, stack_fingerprints, template_hashes,
+)
+from cdkdiff.cache import DiffCache, cache_key
+from cdkdiff.differ import deployed_template_path, diff_assembly
+from cdkdiff.formatters import TERMINAL, formatter_names, get_formatter, get_writer
+from cdkdiff.models import ChangeType, DiffSummary, RiskLevel, StackDiff, in_request_order
+from cdkdiff.profiling import span
+from cdkdiff.scheduling import DurationHistory
+
+if TYPE_CHECKING:
+    from cdkdiff.rules import RuleSet
+
+# rich, the formatters, the process pool and requests are imported only on the code
+# paths that use them, keeping `--help` and `--output json` startup fast
 
 # owner/repo — letters, digits, hyphens, underscores, dots
 _REPO_RE = re.compile(r"^[\w.\-]+/[\w.\-]+$")
 
 
-@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+class _DefaultGroup(click.Group):
+    """Runs `diff` unless the first argument names another subcommand.
+
+    Keeps `cdkdiff [STACKS]... [OPTIONS]` working alongside the other subcommands.
+    """
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = ["diff", *args]
+        return super().parse_args(ctx, args)
+
+    def format_options(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        # `cdkdiff -h` documents the options of the default command, then the others
+        default = self.commands["diff"]
+        default.format_options(click.Context(default, info_name="diff", parent=ctx), formatter)
+        self.format_commands(ctx, formatter)
+
+
+@click.group(cls=_DefaultGroup, context_settings={"help_option_names": ["-h", "--help"]})
+def main() -> None:
+    """CDK diff with risk scoring.
+
+    Without a subcommand, runs `diff`: `cdkdiff [STACKS]... [OPTIONS]`.
+    """
+
+
+def _check_output(ctx: click.Context, param: click.Parameter, value: str) -> str:
+    if value != TERMINAL:
+        try:
+            get_formatter(value)
+        except KeyError:
+            choices = ", ".join(formatter_names())
+            raise click.BadParameter(f"{value!r} is not one of {choices}.")
+    return value
+
+
+_output_option = click.option(
+    "--output", "-o", default=TERMINAL, show_default=True, callback=_check_output,
+    help="Output format: terminal, json, ndjson (one record per change), pr-comment, "
+         "or one provided by a plugin.",
+)
+_fail_on_option = click.option(
+    "--fail-on", type=click.Choice(["low", "medium", "high"]), default=None,
+    help="Exit 1 if any change meets or exceeds this risk level.",
+)
+_fail_fast_option = click.option(
+    "--fail-fast", is_flag=True, default=False,
+    help="With --fail-on, stop at the first stack with a change at or above the "
+         "threshold: terminate the remaining cdk diff processes, render the stacks "
+         "diffed so far and exit 1.",
+)
+_post_github_option = click.option(
+    "--post-github", is_flag=True, default=False,
+    help="Post diff as a GitHub PR comment (requires GITHUB_TOKEN).",
+)
+_compact_option = click.option(
+    "--compact", is_flag=True, default=False,
+    help="Terminal output as plain aligned rows, collapsing low-risk changes of busy "
+         "stacks into counts and truncating long listings. Fast for huge diffs.",
+)
+_archive_option = click.option(
+    "--archive", "archive_path", type=click.Path(dir_okay=False, writable=True), default=None,
+    help="Also save the scored result to this file in the compact binary archive "
+         "format, for re-rendering later with `cdkdiff render`.",
+)
+_history_option = click.option(
+    "--history", "history_path", envvar="CDKDIFF_HISTORY",
+    type=click.Path(dir_okay=False), default=None,
+    help="Append the result to this SQLite history store, queried with `cdkdiff history`. "
+         "[env: CDKDIFF_HISTORY]",
+)
+_commit_option = click.option(
+    "--commit", envvar="GITHUB_SHA", default=None,
+    help="Commit recorded with the result in the history store. [env: GITHUB_SHA]",
+)
+
+
+def _enable_profiling(ctx: click.Context, param: click.Parameter, value: object) -> None:
+    """Start tracing for --profile/--trace-file; the report is printed when `ctx` closes."""
+    if not value:
+        return
+    if param.name == "trace_file":
+        ctx.meta["cdkdiff.trace_file"] = value
+    if "cdkdiff.tracer" in ctx.meta:
+        return  # both options were given
+    from cdkdiff import profiling
+    tracer = ctx.meta["cdkdiff.tracer"] = profiling.enable()
+    root = ExitStack()
+    root.enter_context(span(f"cdkdiff {ctx.info_name}"))
+
+    def report() -> None:
+        root.close()
+        profiling.disable()
+        click.echo(tracer.report(), err=True)
+        if trace_file := ctx.meta.get("cdkdiff.trace_file"):
+            tracer.write_chrome_trace(trace_file)
+            click.echo(f"Wrote Chrome trace to {trace_file}", err=True)
+
+    ctx.call_on_close(report)
+
+
+def _profile_options(f: Callable) -> Callable:
+    f = click.option(
+        "--trace-file", type=click.Path(dir_okay=False, writable=True), default=None,
+        expose_value=False, callback=_enable_profiling,
+        help="Write the --profile spans to this file as Chrome trace-event JSON "
+             "(opens in Perfetto). Implies --profile.",
+    )(f)
+    return click.option(
+        "--profile", is_flag=True, default=False, expose_value=False,
+        callback=_enable_profiling,
+        help="Print a breakdown of time spent per phase, cdk process and GitHub request "
+             "to stderr.",
+    )(f)
+
+
+_metrics_option = click.option(
+    "--metrics-file", "metrics_path", type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write run metrics (cdk diff and parse time histograms, change counts, cache "
+         "hits) to this file in the Prometheus text format, e.g. for node-exporter's "
+         "textfile collector.",
+)
+_rules_option = click.option(
+    "--rules", "rules_file", envvar="CDKDIFF_RULES",
+    type=click.Path(exists=True, dir_okay=False), default=None,
+    help="JSON, TOML or YAML file of scoring rules, checked before the built-in "
+         "rules. [env: CDKDIFF_RULES]",
+)
+
+
+@main.command("diff")
 @click.argument("stacks", nargs=-1)
-@click.option("--output", "-o",
-              type=click.Choice(["terminal", "json", "pr-comment"]),
-              default="terminal",
-              show_default=True,
-              help="Output format.")
-@click.option("--fail-on",
-              type=click.Choice(["low", "medium", "high"]),
-              default=None,
-              help="Exit 1 if any change meets or exceeds this risk level.")
-@click.option("--post-github", is_flag=True, default=False,
-              help="Post diff as a GitHub PR comment (requires GITHUB_TOKEN).")
+@_output_option
+@_fail_on_option
+@_fail_fast_option
+@_post_github_option
+@_compact_option
+@_archive_option
+@_history_option
+@_commit_option
 @click.option("--context", default=".", show_default=True,
               help="Path to CDK app directory.")
-def main(stacks: tuple[str, ...], output: str, fail_on: str | None,
-         post_github: bool, context: str) -> None:
-    """CDK diff with risk scoring.
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Diff up to N stacks concurrently against a single synthesized assembly.")
+@click.option("--app", "app_dir", default=None,
+              help="Diff against an existing cloud assembly directory (e.g. cdk.out) "
+                   "instead of synthesizing. Relative to --context.")
+@click.option("--synth", "synth_once", is_flag=True, default=False,
+              help="Synthesize into cdk.out once and reuse it while the source tree "
+                   "is unchanged.")
+@click.option("--deployed", "deployed_dir",
+              type=click.Path(exists=True, file_okay=False), default=None,
+              help="Diff natively against deployed template snapshots in this directory "
+                   "(<StackName>.template.json) without running cdk diff.")
+@click.option("--cache-key", "deployed_key", envvar="CDKDIFF_CACHE_KEY", default=None,
+              help="Identifies the deployed state (e.g. the last deployed commit). Enables "
+                   "the result cache for cdk diff runs. [env: CDKDIFF_CACHE_KEY]")
+@click.option("--cache/--no-cache", "cache_flag", default=None,
+              help="Read and write the on-disk result cache and report hits. By default "
+                   "it is used quietly whenever --deployed or --cache-key identifies the "
+                   "deployed state; --no-cache turns it off.")
+@click.option("--since", default=None, metavar="REF_OR_PATH",
+              help="Only diff stacks whose template or assets changed since a baseline "
+                   "assembly (a cdk.out directory, its manifest.json, or a git ref).")
+@_rules_option
+@_profile_options
+@_metrics_option
+def diff_command(stacks: tuple[str, ...], output: str, fail_on: str | None,
+                 fail_fast: bool, post_github: bool, compact: bool, archive_path: str | None,
+                 history_path: str | None, commit: str | None, context: str, jobs: int,
+                 app_dir: str | None, synth_once: bool, deployed_dir: str | None,
+                 deployed_key: str | None, cache_flag: bool | None, since: str | None,
+                 rules_file: str | None, metrics_path: str | None) -> None:
+    """Diff the stacks of one CDK app.
 
-    Optionally pass stack names or glob patterns to diff specific stacks.
+    Optionally pass stack names or patterns to diff specific stacks: globs (`Api*`),
+    regular expressions between slashes (`/^Api/`), and `!` before either to exclude.
     """
+    if fail_fast and not fail_on:
+        raise click.BadParameter("requires --fail-on.", param_hint="'--fail-fast'")
+    threshold = RiskLevel(fail_on) if fail_fast else None
+    streamed = stopped = False
+    cache = None
+    if metrics_path:
+        _start_metrics()
+    rules = _load_rules(rules_file) if rules_file else None
+    # Live deployed state is only cacheable when the caller says what it is
+    use_cache = cache_flag is not False and bool(deployed_dir or deployed_key)
+    if cache_flag and not use_cache:
+        raise click.BadParameter("needs --deployed or --cache-key to identify the deployed "
+                                 "state.", param_hint="'--cache'")
+    needs_assembly = synth_once or jobs > 1 or bool(deployed_dir) or use_cache or bool(since)
+    with span("assembly"):
+        app = _resolve_assembly(context, app_dir, needs_assembly)
+        # Read stack names from the assembly manifest rather than `cdk list` when we can
+        available = (list(assembly_stacks(app)) if app and (deployed_dir or use_cache or since)
+                     else None)
+
     stack_list = list(stacks)
     if stack_list:
-        stack_list = expand_stack_patterns(stack_list, context_path=context)
-
-    raw = run_cdk_diff(stack_names=stack_list, context_path=context)
-    summary = score_summary(parse(raw))
-
-    if output == "json":
-        click.echo(format_json(summary))
-    elif output == "pr-comment":
-        md = format_github(summary)
-        click.echo(md)
-        if post_github:
-            _post_to_github(md)
-    else:
-        print_summary(summary, console=Console())
+        with span("expand stack patterns"):
+            try:
+                stack_list = expand_stack_patterns(
+                    stack_list, context_path=context, app=app, available=available
+                )
+            except ValueError as e:
+                raise click.BadParameter(str(e), param_hint="STACKS")
+
+    selected = stack_list
+    if since and app:  # --since always resolves an assembly
+        selected = stack_list or available or []
+        with span("changed since"):
+            stack_list = _changed_since(selected, since, app)
+
+    def diff(names: list[str]) -> DiffSummary:
+        # --since diffs only the changed stacks, not their unchanged dependencies
+        return _diff_stacks(
+            names, context=context, app=app, jobs=jobs, deployed_dir=deployed_dir, rules=rules,
+            fail_fast=threshold, exclusively=bool(since),
+        )
+
+    def stop_stream() -> None:
+        nonlocal stopped
+        stopped = True
+        lines.close()  # kills cdk diff
+
+    try:
+        if since and not stack_list:
+            summary = DiffSummary()  # nothing changed since the baseline
+        elif use_cache and app:  # as does --cache
+            cache = DiffCache()
+            summary = _diff_cached(
+                stack_list or available or [], diff, cache,
+                app=app, deployed_dir=deployed_dir, deployed_key=deployed_key,
+                version=rules_version(rules),
+            )
+            if cache_flag:
+                click.echo(cache.stats, err=True)
+        elif output in (TERMINAL, "ndjson") and jobs == 1 and not deployed_dir and not since:
+            # Emit each stack as soon as its block of cdk output closes
+            lines = stream_cdk_diff(stack_names=stack_list, context_path=context, app=app)
+            scored: Iterator[StackDiff] = (score_stack(s, rules) for s in _parse_streamed(lines))
+            if threshold:
+                scored = _until_breach(scored, threshold, stop_stream)
+            with span("diff, parse, score and render (streamed)"):
+                if output == TERMINAL and compact:
+                    from cdkdiff.formatters.compact import print_compact_stream
+                    summary = print_compact_stream(scored, sys.stdout)
+                elif output == TERMINAL:
+                    from cdkdiff.formatters.terminal import print_stream
+                    summary = print_stream(scored)
+                else:
+                    from cdkdiff.formatters.ndjson_fmt import stream_ndjson
+                    summary = stream_ndjson(scored, sys.stdout)
+            streamed = True
+        else:
+            summary = diff(stack_list)
+    except _FailFast as e:
+        summary, stopped = e.summary, True
+
+    if since and not stopped:
+        summary = _with_unchanged(selected, stack_list, summary)
+
+    if history_path and not stopped:  # a partial run would read as a complete one
+        _record_history(summary, history_path, commit)
+    if metrics_path:
+        _write_metrics(metrics_path, summary, cache)
+    _finish(summary, output, fail_on, post_github, streamed=streamed, compact=compact,
+            archive_path=archive_path)
+
+
+@main.command("batch")
+@click.argument("roots", nargs=-1, type=click.Path(exists=True, file_okay=False))
+@_output_option
+@_fail_on_option
+@_post_github_option
+@_compact_option
+@_archive_option
+@_history_option
+@_commit_option
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=4, show_default=True,
+              help="Maximum number of apps diffed at once.")
+@_rules_option
+@_profile_options
+@_metrics_option
+def batch_command(roots: tuple[str, ...], output: str, fail_on: str | None,
+                  post_github: bool, compact: bool, archive_path: str | None,
+                  history_path: str | None, commit: str | None, jobs: int,
+                  rules_file: str | None, metrics_path: str | None) -> None:
+    """Diff every CDK app (a directory with cdk.json) found under ROOTS.
+
+    Apps are diffed concurrently in a process pool and reported together, with each
+    stack named `<app>:<stack>`.
+    """
+    from cdkdiff.batch import discover_apps, run_batch
+    apps = discover_apps(list(roots) or ["."])
+    if not apps:
+        raise click.ClickException("No CDK apps (cdk.json) found.")
+    rules = _load_rules(rules_file) if rules_file else None
+    if metrics_path:
+        _start_metrics()
+    # Spans inside the worker processes are not collected
+    with span("batch", apps=len(apps)):
+        summary = run_batch(apps, jobs=jobs, rules=rules)
+    if history_path:
+        _record_history(summary, history_path, commit)
+    if metrics_path:
+        _write_metrics(metrics_path, summary)
+    _finish(summary, output, fail_on, post_github, compact=compact, archive_path=archive_path)
+
+
+@main.command("render")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@_output_option
+@_fail_on_option
+@_post_github_option
+@_compact_option
+@_profile_options
+def render_command(path: str, output: str, fail_on: str | None, post_github: bool,
+                   compact: bool) -> None:
+    """Re-render a saved result without running CDK.
+
+    PATH is a binary archive written with --archive, or a `--output json` document.
+    """
+    from cdkdiff.archive import is_archive, read_archive
+    try:
+        with span("load", path=path):
+            # a ColumnarSummary renders wherever a DiffSummary does
+            summary = (cast(DiffSummary, read_archive(path)) if is_archive(path)
+                       else _read_json_summary(path))
+    except (OSError, ValueError, KeyError) as e:
+        raise click.ClickException(f"Could not load {path}: {e}")
+    _finish(summary, output, fail_on, post_github, compact=compact)
+
+
+def _read_json_summary(path: str) -> DiffSummary:
+    from cdkdiff.formatters.json_fmt import stack_from_dict
+    with open(path) as f:
+        data = json.load(f)
+    return DiffSummary(stacks=[stack_from_dict(s) for s in data["stacks"]])
+
+
+@main.command("history")
+@click.option("--db", "history_path", envvar="CDKDIFF_HISTORY", required=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help="SQLite history store written with --history. [env: CDKDIFF_HISTORY]")
+@click.option("--since", default=None, metavar="AGE_OR_DATE",
+              help="Only runs recorded within this age (e.g. 90d, 12h, 2w) or since an "
+                   "ISO date.")
+@click.option("--stack", default=None, help="Stack name glob.")
+@click.option("--resource-type", default=None, help="Resource type glob, e.g. 'AWS::IAM::*'.")
+@click.option("--logical-id", default=None, help="Logical ID glob.")
+@click.option("--change-type", type=click.Choice([t.value for t in ChangeType]), default=None)
+@click.option("--risk", "min_risk", type=click.Choice(["low", "medium", "high"]), default=None,
+              help="Only changes at or above this risk level.")
+@click.option("--replacement", is_flag=True, default=False,
+              help="Only changes that replace the resource.")
+@click.option("--commit", default=None, help="Only runs recorded for this commit (prefix).")
+@click.option("--limit", type=click.IntRange(min=1), default=None,
+              help="Show at most N changes.")
+@click.option("--json", "as_json", is_flag=True, default=False,
+              help="Print one JSON record per line instead of a table.")
+def history_command(history_path: str, since: str | None, stack: str | None,
+                    resource_type: str | None, logical_id: str | None,
+                    change_type: str | None, min_risk: str | None, replacement: bool,
+                    commit: str | None, limit: int | None, as_json: bool) -> None:
+    """Query changes recorded in a history store, newest first.
+
+    For example, stacks with high-risk replacements in the last 90 days:
+    `cdkdiff history --since 90d --risk high --replacement`.
+    """
+    from cdkdiff.history import HistoryStore, parse_since
+    try:
+        cutoff = parse_since(since) if since else None
+    except ValueError:
+        raise click.BadParameter(f"{since!r} is neither an age like 90d nor an ISO date.",
+                                 param_hint="--since")
+    with HistoryStore(history_path) as store:
+        entries = store.query(
+            since=cutoff, stack=stack, resource_type=resource_type, logical_id=logical_id,
+            change_type=ChangeType(change_type) if change_type else None,
+            min_risk=RiskLevel(min_risk) if min_risk else None,
+            replacement=True if replacement else None, commit=commit, limit=limit,
+        )
+    if as_json:
+        for e in entries:
+            click.echo(json.dumps({
+                "recorded_at": e.recorded_at, "commit": e.commit, "stack": e.stack,
+                "resource_type": e.resource_type, "logical_id": e.logical_id,
+                "change_type": e.change_type.value, "risk": e.risk.value,
+                "requires_replacement": e.requires_replacement, "rule": e.rule,
+            }))
+        return
+    for e in entries:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(e.recorded_at))
+        replaced = " (replacement)" if e.requires_replacement else ""
+        click.echo(f"{when}  {(e.commit or '-')[:12]:<12}  {e.risk.value.upper():<6}  "
+                   f"{e.change_type.value:<6}  {e.stack}  {e.resource_type}  "
+                   f"{e.logical_id}{replaced}")
+
+
+@main.command("serve")
+@click.option("--context", default=".", show_default=True,
+              help="Path to CDK app directory.")
+@click.option("--jobs", "-j", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Diff up to N changed stacks concurrently.")
+@click.option("--deployed", "deployed_dir",
+              type=click.Path(exists=True, file_okay=False), default=None,
+              help="Diff natively against deployed template snapshots in this directory "
+                   "(<StackName>.template.json) without running cdk diff.")
+@click.option("--host", default="127.0.0.1", show_default=True,
+              help="Address to listen on.")
+@click.option("--port", type=click.IntRange(min=0), default=8765, show_default=True,
+              help="TCP port to listen on.")
+@click.option("--socket", "socket_path", default=None,
+              help="Listen on this Unix socket instead of a TCP port.")
+@click.option("--interval", type=click.FloatRange(min=0.1), default=1.0, show_default=True,
+              help="Seconds between checks of the source tree for edits.")
+@_rules_option
+def serve_command(context: str, jobs: int, deployed_dir: str | None, host: str, port: int,
+                  socket_path: str | None, interval: float, rules_file: str | None) -> None:
+    """Keep the diff of a CDK app current and serve it over HTTP.
+
+    Watches the source tree, re-synthesizes after edits and re-diffs only the stacks
+    whose template or assets changed. GET /summary returns the latest result as JSON
+    (?format= selects another formatter; ?wait=GENERATION blocks until a newer one);
+    GET /status reports progress.
+    """
+    from cdkdiff.server import DiffService, make_server, remove_stale_socket
+    rules = _load_rules(rules_file) if rules_file else None
+    app = os.path.abspath(os.path.join(context, "cdk.out"))
+
+    def diff(names: list[str]) -> DiffSummary:
+        return _diff_stacks(
+            names, context=context, app=app, jobs=jobs, deployed_dir=deployed_dir, rules=rules,
+        )
+
+    service = DiffService(context, diff)
+    try:
+        server = make_server(service, host=host, port=port, socket_path=socket_path)
+    except ValueError as e:
+        raise click.UsageError(f"--socket: {e}")
+    except OSError as e:
+        raise click.ClickException(f"Cannot listen: {e}")
+    stop = threading.Event()
+    watcher = threading.Thread(target=service.watch, args=(stop, interval), daemon=True)
+    watcher.start()
+    where = socket_path or f"http://{host}:{cast(tuple, server.server_address)[1]}"
+    click.echo(f"Serving the diff of {os.path.abspath(context)} on {where}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if socket_path:
+            remove_stale_socket(socket_path)
+
+
+def _start_metrics() -> None:
+    """Make sure spans are recorded, for the durations in the metrics file."""
+    from cdkdiff import profiling
+    if profiling.current() is None:
+        profiling.enable()
+        click.get_current_context().call_on_close(profiling.disable)
+
+
+def _write_metrics(path: str, summary: DiffSummary, cache: DiffCache | None = None) -> None:
+    from cdkdiff import profiling
+    from cdkdiff.metrics import render_metrics, write_metrics
+    tracer = profiling.current()
+    text = render_metrics(
+        summary, tracer.spans if tracer else (),
+        cache_hits=cache.hits if cache else None, cache_misses=cache.misses if cache else None,
+    )
+    try:
+        write_metrics(path, text)
+    except OSError as e:
+        raise click.ClickException(f"Could not write metrics to {path}: {e}")
+
+
+def _record_history(summary: DiffSummary, history_path: str, commit: str | None) -> None:
+    import sqlite3
+
+    from cdkdiff.history import HistoryStore
+    try:
+        with HistoryStore(history_path) as store, span("record history"):
+            store.record(summary, commit=commit)
+    except sqlite3.Error as e:
+        raise click.ClickException(f"Could not record history in {history_path}: {e}")
+
+
+def _finish(summary: DiffSummary, output: str, fail_on: str | None, post_github: bool,
+            streamed: bool = False, compact: bool = False,
+            archive_path: str | None = None) -> None:
+    """Render `summary`, then fail on errored stacks or risks at or above `fail_on`."""
+    if archive_path:
+        from cdkdiff.archive import write_archive
+        try:
+            with open(archive_path, "wb") as f, span("write archive"):
+                write_archive(summary, f)
+        except OSError as e:
+            raise click.ClickException(f"Could not write archive {archive_path}: {e}")
+    rendered = None
+    with span("render", output=output):
+        if streamed:
+            pass
+        elif output == TERMINAL and compact:
+            from cdkdiff.formatters.compact import print_compact
+            print_compact(summary, sys.stdout)
+        elif output == TERMINAL:
+            from cdkdiff.formatters.terminal import print_summary
+            print_summary(summary)
+        elif (writer := get_writer(output)) is not None:
+            writer(summary, sys.stdout)
+        else:
+            rendered = get_formatter(output)(summary)
+            click.echo(rendered)
+    if rendered is not None and post_github and output == "pr-comment":
+        with span("post to GitHub"):
+            _post_to_github(rendered)
+
+    failed = [s.name for s in summary.stacks if s.error]
+    if failed:
+        raise click.ClickException(f"Failed to diff {len(failed)} stack(s): {', '.join(failed)}")
 
     if fail_on:
         threshold = RiskLevel(fail_on)
@@ -60,6 +570,249 @@ def main(stacks: tuple[str, ...], output: str, fail_on: str | None,
             sys.exit(1)
 
 
+def _resolve_assembly(context: str, app_dir: str | None, synth_once: bool) -> str | None:
+    """Return the cloud assembly every cdk call should use, or None to let cdk synth."""
+    if app_dir:
+        assembly = os.path.abspath(os.path.join(context, app_dir))
+        if not is_assembly(assembly):
+            raise click.ClickException(f"--app {app_dir!r} is not a cloud assembly directory.")
+        return assembly
+    if synth_once:
+        # Parallel mode relies on this too so concurrent diffs share one synth
+        return ensure_assembly(context)
+    return None
+
+
+def _changed_since(names: list[str], since: str, app: str) -> list[str]:
+    """Return the stacks in `names` whose fingerprint differs from the baseline's."""
+    try:
+        baseline = baseline_fingerprints(since, app)
+    except (RuntimeError, OSError, ValueError, KeyError) as e:
+        raise click.ClickException(f"Could not load baseline {since!r}: {e}")
+    current = stack_fingerprints(app)
+    return [n for n in names if n not in current or current[n] != baseline.get(n)]
+
+
+def _with_unchanged(names: list[str], changed: list[str], summary: DiffSummary) -> DiffSummary:
+    """Slot stacks skipped by --since back into the summary, marked unchanged."""
+    changed_set = set(changed)
+    return DiffSummary(stacks=in_request_order(
+        names, summary.stacks,
+        lambda name: StackDiff(name=name, unchanged=name not in changed_set),
+    ))
+
+
+def _load_rules(path: str) -> RuleSet:
+    from cdkdiff.rules import load_rules
+    try:
+        return load_rules(path)
+    except (OSError, ValueError, TypeError) as e:
+        raise click.ClickException(f"Invalid rules file {path!r}: {e}")
+
+
+def _run_scheduled(names: list[str], context: str, app: str | None, jobs: int,
+                   stop_when: Callable[[StackRun], bool] | None = None) -> list[StackRun]:
+    """Run per-stack diffs longest critical path first, with timeouts from past runs."""
+    assembly = app if app and is_assembly(app) else os.path.join(context, "cdk.out")
+    dependencies = stack_dependencies(assembly)
+    history = DurationHistory(context)
+    runs = run_cdk_diff_parallel(
+        names, context_path=context, jobs=jobs, app=app,
+        timeouts={name: history.timeout(name) for name in names},
+        priority=history.priorities(names, dependencies),
+        dependencies=dependencies,
+        stop_when=stop_when,
+    )
+    for run in runs:
+        if run.error is None:  # a timeout or failure says nothing about normal duration
+            history.record(run.name, run.duration)
+    history.save()
+    return runs
+
+
+class _FailFast(Exception):
+    """A diff stopped at the first stack breaching --fail-on; carries the partial result."""
+
+    def __init__(self, summary: DiffSummary) -> None:
+        super().__init__("stopped at the first stack breaching --fail-on")
+        self.summary = summary
+
+
+def _breaches(stack: StackDiff, threshold: RiskLevel) -> bool:
+    """Return True, naming the offending change, if `stack` has one at or above `threshold`."""
+    change = next((c for c in stack.changes if c.risk >= threshold), None)
+    if change is None:
+        return False
+    click.echo(
+        f"--fail-fast: {stack.name} {change.logical_id} ({change.resource_type}) is "
+        f"{change.risk.value} risk; not diffing the remaining stacks.",
+        err=True,
+    )
+    return True
+
+
+def _until_breach(stacks: Iterable[StackDiff], threshold: RiskLevel,
+                  stop: Callable[[], None]) -> Iterator[StackDiff]:
+    """Yield `stacks` up to the first with a change at or above `threshold`, then `stop()`."""
+    for stack in stacks:
+        yield stack
+        if _breaches(stack, threshold):
+            stop()
+            return
+
+
+def _parse_streamed(lines: Iterator[str]) -> Iterator[StackDiff]:
+    """`parse_stream`, recording a `parse` span per stack while profiling.
+
+    A span covers only the parser's own work, not the time spent waiting for cdk to
+    produce a line or for the caller to consume the stack.
+    """
+    from cdkdiff import profiling
+    if profiling.current() is None:
+        return parse_stream(lines)
+
+    waited = 0.0
+
+    def timed() -> Iterator[str]:
+        nonlocal waited
+        source = iter(lines)
+        while True:
+            asked = time.perf_counter()
+            line = next(source, None)
+            waited += time.perf_counter() - asked
+            if line is None:
+                return
+            yield line
+
+    def stacks() -> Iterator[StackDiff]:
+        nonlocal waited
+        started, waited = time.perf_counter(), 0.0
+        for stack in parse_stream(timed()):
+            profiling.record("parse", time.perf_counter() - started - waited,
+                             stack=stack.name)
+            yield stack
+            started, waited = time.perf_counter(), 0.0
+
+    return stacks()
+
+
+def _diff_stacks(names: list[str], context: str, app: str | None, jobs: int,
+                 deployed_dir: str | None, rules: RuleSet | None,
+                 fail_fast: RiskLevel | None = None, exclusively: bool = False) -> DiffSummary:
+    """Diff and score `names` (all stacks if empty) with the selected engine.
+
+    With `fail_fast`, a cdk diff stops at the first stack with a change at or above that
+    risk and raises `_FailFast` with the stacks diffed so far. With `exclusively`, a
+    single cdk diff leaves out the stacks that `names` depend on.
+    """
+    if deployed_dir and app:  # the native engine always runs against an assembly
+        with span("native diff"):
+            summary = diff_assembly(app, deployed_dir, names)
+    elif jobs > 1 and fail_fast:
+        return _diff_parallel_fail_fast(
+            names or list_stacks(context, app=app), context, app, jobs, rules, fail_fast,
+        )
+    elif jobs > 1:
+        runs = _run_scheduled(names or list_stacks(context, app=app), context, app, jobs)
+        with span("parse"):
+            summary = _summary_from_runs(runs)
+    elif fail_fast:
+        lines = stream_cdk_diff(stack_names=names, context_path=context, app=app,
+                                exclusively=exclusively)
+        scored = (score_stack(s, rules) for s in _parse_streamed(lines))
+        stopped = False
+
+        def stop() -> None:
+            nonlocal stopped
+            stopped = True
+            lines.close()  # kills cdk diff
+
+        summary = DiffSummary(stacks=list(_until_breach(scored, fail_fast, stop)))
+        if stopped:
+            raise _FailFast(summary)
+        return summary
+    else:
+        raw = run_cdk_diff(stack_names=names, context_path=context, app=app,
+                           exclusively=exclusively)
+        with span("parse"):
+            summary = parse(raw)
+    with span("score"):
+        return score_summary(summary, rules)
+
+
+def _diff_parallel_fail_fast(names: list[str], context: str, app: str | None, jobs: int,
+                             rules: RuleSet | None, threshold: RiskLevel) -> DiffSummary:
+    """Parse and score each stack as its process finishes, stopping at the first breach."""
+    scored: dict[str, list[StackDiff]] = {}
+    stopped = False
+
+    def breached(run: StackRun) -> bool:
+        nonlocal stopped
+        with span("parse"):
+            stacks = _stacks_from_run(run)
+        with span("score"):
+            scored[run.name] = [score_stack(s, rules) for s in stacks]
+        stopped = any(_breaches(s, threshold) for s in scored[run.name])
+        return stopped
+
+    runs = _run_scheduled(names, context, app, jobs, stop_when=breached)
+    summary = DiffSummary(stacks=in_request_order(
+        [run.name for run in runs], (s for run in runs for s in scored[run.name]), StackDiff,
+    ))
+    if stopped:
+        raise _FailFast(summary)
+    return summary
+
+
+def _diff_cached(names: list[str], diff: Callable[[list[str]], DiffSummary], cache: DiffCache,
+                 app: str, deployed_dir: str | None, deployed_key: str | None,
+                 version: str) -> DiffSummary:
+    """Serve stacks from the result cache and diff only the misses.
+
+    Keys combine the synthesized template hash, a fingerprint of the deployed state (the
+    snapshot file for the native engine, else `deployed_key`) and the scoring rules version.
+    """
+    hashes = template_hashes(app)
+    keys: dict[str, str] = {}
+    for name in names:
+        if name not in hashes:
+            continue  # not in the assembly — nothing to key on, always diff
+        deployed_fingerprint = deployed_key or ""
+        if deployed_dir:
+            path = deployed_template_path(deployed_dir, name)
+            deployed_fingerprint = file_digest(path) if path else "undeployed"
+        keys[name] = cache_key(name, hashes[name], deployed_fingerprint, version)
+
+    cached = {name: cache.get(key) for name, key in keys.items()}
+    misses = [name for name in names if cached.get(name) is None]
+    fresh = diff(misses).stacks if misses else []
+
+    stacks = in_request_order(names, fresh, lambda name: cached.get(name) or StackDiff(name=name))
+    for stack in stacks:
+        name = stack.name
+        if name in keys and cached[name] is None and not stack.error:
+            cache.put(keys[name], stack)
+    cache.evict()
+    return DiffSummary(stacks=stacks)
+
+
+def _stacks_from_run(run: StackRun) -> list[StackDiff]:
+    if run.error:
+        return [StackDiff(name=run.name, error=run.error)]
+    # A stack with no differences may print nothing parseable
+    return parse(run.output).stacks or [StackDiff(name=run.name)]
+
+
+def _summary_from_runs(runs: list[StackRun]) -> DiffSummary:
+    """Merge per-stack `cdk diff` outputs into one summary, keeping run order.
+
+    A stack reported by more than one run appears once.
+    """
+    return DiffSummary(stacks=in_request_order(
+        [run.name for run in runs], (s for run in runs for s in _stacks_from_run(run)), StackDiff,
+    ))
+
+
 def _post_to_github(body: str) -> None:
     from cdkdiff.github_client import post_pr_comment
     token = os.environ.get("GITHUB_TOKEN")
@@ -77,8 +830,10 @@ def _post_to_github(body: str) -> None:
     if not pr_number:
         raise click.ClickException("Could not determine PR number. Set GITHUB_PR_NUMBER.")
 
-    post_pr_comment(token=token, repo=repo, pr_number=pr_number, body=body)
-    click.echo(f"Posted diff to PR #{pr_number} in {repo}", err=True)
+    if post_pr_comment(token=token, repo=repo, pr_number=pr_number, body=body):
+        click.echo(f"Posted diff to PR #{pr_number} in {repo}", err=True)
+    else:
+        click.echo(f"Diff comment on PR #{pr_number} in {repo} is up to date", err=True)
 
 
 def _resolve_pr_number() -> int | None:
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+from cdkdiff.models import (
+    _RISK_ORDER,
+    Change,
+    ChangeList,
+    ChangeType,
+    DiffSummary,
+    PropertyChange,
+    RiskLevel,
+    StackDiff,
+)
+
+_RISKS = _RISK_ORDER  # a risk's column code is its rank
+CHANGE_TYPES = tuple(ChangeType)  # a change type's column code is its index here
+CHANGE_TYPE_CODES = {change_type: code for code, change_type in enumerate(CHANGE_TYPES)}
+
+
+class _Columns:
+    """Parallel per-field arrays holding every change of a summary.
+
+    Low-cardinality strings (resource types, details, rule ids) are stored once in a
+    string table and referenced by index; enums are stored as one-byte codes.
+    """
+    __slots__ = (
+        "_string_ids", "change_type", "details", "logical_id", "properties", "requires_replacement",
+        "resource_type", "risk", "rule", "strings",
+    )
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self.resource_type = array("I")
+        self.logical_id: list[str] = []
+        self.change_type = array("B")
+        self.risk = array("B")
+        self.details = array("I")
+        self.requires_replacement = array("B")
+        self.rule = array("I")
+        self.properties: dict[int, list[PropertyChange]] = {}  # sparse: most changes have none
+
+    def __len__(self) -> int:
+        return len(self.logical_id)
+
+    def string_id(self, value: str) -> int:
+        index = self._string_ids.get(value)
+        if index is None:
+            index = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def append(self, change: Change) -> None:
+        if change.properties:
+            self.properties[len(self)] = list(change.properties)
+        self.resource_type.append(self.string_id(change.resource_type))
+        self.logical_id.append(change.logical_id)
+        self.change_type.append(CHANGE_TYPE_CODES[change.change_type])
+        self.risk.append(change.risk.rank)
+        self.details.append(self.string_id(change.details))
+        self.requires_replacement.append(change.requires_replacement)
+        self.rule.append(self.string_id(change.rule))
+
+
+class ChangeView:
+    """A `Change`-compatible view of one row; assigning to an attribute writes the column."""
+    __slots__ = ("_cols", "_index")
+    __hash__ = None  # type: ignore[assignment]  # mutable, like Change
+
+    def __init__(self, cols: _Columns, index: int) -> None:
+        self._cols = cols
+        self._index = index
+
+    @property
+    def resource_type(self) -> str:
+        return self._cols.strings[self._cols.resource_type[self._index]]
+
+    @resource_type.setter
+    def resource_type(self, value: str) -> None:
+        self._cols.resource_type[self._index] = self._cols.string_id(value)
+
+    @property
+    def logical_id(self) -> str:
+        return self._cols.logical_id[self._index]
+
+    @logical_id.setter
+    def logical_id(self, value: str) -> None:
+        self._cols.logical_id[self._index] = value
+
+    @property
+    def change_type(self) -> ChangeType:
+        return CHANGE_TYPES[self._cols.change_type[self._index]]
+
+    @change_type.setter
+    def change_type(self, value: ChangeType) -> None:
+        self._cols.change_type[self._index] = CHANGE_TYPE_CODES[value]
+
+    @property
+    def risk(self) -> RiskLevel:
+        return _RISKS[self._cols.risk[self._index]]
+
+    @risk.setter
+    def risk(self, value: RiskLevel) -> None:
+        self._cols.risk[self._index] = value.rank
+
+    @property
+    def details(self) -> str:
+        return self._cols.strings[self._cols.details[self._index]]
+
+    @details.setter
+    def details(self, value: str) -> None:
+        self._cols.details[self._index] = self._cols.string_id(value)
+
+    @property
+    def requires_replacement(self) -> bool:
+        return bool(self._cols.requires_replacement[self._index])
+
+    @requires_replacement.setter
+    def requires_replacement(self, value: bool) -> None:
+        self._cols.requires_replacement[self._index] = value
+
+    @property
+    def rule(self) -> str:
+        return self._cols.strings[self._cols.rule[self._index]]
+
+    @rule.setter
+    def rule(self, value: str) -> None:
+        self._cols.rule[self._index] = self._cols.string_id(value)
+
+    @property
+    def properties(self) -> Sequence[PropertyChange]:
+        return self._cols.properties.get(self._index, ())
+
+    @properties.setter
+    def properties(self, value: Sequence[PropertyChange]) -> None:
+        if value:
+            self._cols.properties[self._index] = list(value)
+        else:
+            self._cols.properties.pop(self._index, None)
+
+    def to_change(self) -> Change:
+        return Change(
+            resource_type=self.resource_type,
+            logical_id=self.logical_id,
+            change_type=self.change_type,
+            risk=self.risk,
+            details=self.details,
+            requires_replacement=self.requires_replacement,
+            rule=self.rule,
+            properties=list(self.properties),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChangeView):
+            other = other.to_change()
+        if not isinstance(other, Change):
+            return NotImplemented
+        return self.to_change() == other
+
+    def __repr__(self) -> str:
+        return repr(self.to_change()).replace("Change(", "ChangeView(", 1)
+
+
+class _ChangeRows(Sequence):
+    """The contiguous run of rows belonging to one stack."""
+    __slots__ = ("_cols", "_start", "_stop")
+
+    def __init__(self, cols: _Columns, start: int, stop: int) -> None:
+        self._cols = cols
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("change index out of range")
+        return ChangeView(self._cols, self._start + index)
+
+    def __iter__(self) -> Iterator[ChangeView]:
+        cols = self._cols
+        return (ChangeView(cols, i) for i in range(self._start, self._stop))
+
+    def rescore(self, change: ChangeView, risk: RiskLevel) -> None:
+        change.risk = risk
+
+    @property
+    def risk_codes(self) -> array:
+        return self._cols.risk[self._start:self._stop]
+
+    @property
+    def highest_risk(self) -> RiskLevel | None:
+        return _RISKS[max(self.risk_codes)] if len(self) else None
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        codes = self.risk_codes
+        return {risk: codes.count(risk.rank) for risk in _RISKS}
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        codes = self._cols.change_type[self._start:self._stop]
+        return {t: codes.count(code) for t, code in CHANGE_TYPE_CODES.items()}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, _ChangeRows)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+
+class ColumnarStack:
+    """A `StackDiff`-compatible view over one stack's rows."""
+    __slots__ = ("_rows", "error", "name", "unchanged")
+
+    def __init__(
+        self, name: str, rows: _ChangeRows, error: str | None = None, unchanged: bool = False
+    ) -> None:
+        self.name = name
+        self.error = error
+        self.unchanged = unchanged
+        self._rows = rows
+
+    @property
+    def changes(self) -> _ChangeRows:
+        return self._rows
+
+    @property
+    def risk(self) -> RiskLevel | None:
+        return self._rows.highest_risk
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        return self._rows.risk_counts
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        return self._rows.change_type_counts
+
+    def rescore(self, change: ChangeView, risk: RiskLevel) -> None:
+        self._rows.rescore(change, risk)
+
+    def to_stack(self) -> StackDiff:
+        return StackDiff(
+            name=self.name,
+            changes=ChangeList(c.to_change() for c in self._rows),
+            error=self.error,
+            unchanged=self.unchanged,
+        )
+
+
+class ColumnarSummary:
+    """A `DiffSummary`-compatible summary backed by parallel arrays.
+
+    Meant for very large runs: a change costs a few array slots instead of a Python
+    object, and `ChangeView` rows are only materialized while they are being read.
+    Stacks are appended whole; their changes cannot be extended afterwards.
+    """
+
+    def __init__(self, stacks: Iterable[StackDiff] = ()) -> None:
+        self._cols = _Columns()
+        self.stacks: list[ColumnarStack] = []
+        for stack in stacks:
+            self.add_stack(stack)
+
+    def add_stack(self, stack: StackDiff) -> ColumnarStack:
+        """Copy a stack's changes into the columns and return its columnar view."""
+        cols = self._cols
+        start = len(cols)
+        for change in stack.changes:
+            cols.append(change)
+        view = ColumnarStack(
+            stack.name, _ChangeRows(cols, start, len(cols)), stack.error, stack.unchanged,
+        )
+        self.stacks.append(view)
+        return view
+
+    @classmethod
+    def from_columns(
+        cls,
+        strings: list[str],
+        changes: Mapping[str, array],
+        properties: dict[int, list[PropertyChange]],
+        stacks: Iterable[tuple[str, int, int, str | None, bool]],
+    ) -> ColumnarSummary:
+        """Build a summary directly from its columns, e.g. as read back from an archive.
+
+        `changes` holds one array per `Change` field. String fields are indices into
+        `strings`, `change_type` is a `CHANGE_TYPES` code and `risk` is a rank.
+        `properties` maps a change row to its property changes, and each stack is
+        `(name, first row, end row, error, unchanged)`.
+        """
+        cols = _Columns()
+        cols.strings = strings
+        cols._string_ids = {s: i for i, s in enumerate(strings)}
+        cols.resource_type = changes["resource_type"]
+        cols.logical_id = [strings[i] for i in changes["logical_id"]]
+        cols.change_type = changes["change_type"]
+        cols.risk = changes["risk"]
+        cols.details = changes["details"]
+        cols.requires_replacement = changes["requires_replacement"]
+        cols.rule = changes["rule"]
+        cols.properties = properties
+        summary = cls()
+        summary._cols = cols
+        summary.stacks = [
+            ColumnarStack(name, _ChangeRows(cols, start, stop), error, unchanged)
+            for name, start, stop, error, unchanged in stacks
+        ]
+        return summary
+
+    @property
+    def total_changes(self) -> int:
+        return len(self._cols)
+
+    @property
+    def highest_risk(self) -> RiskLevel | None:
+        return _RISKS[max(self._cols.risk)] if len(self._cols) else None
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        return {risk: self._cols.risk.count(risk.rank) for risk in _RISKS}
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        codes = self._cols.change_type
+        return {t: codes.count(code) for t, code in CHANGE_TYPE_CODES.items()}
+
+    def to_summary(self) -> DiffSummary:
+        return DiffSummary(stacks=[s.to_stack() for s in self.stacks])
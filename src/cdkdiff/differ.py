@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import json
+import os
+
+from cdkdiff.assembly import assembly_stacks
+from cdkdiff.models import (
+    Change,
+    ChangeType,
+    DiffSummary,
+    PropertyChange,
+    RiskLevel,
+    StackDiff,
+)
+
+_MISSING = object()  # distinguishes an absent property from one explicitly set to null
+
+# Resource attributes compared besides Properties; Metadata only carries CDK bookkeeping
+_COMPARED_ATTRIBUTES = ("DependsOn", "DeletionPolicy", "UpdateReplacePolicy", "Condition")
+
+# A subset of CloudFormation create-only properties — changing these replaces the resource
+_REPLACEMENT_PROPERTIES: dict[str, frozenset[str]] = {
+    "AWS::DynamoDB::Table": frozenset({"TableName", "KeySchema", "LocalSecondaryIndexes"}),
+    "AWS::EC2::SecurityGroup": frozenset({"GroupDescription", "GroupName", "VpcId"}),
+    "AWS::ECS::Cluster": frozenset({"ClusterName"}),
+    "AWS::ElastiCache::ReplicationGroup": frozenset({"ReplicationGroupId"}),
+    "AWS::IAM::Role": frozenset({"RoleName", "Path"}),
+    "AWS::KMS::Key": frozenset({"KeySpec"}),
+    "AWS::Lambda::Function": frozenset({"FunctionName"}),
+    "AWS::Logs::LogGroup": frozenset({"LogGroupName"}),
+    "AWS::RDS::DBInstance": frozenset(
+        {"DBInstanceIdentifier", "DBName", "Engine", "KmsKeyId", "StorageEncrypted"}
+    ),
+    "AWS::S3::Bucket": frozenset({"BucketName"}),
+    "AWS::SNS::Topic": frozenset({"TopicName", "FifoTopic"}),
+    "AWS::SQS::Queue": frozenset({"QueueName", "FifoQueue"}),
+}
+
+
+def _load_template(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def deployed_template_path(deployed_dir: str, stack_name: str) -> str | None:
+    """Return the snapshot file for a stack, or None if it has never been deployed.
+
+    Staged stacks (`Stage/Stack`) are also looked up by their CloudFormation name
+    (`Stage-Stack`).
+    """
+    for name in dict.fromkeys((stack_name, stack_name.replace("/", "-"))):
+        for filename in (f"{name}.template.json", f"{name}.json"):
+            path = os.path.join(deployed_dir, filename)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def _render(value: object) -> str | None:
+    if value is _MISSING:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+
+def _property_change(
+    name: str, new: object, old: object, immutable: frozenset[str]
+) -> PropertyChange:
+    if old is _MISSING:
+        change_type = ChangeType.ADD
+    elif new is _MISSING:
+        change_type = ChangeType.REMOVE
+    else:
+        change_type = ChangeType.UPDATE
+    return PropertyChange(
+        name, change_type, old=_render(old), new=_render(new),
+        requires_replacement=name in immutable,
+    )
+
+
+def _changed_properties(
+    current: dict, deployed: dict, immutable: frozenset[str] = frozenset()
+) -> list[PropertyChange]:
+    new_props = current.get("Properties") or {}
+    old_props = deployed.get("Properties") or {}
+    changed = [
+        _property_change(k, v, old_props.get(k, _MISSING), immutable)
+        for k, v in new_props.items() if v != old_props.get(k, _MISSING)
+    ]
+    changed.extend(
+        _property_change(k, _MISSING, v, immutable)
+        for k, v in old_props.items() if k not in new_props
+    )
+    changed.extend(
+        _property_change(a, current.get(a, _MISSING), deployed.get(a, _MISSING), immutable)
+        for a in _COMPARED_ATTRIBUTES if current.get(a) != deployed.get(a)
+    )
+    return changed
+
+
+def diff_templates(stack_name: str, current: dict, deployed: dict | None) -> StackDiff:
+    """Compare two CloudFormation templates resource by resource."""
+    new_resources = current.get("Resources") or {}
+    old_resources = (deployed or {}).get("Resources") or {}
+    stack = StackDiff(name=stack_name)
+
+    for logical_id, resource in new_resources.items():
+        resource_type = resource.get("Type", "")
+        old = old_resources.get(logical_id)
+        if old is None:
+            stack.changes.append(Change(resource_type, logical_id, ChangeType.ADD, RiskLevel.LOW))
+            continue
+        if old == resource:
+            continue
+
+        if old.get("Type") != resource_type:
+            stack.changes.append(Change(
+                resource_type, logical_id, ChangeType.UPDATE, RiskLevel.LOW,
+                details=f"type changed from {old.get('Type')}",
+                requires_replacement=True,
+            ))
+            continue
+
+        immutable = _REPLACEMENT_PROPERTIES.get(resource_type, frozenset())
+        changed = _changed_properties(resource, old, immutable)
+        if not changed:
+            continue  # only Metadata differs
+        stack.changes.append(Change(
+            resource_type, logical_id, ChangeType.UPDATE, RiskLevel.LOW,
+            details=", ".join(p.path for p in changed),
+            requires_replacement=any(p.requires_replacement for p in changed),
+            properties=changed,
+        ))
+
+    for logical_id, resource in old_resources.items():
+        if logical_id not in new_resources:
+            stack.changes.append(Change(
+                resource.get("Type", ""), logical_id, ChangeType.REMOVE, RiskLevel.LOW,
+                details="destroy",
+            ))
+
+    return stack
+
+
+def diff_assembly(
+    assembly_dir: str, deployed_dir: str, stack_names: list[str] | None = None
+) -> DiffSummary:
+    """Diff every (or the named) stack in a cloud assembly against deployed snapshots.
+
+    `deployed_dir` holds one `<StackName>.template.json` (or `<StackName>.json`) per
+    deployed stack; stacks without a snapshot are treated as new.
+    """
+    templates = assembly_stacks(assembly_dir)
+    names = stack_names if stack_names else list(templates)
+    stacks: list[StackDiff] = []
+    for name in names:
+        if name not in templates:
+            stacks.append(StackDiff(name=name, error="stack not found in cloud assembly"))
+            continue
+        try:
+            current = _load_template(templates[name])
+            deployed_path = deployed_template_path(deployed_dir, name)
+            deployed = _load_template(deployed_path) if deployed_path else None
+        except (OSError, ValueError) as e:
+            stacks.append(StackDiff(name=name, error=f"could not read template: {e}"))
+            continue
+        stacks.append(diff_templates(name, current, deployed))
+    return DiffSummary(stacks=stacks)
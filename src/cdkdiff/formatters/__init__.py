@@ -0,0 +1,90 @@
+"""Output formatters, resolved by name and imported only when selected.
+
+Besides the built-in formats, other packages can provide formatters through the
+`cdkdiff.formatters` entry-point group, e.g. in their pyproject.toml:
+
+    [project.entry-points."cdkdiff.formatters"]
+    html = "mypkg.html:format_html"
+
+A formatter takes a `DiffSummary` and returns the rendered text. Built-in formats
+that can be large also have a writer, which renders straight to a stream.
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, TextIO
+
+from cdkdiff.models import DiffSummary, StackDiff
+
+if TYPE_CHECKING:
+    from importlib.metadata import EntryPoint
+
+ENTRY_POINT_GROUP = "cdkdiff.formatters"
+
+# "terminal" is rendered by the CLI directly so tables can stream as stacks arrive
+TERMINAL = "terminal"
+
+_BUILTIN: dict[str, str] = {
+    "json": "cdkdiff.formatters.json_fmt:format_json",
+    "ndjson": "cdkdiff.formatters.ndjson_fmt:format_ndjson",
+    "pr-comment": "cdkdiff.formatters.github_fmt:format_github",
+}
+
+_WRITERS: dict[str, str] = {
+    "json": "cdkdiff.formatters.json_fmt:write_json",
+    "ndjson": "cdkdiff.formatters.ndjson_fmt:write_ndjson",
+}
+
+
+def _load(target: str) -> Callable:
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _entry_points() -> dict[str, EntryPoint]:
+    from importlib.metadata import entry_points
+    if sys.version_info >= (3, 10):
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    else:
+        found = entry_points().get(ENTRY_POINT_GROUP, [])
+    return {ep.name: ep for ep in found}
+
+
+def formatter_names() -> list[str]:
+    """Return every selectable output format, built-in ones first."""
+    return [TERMINAL, *_BUILTIN, *(n for n in _entry_points() if n not in _BUILTIN)]
+
+
+def get_formatter(name: str) -> Callable[[DiffSummary], str]:
+    """Import and return the formatter registered as `name`.
+
+    Raises KeyError for unknown names. Entry points are only consulted for names that
+    are not built in.
+    """
+    if name in _BUILTIN:
+        return _load(_BUILTIN[name])
+    entry_point = _entry_points().get(name)
+    if entry_point is None:
+        raise KeyError(name)
+    return entry_point.load()
+
+
+def get_writer(name: str) -> Callable[[DiffSummary, TextIO], None] | None:
+    """Return the streaming writer for a built-in format, or None if it has none."""
+    return _load(_WRITERS[name]) if name in _WRITERS else None
+
+
+def render_stream(stacks: Iterable[StackDiff],
+                  render: Callable[[StackDiff], None]) -> DiffSummary:
+    """Render each stack as soon as it arrives and return them all as one summary.
+
+    Streamed output goes out before the run's totals are known; the returned summary
+    lets the caller print them afterwards and still gate on `--fail-on`.
+    """
+    summary = DiffSummary()
+    for stack in stacks:
+        summary.stacks.append(stack)
+        render(stack)
+    return summary
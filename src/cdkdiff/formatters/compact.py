@@ -0,0 +1,94 @@
+"""Plain-text terminal output for very large diffs.
+
+Rows are pre-formatted and aligned by hand instead of going through rich tables and
+markup, so rendering stays linear in the number of rows shown. Low-risk rows of busy
+stacks are collapsed into counts and each stack's listing is truncated.
+"""
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+from cdkdiff.formatters import render_stream
+from cdkdiff.models import ChangeType, DiffSummary, RiskLevel, StackDiff
+
+LOW_COLLAPSE_THRESHOLD = 50  # stacks with more LOW changes list them only as counts
+MAX_ROWS = 200  # changes listed per stack before the rest are truncated
+
+_ANSI = {
+    RiskLevel.HIGH: "\033[31m",
+    RiskLevel.MEDIUM: "\033[33m",
+    RiskLevel.LOW: "\033[32m",
+}
+_RESET = "\033[0m"
+_CHANGE_SYMBOL = {ChangeType.ADD: "+", ChangeType.REMOVE: "-", ChangeType.UPDATE: "~"}
+
+
+def _use_color(out: TextIO) -> bool:
+    return "NO_COLOR" not in os.environ and getattr(out, "isatty", lambda: False)()
+
+
+def _risk_label(risk: RiskLevel | None, color: bool) -> str:
+    label = f"{risk.value.upper() if risk else 'NONE':<6}"
+    return f"{_ANSI[risk]}{label}{_RESET}" if color and risk else label
+
+
+def stack_lines(stack: StackDiff, color: bool = False, max_rows: int = MAX_ROWS,
+                low_threshold: int = LOW_COLLAPSE_THRESHOLD) -> Iterator[str]:
+    """Yield the compact listing of one stack, line by line."""
+    changes = stack.changes
+    yield f"{_risk_label(stack.risk, color)} {stack.name}  ({len(changes)} changes)"
+    if stack.error:
+        yield f"  Diff failed: {stack.error.strip()}"
+        return
+    if stack.unchanged:
+        yield "  Unchanged since baseline"
+        return
+    if not changes:
+        yield "  No changes"
+        return
+
+    low = stack.risk_counts[RiskLevel.LOW]
+    collapse = low > low_threshold
+    shown = [c for c in changes if c.risk is not RiskLevel.LOW] if collapse else list(changes)
+    hidden = len(shown) - max_rows
+    shown = shown[:max_rows]
+    if shown:
+        type_width = max(len(c.resource_type) for c in shown)
+        for c in shown:
+            yield (f"  {_CHANGE_SYMBOL[c.change_type]} {_risk_label(c.risk, color)} "
+                   f"{c.resource_type:<{type_width}}  {c.logical_id}")
+    if hidden > 0:
+        yield f"  ... {hidden} more changes not shown"
+    if collapse:
+        counts = {t: 0 for t in ChangeType}
+        for c in changes:
+            if c.risk is RiskLevel.LOW:
+                counts[c.change_type] += 1
+        breakdown = ", ".join(f"{n} {t.value}" for t, n in counts.items() if n)
+        yield f"  {low} low-risk changes collapsed ({breakdown})"
+
+
+def _header(summary: DiffSummary, color: bool) -> str:
+    return (f"CDK Diff | Stacks: {len(summary.stacks)} | Changes: {summary.total_changes} "
+            f"| Risk: {_risk_label(summary.highest_risk, color).rstrip()}")
+
+
+def print_compact(summary: DiffSummary, out: TextIO) -> None:
+    color = _use_color(out)
+    out.write(_header(summary, color) + "\n\n")
+    out.writelines("\n".join(stack_lines(stack, color)) + "\n\n" for stack in summary.stacks)
+
+
+def print_compact_stream(stacks: Iterable[StackDiff], out: TextIO) -> DiffSummary:
+    """Print each stack's listing as soon as it arrives, then the totals header."""
+    color = _use_color(out)
+
+    def render(stack: StackDiff) -> None:
+        out.write("\n".join(stack_lines(stack, color)) + "\n\n")
+        out.flush()
+
+    summary = render_stream(stacks, render)
+    out.write(_header(summary, color) + "\n")
+    return summary
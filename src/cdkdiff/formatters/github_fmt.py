@@ -1,3 +1,5 @@
+from __future__ import annotations
+import hashlib
 from cdkdiff.models import DiffSummary, ChangeType, RISK_EMOJI
 
 _CHANGE_SYMBOL = {
@@ -6,6 +8,8 @@ _CHANGE_SYMBOL = {
     ChangeType.UPDATE: "~",
 }
 _HIDDEN_MARKER = "<!-- cdkdiff-comment -->"
+_MARKER_PREFIX = "<!-- cdkdiff-comment"
+_COMMENT_LIMIT = 65536  # GitHub rejects longer comment bodies
 
 
 def format_github(summary: DiffSummary) -> str:
@@ -24,11 +28,18 @@ def format_github(summary: DiffSummary) -> str:
     for stack in summary.stacks:
         risk = stack.risk
         stack_badge = RISK_EMOJI.get(risk, "⚪") if risk else "⚪"
+        if stack.error:
+            stack_badge = "⚠️"
         lines.append("<details>")
         lines.append(f"<summary>{stack_badge} <strong>{stack.name}</strong> "
                      f"({len(stack.changes)} changes)</summary>")
         lines.append("")
-        if stack.changes:
+        if stack.error:
+            first_line = stack.error.strip().partition("\n")[0]
+            lines.append(f"⚠️ **Diff failed:** `{first_line}`")
+        elif stack.unchanged:
+            lines.append("_Unchanged since baseline_")
+        elif stack.changes:
             lines.append("| Resource Type | Logical ID | Change | Risk |")
             lines.append("|---------------|------------|--------|------|")
             for c in stack.changes:
@@ -44,3 +55,81 @@ def format_github(summary: DiffSummary) -> str:
         lines.append("")
 
     return "\n".join(lines)
+
+
+def comment_marker(body: str) -> str | None:
+    """Return the hidden marker line of a cdkdiff comment, or None for other comments."""
+    start = body.find(_MARKER_PREFIX)
+    if start < 0:
+        return None
+    end = body.find("-->", start)
+    return body[start:end + 3] if end >= 0 else None
+
+
+def _table_header(block: list[str]) -> list[str]:
+    """Return the lines opening a stack's `<details>` table, to repeat in continuations."""
+    for i, line in enumerate(block):
+        if line.startswith("|---"):
+            return block[:i + 1]
+    return []
+
+
+def _blocks(lines: list[str], budget: int) -> list[list[str]]:
+    """Group lines into per-stack `<details>` blocks, splitting any block over `budget`.
+
+    A split stack is closed at the cut and reopened, table header included, in the
+    next block.
+    """
+    blocks: list[list[str]] = [[]]
+    for line in lines:
+        if line == "<details>":
+            blocks.append([])
+        blocks[-1].append(line[:budget // 2])  # a single line may not exceed a comment
+    closing = ["", "</details>", ""]
+    sized: list[list[str]] = []
+    for block in blocks:
+        header = _table_header(block)
+        reserve = sum(len(line) + 1 for line in header + closing)
+        current: list[str] = []
+        size = 0
+        for line in block:
+            if current and size + len(line) + 1 > budget - reserve:
+                sized.append(current + closing)
+                current = list(header)
+                size = sum(len(line) + 1 for line in current)
+            current.append(line)
+            size += len(line) + 1
+        sized.append(current)
+    return sized
+
+
+def split_comment(body: str, limit: int = _COMMENT_LIMIT) -> list[str]:
+    """Split a `format_github` body into comments of at most `limit` characters.
+
+    Each part starts with a hidden marker carrying a hash of the whole body and its part
+    number, so an unchanged diff can be recognised without comparing bodies. Parts break
+    between stacks where possible.
+    """
+    content = body[len(_HIDDEN_MARKER) + 1:] if body.startswith(_HIDDEN_MARKER + "\n") else body
+    digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+    budget = limit - len(_part_marker(digest, 9999, 9999)) - 1
+
+    parts: list[str] = []
+    size = 0
+    current: list[str] = []
+    for block in _blocks(content.split("\n"), budget):
+        block_size = sum(len(line) + 1 for line in block)
+        if current and size + block_size > budget:
+            parts.append("\n".join(current))
+            current, size = [], 0
+        current.extend(block)
+        size += block_size
+    parts.append("\n".join(current))
+    return [
+        f"{_part_marker(digest, i, len(parts))}\n{part}"
+        for i, part in enumerate(parts, start=1)
+    ]
+
+
+def _part_marker(digest: str, part: int, total: int) -> str:
+    return f"{_MARKER_PREFIX} sha256={digest} part={part}/{total} -->"
@@ -1,31 +1,98 @@
+from __future__ import annotations
 import json
-from cdkdiff.models import DiffSummary
+from collections.abc import Iterator
+from typing import TextIO
+from cdkdiff.models import (
+    Change, ChangeList, ChangeType, DiffSummary, PropertyChange, RiskLevel, StackDiff,
+)
 
 
-def format_json(summary: DiffSummary) -> str:
+def change_to_dict(c: Change) -> dict:
+    return {
+        "resource_type": c.resource_type,
+        "logical_id": c.logical_id,
+        "change_type": c.change_type.value,
+        "risk": c.risk.value,
+        "details": c.details,
+        "requires_replacement": c.requires_replacement,
+        "rule": c.rule,
+        "properties": [
+            {
+                "path": p.path,
+                "change_type": p.change_type.value,
+                "old": p.old,
+                "new": p.new,
+                "requires_replacement": p.requires_replacement,
+            }
+            for p in c.properties
+        ],
+    }
+
+
+def stack_to_dict(stack: StackDiff) -> dict:
+    return {
+        "name": stack.name,
+        "risk": stack.risk.value if stack.risk else None,
+        "error": stack.error,
+        "unchanged": stack.unchanged,
+        "changes": [change_to_dict(c) for c in stack.changes],
+    }
+
+
+def stack_from_dict(data: dict) -> StackDiff:
+    """Inverse of `stack_to_dict`."""
+    return StackDiff(
+        name=data["name"],
+        error=data.get("error"),
+        unchanged=data.get("unchanged", False),
+        changes=ChangeList(
+            Change(
+                resource_type=c["resource_type"],
+                logical_id=c["logical_id"],
+                change_type=ChangeType(c["change_type"]),
+                risk=RiskLevel(c["risk"]),
+                details=c.get("details", ""),
+                requires_replacement=c.get("requires_replacement", False),
+                rule=c.get("rule", ""),
+                properties=[
+                    PropertyChange(
+                        path=p["path"],
+                        change_type=ChangeType(p["change_type"]),
+                        old=p.get("old"),
+                        new=p.get("new"),
+                        requires_replacement=p.get("requires_replacement", False),
+                    )
+                    for p in c.get("properties", [])
+                ],
+            )
+            for c in data.get("changes", [])
+        ),
+    )
+
+
+def iter_json(summary: DiffSummary) -> Iterator[str]:
+    """Yield the `format_json` document in pieces, encoding one stack at a time."""
     highest = summary.highest_risk
-    data = {
+    header = json.dumps({
         "summary": {
             "total_stacks": len(summary.stacks),
             "total_changes": summary.total_changes,
             "highest_risk": highest.value if highest else None,
         },
-        "stacks": [
-            {
-                "name": stack.name,
-                "risk": stack.risk.value if stack.risk else None,
-                "changes": [
-                    {
-                        "resource_type": c.resource_type,
-                        "logical_id": c.logical_id,
-                        "change_type": c.change_type.value,
-                        "risk": c.risk.value,
-                        "details": c.details,
-                    }
-                    for c in stack.changes
-                ],
-            }
-            for stack in summary.stacks
-        ],
-    }
-    return json.dumps(data, indent=2)
+    }, indent=2)
+    yield header[:-2] + ',\n  "stacks": ['
+    for i, stack in enumerate(summary.stacks):
+        # Newlines inside JSON strings are escaped, so re-indenting is safe
+        body = json.dumps(stack_to_dict(stack), indent=2).replace("\n", "\n    ")
+        yield f"{',' if i else ''}\n    {body}"
+    yield "\n  ]\n}" if summary.stacks else "]\n}"
+
+
+def write_json(summary: DiffSummary, out: TextIO) -> None:
+    """Write `format_json`'s output to `out` without building it as one string."""
+    out.writelines(iter_json(summary))
+    out.write("\n")
+
+
+def format_json(summary: DiffSummary) -> str:
+    return "".join(iter_json(summary))
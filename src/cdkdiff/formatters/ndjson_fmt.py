@@ -0,0 +1,41 @@
+"""Newline-delimited JSON: one record per change, for jq and log shippers.
+
+Each change is a `format_json` change object plus a `stack` key. A stack that failed
+to diff contributes a single `{"stack": ..., "error": ...}` record instead.
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator
+from typing import TextIO
+
+from cdkdiff.formatters import render_stream
+from cdkdiff.formatters.json_fmt import change_to_dict
+from cdkdiff.models import DiffSummary, StackDiff
+
+
+def stack_lines(stack: StackDiff) -> Iterator[str]:
+    """Yield the NDJSON lines (newline-terminated) for one stack."""
+    if stack.error:
+        yield json.dumps({"stack": stack.name, "error": stack.error}) + "\n"
+    for change in stack.changes:
+        yield json.dumps({"stack": stack.name, **change_to_dict(change)}) + "\n"
+
+
+def format_ndjson(summary: DiffSummary) -> str:
+    return "".join(line for stack in summary.stacks for line in stack_lines(stack))
+
+
+def write_ndjson(summary: DiffSummary, out: TextIO) -> None:
+    for stack in summary.stacks:
+        out.writelines(stack_lines(stack))
+
+
+def stream_ndjson(stacks: Iterable[StackDiff], out: TextIO) -> DiffSummary:
+    """Write each stack's records as soon as it arrives, flushing after every stack."""
+
+    def render(stack: StackDiff) -> None:
+        out.writelines(stack_lines(stack))
+        out.flush()
+
+    return render_stream(stacks, render)
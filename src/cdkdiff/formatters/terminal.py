@@ -1,8 +1,11 @@
 from __future__ import annotations
+from collections.abc import Iterable
 from rich.console import Console
 from rich.table import Table
 from rich import box
-from cdkdiff.models import DiffSummary, RiskLevel, ChangeType, RISK_EMOJI
+from rich.markup import escape
+from cdkdiff.formatters import render_stream
+from cdkdiff.models import DiffSummary, RiskLevel, ChangeType, StackDiff, RISK_EMOJI
 
 _RISK_COLOR = {
     RiskLevel.HIGH: "red",
@@ -20,46 +23,70 @@ def print_summary(summary: DiffSummary, console: Console | None = None) -> None:
     if console is None:
         console = Console()
 
+    console.print()
+    _print_header(summary, console)
+    console.print()
+
+    for stack in summary.stacks:
+        print_stack(stack, console)
+
+
+def print_stream(stacks: Iterable[StackDiff], console: Console | None = None) -> DiffSummary:
+    """Print each stack's table as soon as it arrives, then the totals header."""
+    if console is None:
+        console = Console()
+
+    console.print()
+    summary = render_stream(stacks, lambda stack: print_stack(stack, console))
+    _print_header(summary, console)
+    console.print()
+    return summary
+
+
+def _print_header(summary: DiffSummary, console: Console) -> None:
     highest = summary.highest_risk
     badge = RISK_EMOJI.get(highest, "⚪") if highest else "⚪"
     risk_label = highest.value.upper() if highest else "NONE"
     color = _RISK_COLOR.get(highest, "white") if highest else "white"
 
-    console.print()
     console.print(
         f"  CDK Diff  |  Stacks: [bold]{len(summary.stacks)}[/bold]  "
         f"|  Changes: [bold]{summary.total_changes}[/bold]  "
         f"|  Risk: {badge} [{color}]{risk_label}[/{color}]"
     )
-    console.print()
 
-    for stack in summary.stacks:
-        stack_risk = stack.risk
-        stack_color = _RISK_COLOR.get(stack_risk, "white") if stack_risk else "white"
-        stack_badge = RISK_EMOJI.get(stack_risk, "⚪") if stack_risk else "⚪"
-
-        table = Table(
-            title=f"{stack_badge} [{stack_color}]{stack.name}[/{stack_color}]",
-            box=box.ROUNDED,
-            show_header=True,
-            header_style="bold",
-        )
-        table.add_column("Resource Type", style="cyan")
-        table.add_column("Logical ID")
-        table.add_column("Change", justify="center")
-        table.add_column("Risk", justify="center")
-
-        if not stack.changes:
-            table.add_row("[dim]No changes[/dim]", "", "", "")
-        else:
-            for c in stack.changes:
-                risk_color = _RISK_COLOR[c.risk]
-                table.add_row(
-                    c.resource_type,
-                    c.logical_id,
-                    _CHANGE_LABEL[c.change_type],
-                    f"{RISK_EMOJI[c.risk]} [{risk_color}]{c.risk.value.upper()}[/{risk_color}]",
-                )
-
-        console.print(table)
-        console.print()
+
+def print_stack(stack: StackDiff, console: Console) -> None:
+    stack_risk = stack.risk
+    stack_color = _RISK_COLOR.get(stack_risk, "white") if stack_risk else "white"
+    stack_badge = RISK_EMOJI.get(stack_risk, "⚪") if stack_risk else "⚪"
+
+    table = Table(
+        title=f"{stack_badge} [{stack_color}]{stack.name}[/{stack_color}]",
+        box=box.ROUNDED,
+        show_header=True,
+        header_style="bold",
+    )
+    table.add_column("Resource Type", style="cyan")
+    table.add_column("Logical ID")
+    table.add_column("Change", justify="center")
+    table.add_column("Risk", justify="center")
+
+    if stack.error:
+        table.add_row("[red]Diff failed[/red]", escape(stack.error.strip()), "", "")
+    elif stack.unchanged:
+        table.add_row("[dim]Unchanged since baseline[/dim]", "", "", "")
+    elif not stack.changes:
+        table.add_row("[dim]No changes[/dim]", "", "", "")
+    else:
+        for c in stack.changes:
+            risk_color = _RISK_COLOR[c.risk]
+            table.add_row(
+                c.resource_type,
+                c.logical_id,
+                _CHANGE_LABEL[c.change_type],
+                f"{RISK_EMOJI[c.risk]} [{risk_color}]{c.risk.value.upper()}[/{risk_color}]",
+            )
+
+    console.print(table)
+    console.print()
@@ -1,54 +1,199 @@
 from __future__ import annotations
+import os
+import time
+from typing import TYPE_CHECKING
 import requests
-from cdkdiff.formatters.github_fmt import _HIDDEN_MARKER
+from cdkdiff.cache import default_cache_dir, load_state, save_state
+from cdkdiff.formatters.github_fmt import comment_marker, split_comment
+from cdkdiff.profiling import span
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
 
 _API_BASE = "https://api.github.com"
 _HEADERS = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
 _HTTP_TIMEOUT = 30  # seconds
+_PER_PAGE = 100
+_MAX_RETRIES = 3
+_MAX_BACKOFF = 60  # seconds — never stall a CI job longer than this per retry
+_STATE_FILE = "github-comments.json"
+_MAX_STATE_ENTRIES = 256  # PRs remembered in the state file
 
 
 def _auth_headers(token: str) -> dict:
     return {**_HEADERS, "Authorization": f"Bearer {token}"}
 
 
-def find_existing_comment(token: str, repo: str, pr_number: int) -> int | None:
-    """Return the comment ID of an existing cdkdiff comment, or None.
+def _rate_limit_delay(resp: requests.Response, attempt: int) -> float | None:
+    """Seconds to wait before retrying a rate-limited response, or None if it was not."""
+    if resp.status_code not in (403, 429):
+        return None
+    if retry_after := resp.headers.get("Retry-After"):
+        delay = float(retry_after)
+    elif resp.headers.get("X-RateLimit-Remaining") == "0":
+        delay = float(resp.headers.get("X-RateLimit-Reset", 0)) - time.time()
+    elif resp.status_code == 429:
+        delay = 2.0 ** attempt
+    else:
+        return None  # a plain 403 is a permissions problem, not rate limiting
+    return min(max(delay, 0.0), _MAX_BACKOFF)
+
 
-    Paginates through all comments (100 per page) to handle PRs with many comments.
+class GitHubClient:
+    """PR comment client on one pooled `requests.Session`.
+
+    Comment listings are fetched with `If-None-Match`, so unchanged pages come back as
+    304s that do not count against the rate limit. The IDs of the cdkdiff comments and
+    the page ETags are remembered per PR in the cache directory, letting later runs
+    confirm the comments with one conditional request each. Rate-limited responses are
+    retried after the delay GitHub asks for. `GITHUB_API_URL` overrides the API endpoint.
     """
-    page = 1
-    while True:
-        url = f"{_API_BASE}/repos/{repo}/issues/{pr_number}/comments"
-        resp = requests.get(
-            url,
-            headers=_auth_headers(token),
-            params={"per_page": 100, "page": page},
-            timeout=_HTTP_TIMEOUT,
-        )
-        resp.raise_for_status()
-        comments = resp.json()
-        if not comments:
-            break
-        for comment in comments:
-            if _HIDDEN_MARKER in comment.get("body", ""):
-                return comment["id"]
-        if len(comments) < 100:
-            break
-        page += 1
-    return None
-
-
-def post_pr_comment(token: str, repo: str, pr_number: int, body: str) -> None:
-    """Create or update a PR comment with the diff summary."""
-    existing_id = find_existing_comment(token, repo, pr_number)
-    if existing_id:
-        url = f"{_API_BASE}/repos/{repo}/issues/comments/{existing_id}"
-        resp = requests.patch(
-            url, headers=_auth_headers(token), json={"body": body}, timeout=_HTTP_TIMEOUT
-        )
-    else:
-        url = f"{_API_BASE}/repos/{repo}/issues/{pr_number}/comments"
-        resp = requests.post(
-            url, headers=_auth_headers(token), json={"body": body}, timeout=_HTTP_TIMEOUT
-        )
-    resp.raise_for_status()
+
+    def __init__(self, token: str, api_base: str | None = None,
+                 state_path: str | None = None) -> None:
+        self.api_base = (api_base or os.environ.get("GITHUB_API_URL") or _API_BASE).rstrip("/")
+        self.session = requests.Session()
+        self.session.headers.update(_auth_headers(token))
+        self.state_path = state_path or os.path.join(default_cache_dir(), _STATE_FILE)
+        self._state = load_state(self.state_path)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        url = f"{self.api_base}{path}"
+        for attempt in range(_MAX_RETRIES + 1):
+            with span(f"github {method}", "http", path=path) as args:
+                resp = self.session.request(method, url, timeout=_HTTP_TIMEOUT, **kwargs)
+                args["status"] = resp.status_code
+            delay = _rate_limit_delay(resp, attempt)
+            if delay is None or attempt == _MAX_RETRIES:
+                break
+            time.sleep(delay)
+        return resp
+
+    def _save_state(self) -> None:
+        save_state(self.state_path, self._state, _MAX_STATE_ENTRIES)
+
+    def _entry(self, repo: str, pr_number: int) -> dict:
+        key = f"{self.api_base}/{repo}#{pr_number}"
+        entry = self._state.pop(key, None) or {}
+        self._state[key] = entry  # re-insert as most recently used
+        return entry
+
+    def _confirm(self, repo: str, entry: dict) -> bool:
+        """Return True if every remembered comment still exists unedited and is ours."""
+        for remembered in entry["comments"]:
+            comment_id, _, etag = remembered
+            headers = {"If-None-Match": etag} if etag else {}
+            resp = self._request(
+                "GET", f"/repos/{repo}/issues/comments/{comment_id}", headers=headers,
+            )
+            if resp.status_code == 304:
+                continue
+            if resp.status_code == 404:
+                return False
+            resp.raise_for_status()
+            marker = comment_marker(resp.json().get("body", ""))
+            if marker is None:
+                return False
+            remembered[1:] = [marker, resp.headers.get("ETag")]
+        return True
+
+    def _scan(self, repo: str, pr_number: int, entry: dict) -> list[list]:
+        """Page through the PR's comments, reusing cached pages that answer 304."""
+        pages = entry.setdefault("pages", {})
+        found: list[list] = []
+        page = 1
+        while True:
+            cached = pages.get(str(page))
+            headers = {"If-None-Match": cached[0]} if cached else {}
+            resp = self._request(
+                "GET", f"/repos/{repo}/issues/{pr_number}/comments",
+                params={"per_page": _PER_PAGE, "page": page}, headers=headers,
+            )
+            if resp.status_code == 304 and cached:
+                _, matches, count = cached
+            else:
+                resp.raise_for_status()
+                comments = resp.json()
+                matches = [
+                    [c["id"], marker] for c in comments
+                    if (marker := comment_marker(c.get("body", ""))) is not None
+                ]
+                count = len(comments)
+                if etag := resp.headers.get("ETag"):
+                    pages[str(page)] = [etag, matches, count]
+            found.extend([comment_id, marker, None] for comment_id, marker in matches)
+            if count < _PER_PAGE:
+                return sorted(found, key=lambda c: (_part_number(c[1]), c[0]))
+            page += 1
+
+    def find_existing_comments(self, repo: str, pr_number: int) -> list[tuple[int, str]]:
+        """Return (comment ID, marker) of every cdkdiff comment on the PR, in part order."""
+        entry = self._entry(repo, pr_number)
+        if not (entry.get("comments") and self._confirm(repo, entry)):
+            entry["comments"] = self._scan(repo, pr_number, entry)
+            self._save_state()
+        return [(comment_id, marker) for comment_id, marker, _ in entry["comments"]]
+
+    def find_existing_comment(self, repo: str, pr_number: int) -> int | None:
+        """Return the comment ID of an existing cdkdiff comment, or None."""
+        existing = self.find_existing_comments(repo, pr_number)
+        return existing[0][0] if existing else None
+
+    def post_pr_comment(self, repo: str, pr_number: int, body: str) -> bool:
+        """Create or update the PR comment(s) with the diff summary.
+
+        Bodies over GitHub's size limit are split across several comments. Returns False,
+        without writing anything, when the existing comments already hold this body.
+        """
+        parts = split_comment(body)
+        existing = self.find_existing_comments(repo, pr_number)
+        if [marker for _, marker in existing] == [comment_marker(p) for p in parts]:
+            return False
+
+        written: list[list] = []
+        for i, part in enumerate(parts):
+            if i < len(existing):
+                resp = self._request(
+                    "PATCH", f"/repos/{repo}/issues/comments/{existing[i][0]}",
+                    json={"body": part},
+                )
+            else:
+                resp = self._request(
+                    "POST", f"/repos/{repo}/issues/{pr_number}/comments", json={"body": part},
+                )
+            resp.raise_for_status()
+            written.append([resp.json()["id"], comment_marker(part), resp.headers.get("ETag")])
+        for comment_id, _ in existing[len(parts):]:
+            resp = self._request("DELETE", f"/repos/{repo}/issues/comments/{comment_id}")
+            if resp.status_code != 404:
+                resp.raise_for_status()
+
+        self._entry(repo, pr_number)["comments"] = written
+        self._save_state()
+        return True
+
+
+def _part_number(marker: str) -> int:
+    _, found, rest = marker.partition(" part=")
+    return int(rest.partition("/")[0]) if found else 1  # single-comment marker
+
+
+def find_existing_comment(token: str, repo: str, pr_number: int) -> int | None:
+    """Return the comment ID of an existing cdkdiff comment, or None."""
+    with GitHubClient(token) as client:
+        return client.find_existing_comment(repo, pr_number)
+
+
+def post_pr_comment(token: str, repo: str, pr_number: int, body: str) -> bool:
+    """Create or update the PR comment(s); returns False if they were already current."""
+    with GitHubClient(token) as client:
+        return client.post_pr_comment(repo, pr_number, body)
@@ -0,0 +1,167 @@
+"""Local SQLite history of diff results, for queries across past runs.
+
+Each recorded run adds one `runs` row and one `changes` row per change. The columns
+queries filter on are indexed, and a run is inserted in a single transaction.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, cast
+
+from cdkdiff.models import _RISK_ORDER, ChangeType, DiffSummary, RiskLevel
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    commit_sha TEXT,
+    total_changes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    stack TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    logical_id TEXT NOT NULL,
+    change_type TEXT NOT NULL,
+    risk INTEGER NOT NULL,
+    requires_replacement INTEGER NOT NULL,
+    rule TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_recorded_at ON runs(recorded_at);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs(commit_sha);
+CREATE INDEX IF NOT EXISTS changes_run ON changes(run_id);
+CREATE INDEX IF NOT EXISTS changes_stack ON changes(stack);
+CREATE INDEX IF NOT EXISTS changes_resource_type ON changes(resource_type);
+CREATE INDEX IF NOT EXISTS changes_logical_id ON changes(logical_id);
+CREATE INDEX IF NOT EXISTS changes_change_type ON changes(change_type);
+CREATE INDEX IF NOT EXISTS changes_risk ON changes(risk, requires_replacement);
+"""
+
+# 90d, 12h, 2w, 30m
+_DURATION_RE = re.compile(r"^(\d+)([mhdw])$")
+_DURATION_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+@dataclass
+class HistoryEntry:
+    recorded_at: float
+    commit: str | None
+    stack: str
+    resource_type: str
+    logical_id: str
+    change_type: ChangeType
+    risk: RiskLevel
+    requires_replacement: bool
+    rule: str
+
+
+def parse_since(value: str, now: float | None = None) -> float:
+    """Return the epoch time for a relative age (`90d`, `12h`, `2w`, `30m`) or ISO date.
+
+    Raises ValueError for anything else.
+    """
+    if match := _DURATION_RE.match(value.strip()):
+        count, unit = match.groups()
+        return (time.time() if now is None else now) - int(count) * _DURATION_SECONDS[unit]
+    return datetime.fromisoformat(value.strip()).timestamp()
+
+
+class HistoryStore:
+    """A SQLite file holding every recorded run's changes."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def record(self, summary: DiffSummary, commit: str | None = None,
+               recorded_at: float | None = None) -> int:
+        """Append `summary` as one run in a single transaction and return the run ID."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (recorded_at, commit_sha, total_changes) VALUES (?, ?, ?)",
+                (time.time() if recorded_at is None else recorded_at, commit,
+                 summary.total_changes),
+            )
+            run_id = cast(int, cursor.lastrowid)  # always set after an INSERT
+            self.conn.executemany(
+                "INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (run_id, stack.name, c.resource_type, c.logical_id, c.change_type.value,
+                     c.risk.rank, c.requires_replacement, c.rule)
+                    for stack in summary.stacks for c in stack.changes
+                ),
+            )
+        return run_id
+
+    def query(
+        self,
+        since: float | None = None,
+        stack: str | None = None,
+        resource_type: str | None = None,
+        logical_id: str | None = None,
+        change_type: ChangeType | None = None,
+        min_risk: RiskLevel | None = None,
+        replacement: bool | None = None,
+        commit: str | None = None,
+        limit: int | None = None,
+    ) -> list[HistoryEntry]:
+        """Return matching changes, newest run first.
+
+        `stack`, `resource_type` and `logical_id` are glob patterns; `commit` matches a
+        prefix of the recorded commit.
+        """
+        clauses: list[str] = []
+        params: list[object] = []
+        for clause, value in (
+            ("runs.recorded_at >= ?", since),
+            ("changes.stack GLOB ?", stack),
+            ("changes.resource_type GLOB ?", resource_type),
+            ("changes.logical_id GLOB ?", logical_id),
+            ("changes.change_type = ?", change_type.value if change_type else None),
+            ("changes.risk >= ?", min_risk.rank if min_risk else None),
+            ("changes.requires_replacement = ?", replacement),
+            ("runs.commit_sha LIKE ? || '%'", commit),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = (
+            "SELECT runs.recorded_at, runs.commit_sha, changes.stack, changes.resource_type, "
+            "changes.logical_id, changes.change_type, changes.risk, "
+            "changes.requires_replacement, changes.rule "
+            "FROM changes JOIN runs ON runs.id = changes.run_id"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY runs.recorded_at DESC, changes.rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [
+            HistoryEntry(
+                recorded_at, commit_sha, stack_name, rtype, lid, ChangeType(ctype),
+                _RISK_ORDER[risk], bool(replaces), rule,
+            )
+            for recorded_at, commit_sha, stack_name, rtype, lid, ctype, risk, replaces, rule
+            in self.conn.execute(sql, params)
+        ]
@@ -0,0 +1,115 @@
+"""Prometheus/OpenMetrics text export of one run, for node-exporter's textfile collector.
+
+Durations come from the `profiling` spans recorded during the run: one `cdk diff`
+observation per buffered subprocess (one per stack with `--jobs`), one `parse`
+observation per parse (per stack when streamed). A streamed `cdk diff` overlaps with
+parsing, scoring and rendering its output, so it is exported end to end in a histogram
+of its own. Change counts come from the summary. Every value describes this run only, so
+the counts are gauges and the file is replaced atomically on each run.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from cdkdiff.cache import write_text_atomic
+from cdkdiff.models import ChangeType, DiffSummary, RiskLevel
+from cdkdiff.profiling import Span
+
+_DIFF_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+_PARSE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+_CHANGE_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metrics:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels: str) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, values: Iterable[float],
+                  buckets: tuple[float, ...], **labels: str) -> None:
+        values = list(values)
+        for bound in buckets:
+            count = sum(1 for v in values if v <= bound)
+            self.sample(f"{name}_bucket", count, **labels, le=_format_value(float(bound)))
+        self.sample(f"{name}_bucket", len(values), **labels, le="+Inf")
+        self.sample(f"{name}_sum", float(sum(values)), **labels)
+        self.sample(f"{name}_count", len(values), **labels)
+
+
+def render_metrics(
+    summary: DiffSummary,
+    spans: Iterable[Span] = (),
+    cache_hits: int | None = None,
+    cache_misses: int | None = None,
+) -> str:
+    """Return the metrics of one run in the Prometheus text exposition format."""
+    spans = list(spans)
+    m = _Metrics()
+
+    m.family("cdkdiff_cdk_diff_duration_seconds", "histogram",
+             "Wall time of each buffered cdk diff process (one per stack with --jobs).")
+    m.histogram("cdkdiff_cdk_diff_duration_seconds",
+                (s.duration for s in spans if s.name == "cdk diff"), _DIFF_BUCKETS)
+    m.family("cdkdiff_streamed_diff_duration_seconds", "histogram",
+             "End-to-end time of a streamed cdk diff, including the parsing, scoring and "
+             "rendering that overlap it.")
+    m.histogram("cdkdiff_streamed_diff_duration_seconds",
+                (s.duration for s in spans if s.name == "cdk diff (streamed)"), _DIFF_BUCKETS)
+    m.family("cdkdiff_parse_duration_seconds", "histogram", "Time spent parsing cdk output.")
+    m.histogram("cdkdiff_parse_duration_seconds",
+                (s.duration for s in spans if s.name == "parse"), _PARSE_BUCKETS)
+
+    m.family("cdkdiff_stack_changes", "histogram", "Changes per stack, by risk level.")
+    for risk in RiskLevel:
+        m.histogram("cdkdiff_stack_changes",
+                    (s.risk_counts[risk] for s in summary.stacks), _CHANGE_BUCKETS,
+                    risk=risk.value)
+
+    m.family("cdkdiff_changes_by_risk", "gauge", "Changes in this run, by risk level.")
+    for risk, count in summary.risk_counts.items():
+        m.sample("cdkdiff_changes_by_risk", count, risk=risk.value)
+    m.family("cdkdiff_changes_by_type", "gauge", "Changes in this run, by change type.")
+    counts = summary.change_type_counts
+    for change_type in ChangeType:
+        m.sample("cdkdiff_changes_by_type", counts.get(change_type, 0),
+                 change_type=change_type.value)
+
+    m.family("cdkdiff_stacks", "gauge", "Stacks in this run, by outcome.")
+    outcomes = {"changed": 0, "no_changes": 0, "failed": 0}
+    for s in summary.stacks:
+        outcomes["failed" if s.error else "changed" if len(s.changes) else "no_changes"] += 1
+    for outcome, count in outcomes.items():
+        m.sample("cdkdiff_stacks", count, outcome=outcome)
+
+    if cache_hits is not None:
+        m.family("cdkdiff_cache_lookups", "gauge", "Result cache lookups in this run.")
+        m.sample("cdkdiff_cache_lookups", cache_hits, result="hit")
+        m.sample("cdkdiff_cache_lookups", cache_misses or 0, result="miss")
+
+    m.lines.append("# EOF")
+    return "\n".join(m.lines) + "\n"
+
+
+def write_metrics(path: str, text: str) -> None:
+    """Replace `path` with `text` atomically, so a collector never reads a partial file."""
+    write_text_atomic(path, text, mode=0o644)  # readable by a collector running as another user
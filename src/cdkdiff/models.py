@@ -1,6 +1,15 @@
 from __future__ import annotations
+import sys
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import TYPE_CHECKING, Any, SupportsIndex
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+# Slotted dataclasses drop the per-instance __dict__; `slots=` needs Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class RiskLevel(Enum):
@@ -8,20 +17,25 @@ class RiskLevel(Enum):
     MEDIUM = "medium"
     HIGH = "high"
 
+    rank: int  # 0 for LOW, increasing with severity
+
     def __lt__(self, other: RiskLevel) -> bool:
-        return _RISK_ORDER.index(self) < _RISK_ORDER.index(other)
+        return self.rank < other.rank
 
     def __le__(self, other: RiskLevel) -> bool:
-        return _RISK_ORDER.index(self) <= _RISK_ORDER.index(other)
+        return self.rank <= other.rank
 
     def __gt__(self, other: RiskLevel) -> bool:
-        return _RISK_ORDER.index(self) > _RISK_ORDER.index(other)
+        return self.rank > other.rank
 
     def __ge__(self, other: RiskLevel) -> bool:
-        return _RISK_ORDER.index(self) >= _RISK_ORDER.index(other)
+        return self.rank >= other.rank
 
 
-_RISK_ORDER = [RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH]
+# Members are declared in order of severity
+_RISK_ORDER = tuple(RiskLevel)
+for _rank, _level in enumerate(_RISK_ORDER):
+    _level.rank = _rank
 
 RISK_EMOJI: dict[RiskLevel, str] = {
     RiskLevel.HIGH: "🔴",
@@ -36,7 +50,17 @@ class ChangeType(Enum):
     UPDATE = "update"
 
 
-@dataclass
+@dataclass(**_SLOTS)
+class PropertyChange:
+    """A change to one property of a resource, addressed by its dotted path."""
+    path: str
+    change_type: ChangeType
+    old: str | None = None
+    new: str | None = None
+    requires_replacement: bool = False
+
+
+@dataclass(**_SLOTS)
 class Change:
     resource_type: str
     logical_id: str
@@ -44,22 +68,168 @@ class Change:
     risk: RiskLevel
     details: str = ""
     requires_replacement: bool = False
+    rule: str = ""  # id of the scoring rule that set `risk`
+    # Most changes have no property details: they share the empty tuple, and a list is
+    # only allocated once there is something to hold
+    properties: Sequence[PropertyChange] = ()
+
+    def __post_init__(self) -> None:
+        # A handful of resource types repeat across every change; share one string each
+        self.resource_type = sys.intern(self.resource_type)
+        if not self.properties:
+            self.properties = ()
+
+
+class ChangeList(list[Change]):
+    """A list of changes with per-risk and per-change-type counts kept up to date.
+
+    The counts follow every list mutation; change a risk through `rescore` so they
+    follow that too. Readers only ever read the counts, so any number of threads can
+    share a list that is no longer being built.
+    """
+    __slots__ = ("_risk_counts", "_type_counts")
+
+    def __init__(self, changes: Iterable[Change] = ()) -> None:
+        super().__init__(changes)
+        self._recount()
+
+    def __reduce__(self):
+        # The default list pickling appends items before restoring slots
+        return type(self), (list(self),)
+
+    def _recount(self) -> None:
+        risk_counts = [0] * len(_RISK_ORDER)
+        type_counts = dict.fromkeys(ChangeType, 0)
+        for change in self:
+            risk_counts[change.risk.rank] += 1
+            type_counts[change.change_type] += 1
+        self._risk_counts, self._type_counts = risk_counts, type_counts
+
+    def _count(self, change: Change, n: int) -> None:
+        self._risk_counts[change.risk.rank] += n
+        self._type_counts[change.change_type] += n
+
+    def append(self, change: Change) -> None:
+        super().append(change)
+        self._count(change, 1)
+
+    def extend(self, changes: Iterable[Change]) -> None:
+        changes = list(changes)
+        super().extend(changes)
+        for change in changes:
+            self._count(change, 1)
+
+    def __iadd__(self, changes: Iterable[Change]) -> Self:  # type: ignore[override,misc]
+        self.extend(changes)
+        return self
+
+    def __imul__(self, n: SupportsIndex) -> Self:
+        super().__imul__(n)
+        self._recount()
+        return self
+
+    def insert(self, index: SupportsIndex, change: Change) -> None:
+        super().insert(index, change)
+        self._count(change, 1)
+
+    def pop(self, index: SupportsIndex = -1) -> Change:
+        change = super().pop(index)
+        self._count(change, -1)
+        return change
+
+    def remove(self, change: Change) -> None:
+        super().remove(change)
+        self._count(change, -1)
+
+    def clear(self) -> None:
+        super().clear()
+        self._recount()
+
+    def __setitem__(self, index: SupportsIndex | slice, value: Any) -> None:
+        if isinstance(index, slice):
+            super().__setitem__(index, value)
+            self._recount()
+        else:
+            self._count(self[index], -1)
+            super().__setitem__(index, value)
+            self._count(value, 1)
 
+    def __delitem__(self, index: SupportsIndex | slice) -> None:
+        super().__delitem__(index)
+        self._recount()
 
-@dataclass
+    def rescore(self, change: Change, risk: RiskLevel) -> None:
+        """Set the risk of a change in this list, keeping the counts in step."""
+        self._risk_counts[change.risk.rank] -= 1
+        self._risk_counts[risk.rank] += 1
+        change.risk = risk
+
+    @property
+    def highest_risk(self) -> RiskLevel | None:
+        counts = self._risk_counts
+        for rank in range(len(_RISK_ORDER) - 1, -1, -1):
+            if counts[rank]:
+                return _RISK_ORDER[rank]
+        return None
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        return dict(zip(_RISK_ORDER, self._risk_counts))
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        return dict(self._type_counts)
+
+
+@dataclass(**_SLOTS)
 class StackDiff:
     name: str
-    changes: list[Change] = field(default_factory=list)
+    changes: ChangeList = field(default_factory=ChangeList)
+    error: str | None = None  # set when the stack could not be diffed
+    unchanged: bool = False  # skipped: template and assets match the baseline
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "changes" and not isinstance(value, ChangeList):
+            value = ChangeList(value)  # keep the counts whatever sequence is assigned
+        object.__setattr__(self, name, value)
 
     @property
     def risk(self) -> RiskLevel | None:
-        if not self.changes:
-            return None
-        return max((c.risk for c in self.changes), key=lambda r: _RISK_ORDER.index(r))
+        return self.changes.highest_risk
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        return self.changes.risk_counts
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        return self.changes.change_type_counts
+
+    def rescore(self, change: Change, risk: RiskLevel) -> None:
+        self.changes.rescore(change, risk)
+
+
+def in_request_order(names: Iterable[str], diffed: Iterable[StackDiff],
+                     missing: Callable[[str], StackDiff]) -> list[StackDiff]:
+    """Return the diffed stacks in the order of `names`, with `missing(name)` for the gaps.
+
+    cdk can report a stack under a name other than the one requested (e.g. its display
+    name); such stacks are kept after the requested ones rather than dropped.
+    """
+    by_name = {s.name: s for s in diffed}
+    stacks = [by_name.pop(name) if name in by_name else missing(name) for name in names]
+    stacks.extend(by_name.values())
+    return stacks
 
 
-@dataclass
+def _add_counts(totals: dict, counts: dict) -> None:
+    for key, count in counts.items():
+        totals[key] += count
+
+
+@dataclass(**_SLOTS)
 class DiffSummary:
+    """Aggregates are combined from the per-stack counts, in time linear in the stacks."""
     stacks: list[StackDiff] = field(default_factory=list)
 
     @property
@@ -68,7 +238,19 @@ class DiffSummary:
 
     @property
     def highest_risk(self) -> RiskLevel | None:
-        risks = [s.risk for s in self.stacks if s.risk is not None]
-        if not risks:
-            return None
-        return max(risks, key=lambda r: _RISK_ORDER.index(r))
+        risks = [r for r in (s.risk for s in self.stacks) if r is not None]
+        return max(risks) if risks else None
+
+    @property
+    def risk_counts(self) -> dict[RiskLevel, int]:
+        totals = dict.fromkeys(_RISK_ORDER, 0)
+        for stack in self.stacks:
+            _add_counts(totals, stack.risk_counts)
+        return totals
+
+    @property
+    def change_type_counts(self) -> dict[ChangeType, int]:
+        totals = dict.fromkeys(ChangeType, 0)
+        for stack in self.stacks:
+            _add_counts(totals, stack.change_type_counts)
+        return totals
@@ -1,6 +1,14 @@
 from __future__ import annotations
+import io
 import re
-from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+from cdkdiff.models import (
+    Change, ChangeType, DiffSummary, PropertyChange, RiskLevel, StackDiff,
+)
+
+if TYPE_CHECKING:
+    from cdkdiff.columnar import ColumnarSummary
 
 # Matches top-level resource change lines (not indented)
 _RESOURCE_RE = re.compile(
@@ -9,18 +17,151 @@ _RESOURCE_RE = re.compile(
 # Matches IAM table rows with change indicator
 _IAM_ROW_RE = re.compile(r"^\│\s+([+\-])\s+\│\s+\$\{([^}]+)\}")
 
+_TREE_BRANCH = "─ "  # ├─ / └─ before every line of the tree under a resource
+_INDICATOR_TYPES = {"+": ChangeType.ADD, "-": ChangeType.REMOVE, "~": ChangeType.UPDATE}
+_REPLACEMENT_FLAGS = (" (requires replacement)", " (may cause replacement)")
+_KEY_MARKERS = {"+": "Added: ", "-": "Removed: "}
+
+
+class _Node:
+    __slots__ = ("column", "indicator", "path", "prop")
+
+    def __init__(self, column: int, indicator: str, path: str) -> None:
+        self.column = column
+        self.indicator = indicator
+        self.path = path
+        self.prop: PropertyChange | None = None
+
+
+class _PropertyTree:
+    """Turns the indented tree under a resource change line into PropertyChange entries.
+
+    cdk prints each changed property as `[~] Name`, nested keys as `[~] .Key:`, keys
+    added to or removed from an object as `[+] Added: .Key` / `[-] Removed: .Key`, and
+    a whole property added or removed as `[+] Name` with its value on an unmarked line
+    below. A `[-]`/`[+]` leaf under a `[~]` node is that node's old/new value. Nesting is
+    tracked by the column of each branch, using plain string scanning.
+    """
+
+    def __init__(self, change: Change) -> None:
+        self.change = change
+        self._open: list[_Node] = []
+        self._props: list[PropertyChange] = []
+
+    def feed(self, line: str) -> None:
+        branch = line.find(_TREE_BRANCH)
+        if branch < 0:
+            self._feed_hunk(line.lstrip())
+            return
+        column = branch + 2
+        text = line[column:]
+        while self._open and self._open[-1].column >= column:
+            self._open.pop()
+        parent = self._open[-1] if self._open else None
+        if not (text[:1] == "[" and text[2:4] == "] " and text[1:2] in _INDICATOR_TYPES):
+            # An unmarked value of a property added or removed whole; `@@` opens a hunk
+            if parent is not None and parent.prop is not None and not text.startswith("@@"):
+                self._set_value(parent.prop, parent.indicator, text)
+            return
+        indicator, text = text[1], text[4:]
+        requires_replacement = False
+        for flag in _REPLACEMENT_FLAGS:
+            if text.endswith(flag):
+                text = text[:-len(flag)]
+                requires_replacement = True
+                break
+
+        marker = _KEY_MARKERS.get(indicator, "")
+        is_key = marker and text.startswith(marker)
+        if indicator in "+-" and parent is not None and parent.indicator == "~" and not is_key:
+            self._set_value(self._prop_for(parent), indicator, text)
+            return
+
+        key = _key_name(text[len(marker):] if is_key else text)
+        path = f"{parent.path}.{key}" if parent else key
+        node = _Node(column, indicator, path)
+        if indicator in "+-":
+            node.prop = self._add_prop(path, _INDICATOR_TYPES[indicator])
+        elif indicator == "~" and requires_replacement:
+            self._prop_for(node)
+        if node.prop is not None and requires_replacement:
+            node.prop.requires_replacement = True
+        self._open.append(node)
+
+    def _feed_hunk(self, text: str) -> None:
+        # Multi-line values are printed as a unified diff under their `[~]` node
+        if text[:4] not in ("[-] ", "[+] "):
+            return
+        for node in reversed(self._open):
+            if node.indicator == "~":
+                prop = self._prop_for(node)
+                indicator, value = text[1], text[4:]
+                current = prop.old if indicator == "-" else prop.new
+                self._set_value(prop, indicator, f"{current}\n{value}" if current else value)
+                return
+
+    def _prop_for(self, node: _Node) -> PropertyChange:
+        if node.prop is None:
+            node.prop = self._add_prop(node.path, ChangeType.UPDATE)
+        return node.prop
+
+    def _add_prop(self, path: str, change_type: ChangeType) -> PropertyChange:
+        prop = PropertyChange(path=path, change_type=change_type)
+        if not self._props:
+            self.change.properties = self._props
+        self._props.append(prop)
+        return prop
+
+    @staticmethod
+    def _set_value(prop: PropertyChange, indicator: str, value: str | None) -> None:
+        if indicator == "-":
+            prop.old = value
+        else:
+            prop.new = value
+
+
+def _key_name(text: str) -> str:
+    """`.Variables:` (a nested key as cdk prints it) → `Variables`."""
+    if text.startswith("."):
+        text = text[1:].removesuffix(":")
+    return text
+
 
 def parse(output: str) -> DiffSummary:
-    stacks: list[StackDiff] = []
+    """Parse complete `cdk diff` output."""
+    # StringIO iterates lazily, avoiding a second full copy of the output as a line list
+    return DiffSummary(stacks=list(parse_stream(io.StringIO(output))))
+
+
+def parse_columnar(output: str) -> ColumnarSummary:
+    """Parse complete `cdk diff` output into a `ColumnarSummary`.
+
+    Stacks are packed as they are parsed, which uses far less memory than `parse` for
+    very large outputs.
+    """
+    from cdkdiff.columnar import ColumnarSummary
+    return ColumnarSummary(parse_stream(io.StringIO(output)))
+
+
+def parse_stream(lines: Iterable[str]) -> Iterator[StackDiff]:
+    """Parse `cdk diff` output line by line, yielding each stack once its block closes.
+
+    `lines` may be any iterable of lines, with or without trailing newlines — e.g. a
+    subprocess pipe — so results are available before the whole diff has been produced.
+    """
     current_stack: StackDiff | None = None
+    tree: _PropertyTree | None = None
     in_iam_section = False
 
-    for line in output.splitlines():
+    for line in lines:
+        line = line.rstrip("\r\n")
         # Stack boundary
         if line.startswith("Stack ") and not line.startswith("Stack arn:"):
+            if current_stack is not None:
+                yield current_stack
             stack_name = line[len("Stack "):].strip()
             current_stack = StackDiff(name=stack_name)
-            stacks.append(current_stack)
+            tree = None
             in_iam_section = False
             continue
 
@@ -51,6 +192,12 @@ def parse(output: str) -> DiffSummary:
                 ))
             continue
 
+        # Indented lines belong to the property tree of the preceding resource
+        if tree is not None and line.startswith(" "):
+            tree.feed(line)
+            continue
+        tree = None
+
         # Parse resource change lines
         m = _RESOURCE_RE.match(line)
         if m:
@@ -69,13 +216,16 @@ def parse(output: str) -> DiffSummary:
             requires_replacement = "replace" in suffix
             details = suffix if suffix else ""
 
-            current_stack.changes.append(Change(
+            change = Change(
                 resource_type=resource_type,
                 logical_id=logical_id,
                 change_type=change_type,
                 risk=RiskLevel.LOW,  # scorer will update
                 details=details,
                 requires_replacement=requires_replacement,
-            ))
+            )
+            current_stack.changes.append(change)
+            tree = _PropertyTree(change)
 
-    return DiffSummary(stacks=stacks)
+    if current_stack is not None:
+        yield current_stack
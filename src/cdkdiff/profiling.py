@@ -0,0 +1,129 @@
+"""Lightweight span tracing for `--profile`.
+
+Code wraps its phases in `span(...)`; the spans are only recorded while a `Tracer` is
+enabled, so the instrumentation costs one global lookup otherwise. A tracer can
+summarize the spans as a timing table or write them as a Chrome trace-event file, which
+Perfetto and chrome://tracing open directly.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+_active: Tracer | None = None
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    start: float  # seconds, perf_counter clock
+    duration: float
+    thread: int
+    args: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """Collects spans from every thread of the process."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "cdkdiff", **args: object) -> Iterator[dict]:
+        """Time the block; the yielded dict can be filled with more span args."""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            span = Span(name, category, start, time.perf_counter() - start,
+                        threading.get_ident(), args)
+            with self._lock:
+                self.spans.append(span)
+
+    def record(self, name: str, duration: float, category: str = "cdkdiff",
+               **args: object) -> None:
+        """Add a span of `duration` seconds ending now, for work not timed as one block."""
+        span = Span(name, category, time.perf_counter() - duration, duration,
+                    threading.get_ident(), args)
+        with self._lock:
+            self.spans.append(span)
+
+    def report(self) -> str:
+        """Return a table of total, count and max time per span name, slowest first."""
+        totals: dict[str, list[float]] = {}
+        for s in self.spans:
+            entry = totals.setdefault(s.name, [0.0, 0, 0.0])
+            entry[0] += s.duration
+            entry[1] += 1
+            entry[2] = max(entry[2], s.duration)
+        width = max((len(name) for name in totals), default=4)
+        lines = [f"{'span':<{width}}  {'total':>9}  {'count':>5}  {'max':>9}"]
+        for name, (total, count, longest) in sorted(totals.items(), key=lambda kv: -kv[1][0]):
+            lines.append(f"{name:<{width}}  {total:>8.3f}s  {count:>5}  {longest:>8.3f}s")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Return the spans as a Chrome trace-event document (complete "X" events)."""
+        pid = os.getpid()
+        threads = {t: i for i, t in enumerate(dict.fromkeys(s.thread for s in self.spans))}
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": s.name,
+                    "cat": s.category,
+                    "ph": "X",
+                    "ts": round((s.start - self.origin) * 1e6, 3),
+                    "dur": round(s.duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": threads[s.thread],
+                    "args": {k: v if isinstance(v, (int, float, bool)) else str(v)
+                             for k, v in s.args.items()},
+                }
+                for s in sorted(self.spans, key=lambda s: s.start)
+            ],
+        }
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def enable() -> Tracer:
+    """Start recording spans into a new tracer and return it."""
+    global _active
+    _active = Tracer()
+    return _active
+
+
+def current() -> Tracer | None:
+    """Return the enabled tracer, if any."""
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def record(name: str, duration: float, category: str = "cdkdiff", **args: object) -> None:
+    """Record a span of `duration` seconds ending now if tracing is enabled."""
+    tracer = _active
+    if tracer is not None:
+        tracer.record(name, duration, category, **args)
+
+
+def span(name: str, category: str = "cdkdiff", **args: object) -> AbstractContextManager[dict]:
+    """Record the enclosed block as a span if tracing is enabled."""
+    tracer = _active
+    if tracer is None:
+        return nullcontext(args)
+    return tracer.span(name, category, **args)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from cdkdiff.models import Change, ChangeType, RiskLevel
+
+# Bump when rule matching semantics change — part of every rule set's version, so
+# results cached under the old semantics are not reused
+ENGINE_VERSION = "3"
+
+_RULE_KEYS = {"id", "risk", "resource_type", "change_type", "replacement", "stack", "property"}
+_REGEX_PREFIX = "re:"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One scoring rule. Unset criteria match anything; the first matching rule wins.
+
+    `resource_type` is an exact type, a glob (`AWS::IAM::*`) or a regex (`re:^AWS::EC2::`).
+    `stack` is a glob over stack names; `property` is a glob over the dotted paths of
+    changed properties (`Environment.Variables.*`) and matches if any path does.
+    """
+    id: str
+    risk: RiskLevel
+    resource_type: str | None = None
+    change_types: frozenset[ChangeType] | None = None
+    replacement: bool | None = None
+    stack: str | None = None
+    property: str | None = None
+
+
+def _is_pattern(resource_type: str) -> bool:
+    return resource_type.startswith(_REGEX_PREFIX) or any(ch in resource_type for ch in "*?[")
+
+
+def _compile_type(resource_type: str) -> re.Pattern[str]:
+    if resource_type.startswith(_REGEX_PREFIX):
+        return re.compile(resource_type[len(_REGEX_PREFIX):])
+    return re.compile(fnmatch.translate(resource_type))
+
+
+@cache
+def _glob(pattern: str) -> re.Pattern[str]:
+    return re.compile(fnmatch.translate(pattern))
+
+
+class RuleSet:
+    """Rules compiled into an index for near-constant-time matching.
+
+    Exact resource types live in dict buckets; glob/regex types and type-less rules are
+    the fallback. Candidate lists are resolved once per (resource type, change type) and
+    memoized, so scoring cost depends on the handful of rules that can apply to a change
+    rather than on the total number of rules. Stack and property globs are compiled the
+    first time a candidate rule needs them.
+    """
+
+    def __init__(self, rules: list[Rule], version: str = "") -> None:
+        self.rules = list(rules)
+        self.version = version or _fingerprint(repr(self.rules).encode())
+        self._exact: dict[str, list[int]] = {}
+        self._patterned: list[tuple[int, re.Pattern[str]]] = []
+        self._untyped: list[int] = []
+        for index, rule in enumerate(self.rules):
+            if rule.resource_type is None:
+                self._untyped.append(index)
+            elif _is_pattern(rule.resource_type):
+                self._patterned.append((index, _compile_type(rule.resource_type)))
+            else:
+                self._exact.setdefault(rule.resource_type, []).append(index)
+        self._memo: dict[tuple[str, ChangeType], tuple[int, ...]] = {}
+
+    def _candidates(self, resource_type: str, change_type: ChangeType) -> tuple[int, ...]:
+        indices = self._exact.get(resource_type, []) + self._untyped
+        indices.extend(i for i, pattern in self._patterned if pattern.match(resource_type))
+        return tuple(sorted(
+            i for i in indices
+            if (allowed := self.rules[i].change_types) is None or change_type in allowed
+        ))
+
+    def match(self, change: Change, stack_name: str = "") -> Rule | None:
+        """Return the first rule matching `change` in `stack_name`, or None."""
+        key = (change.resource_type, change.change_type)
+        candidates = self._memo.get(key)
+        if candidates is None:
+            candidates = self._memo[key] = self._candidates(*key)
+        for index in candidates:
+            rule = self.rules[index]
+            if rule.replacement is not None and rule.replacement != change.requires_replacement:
+                continue
+            if rule.stack is not None and not _glob(rule.stack).match(stack_name):
+                continue
+            if rule.property is not None and not any(
+                _glob(rule.property).match(prop.path) for prop in change.properties
+            ):
+                continue
+            return rule
+        return None
+
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(ENGINE_VERSION.encode() + b"\0" + data).hexdigest()[:16]
+
+
+def _parse_rule(raw: Any, position: int) -> Rule:
+    if not isinstance(raw, dict):
+        raise TypeError(f"rule #{position}: expected a mapping, got {type(raw).__name__}")
+    unknown = set(raw) - _RULE_KEYS
+    if unknown:
+        raise ValueError(f"rule #{position}: unknown key(s) {', '.join(sorted(unknown))}")
+    try:
+        risk = RiskLevel(str(raw["risk"]).lower())
+    except KeyError:
+        raise ValueError(f"rule #{position}: missing required key 'risk'")
+    except ValueError:
+        raise ValueError(f"rule #{position}: invalid risk {raw['risk']!r}")
+
+    for key in ("id", "resource_type", "stack", "property"):
+        if raw.get(key) is not None and not isinstance(raw[key], str):
+            raise ValueError(f"rule #{position}: {key} must be a string")
+    resource_type = raw.get("resource_type")
+    if resource_type is not None and resource_type.startswith(_REGEX_PREFIX):
+        try:
+            re.compile(resource_type[len(_REGEX_PREFIX):])
+        except re.error as e:
+            raise ValueError(f"rule #{position}: invalid resource_type regex: {e}")
+
+    change_types = None
+    if "change_type" in raw:
+        values = raw["change_type"]
+        values = [values] if isinstance(values, str) else values
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"rule #{position}: change_type must be a string or a list "
+                             f"of strings")
+        try:
+            change_types = frozenset(ChangeType(v.lower()) for v in values)
+        except ValueError:
+            raise ValueError(f"rule #{position}: invalid change_type {raw['change_type']!r}")
+
+    replacement = raw.get("replacement")
+    if replacement is not None and not isinstance(replacement, bool):
+        raise ValueError(f"rule #{position}: replacement must be true or false")
+
+    return Rule(
+        id=str(raw.get("id") or f"rule-{position}"),
+        risk=risk,
+        resource_type=resource_type,
+        change_types=change_types,
+        replacement=replacement,
+        stack=raw.get("stack"),
+        property=raw.get("property"),
+    )
+
+
+def _parse_document(path: str, data: bytes) -> Any:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml  # type: ignore[import-untyped]
+        except ImportError:
+            raise ValueError("YAML rule files require PyYAML: pip install 'cdkdiff[rules]'")
+        try:
+            return yaml.safe_load(data)
+        except yaml.YAMLError as e:  # the JSON and TOML errors are already ValueErrors
+            raise ValueError(f"invalid YAML: {e}") from e
+    if ext == ".toml":
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("TOML rule files require tomli: pip install 'cdkdiff[rules]'")
+        return tomllib.loads(data.decode())
+    return json.loads(data)
+
+
+def parse_rules(path: str, data: bytes) -> list[Rule]:
+    """Parse a JSON, TOML or YAML rules document (`rules: [...]` or a bare list).
+
+    Raises ValueError for an invalid document or rule, and TypeError when the rules are
+    not a list or a rule is not a mapping.
+    """
+    doc = _parse_document(path, data)
+    raw_rules = doc.get("rules", []) if isinstance(doc, dict) else doc
+    if not isinstance(raw_rules, list):
+        raise TypeError("rules file must contain a list of rules")
+    return [_parse_rule(raw, i) for i, raw in enumerate(raw_rules, start=1)]
+
+
+def load_rules(path: str) -> RuleSet:
+    """Load and compile a rules file. Raises ValueError or TypeError like `parse_rules`."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return RuleSet(parse_rules(path, data), version=_fingerprint(data))
@@ -1,24 +1,111 @@
 from __future__ import annotations
 import fnmatch
+import os
+import re
 import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Generator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from cdkdiff.profiling import span
 
 _SUBPROCESS_TIMEOUT = 300  # seconds
 
 
+@dataclass
+class StackRun:
+    """Outcome of diffing a single stack in its own `cdk diff` process."""
+    name: str
+    output: str = ""
+    error: str | None = None
+    duration: float = 0.0  # seconds
+
+
+def _app_args(app: str | None) -> list[str]:
+    return ["--app", app] if app else []
+
+
+def _diff_cmd(stack_names: list[str], app: str | None, exclusively: bool) -> list[str]:
+    # cdk also diffs the stacks a named stack depends on unless told --exclusively
+    flags = ["--exclusively"] if exclusively else []
+    return ["cdk", "diff", *_app_args(app), *flags, *stack_names]
+
+
+class _Processes:
+    """The `cdk diff` processes of one parallel run, so they can all be stopped at once."""
+
+    def __init__(self) -> None:
+        self.stopped = False
+        self._running: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    def run(self, cmd: list[str], cwd: str, timeout: float) -> subprocess.CompletedProcess:
+        """Like `subprocess.run`, but the process is terminated by `stop`."""
+        with self._lock:
+            if self.stopped:
+                raise RuntimeError("cdk diff cancelled")
+            proc = subprocess.Popen(
+                cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            self._running.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            with self._lock:
+                self._running.discard(proc)
+        if self.stopped:
+            raise RuntimeError("cdk diff cancelled")
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def stop(self) -> None:
+        with self._lock:
+            self.stopped = True
+            for proc in self._running:
+                proc.terminate()
+
+
 def run_cdk_diff(
     stack_names: list[str],
     context_path: str = ".",
+    app: str | None = None,
+    timeout: float = _SUBPROCESS_TIMEOUT,
+    exclusively: bool = False,
 ) -> str:
-    """Run cdk diff and return stdout. cdk exits 1 when diffs exist — that's normal."""
-    cmd = ["cdk", "diff"] + stack_names
+    """Run cdk diff and return stdout. cdk exits 1 when diffs exist — that's normal.
+
+    With `exclusively`, only the named stacks are diffed, not the stacks they depend on.
+    """
+    return _run_cdk_diff(stack_names, context_path, app, timeout, exclusively=exclusively)
+
+
+def _run_cdk_diff(
+    stack_names: list[str],
+    context_path: str,
+    app: str | None,
+    timeout: float,
+    processes: _Processes | None = None,
+    exclusively: bool = False,
+) -> str:
+    cmd = _diff_cmd(stack_names, app, exclusively)
     try:
-        result = subprocess.run(
-            cmd,
-            cwd=context_path,
-            capture_output=True,
-            text=True,
-            timeout=_SUBPROCESS_TIMEOUT,
-        )
+        with span("cdk diff", "subprocess", stacks=" ".join(stack_names) or "*"):
+            if processes is not None:
+                result = processes.run(cmd, cwd=context_path, timeout=timeout)
+            else:
+                result = subprocess.run(
+                    cmd,
+                    cwd=context_path,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                    timeout=timeout,
+                )
     except FileNotFoundError as e:
         raise RuntimeError(f"cdk not found: {e}") from e
 
@@ -31,29 +118,232 @@ def run_cdk_diff(
     return result.stdout
 
 
-def list_stacks(context_path: str = ".") -> list[str]:
+def stream_cdk_diff(
+    stack_names: list[str],
+    context_path: str = ".",
+    app: str | None = None,
+    timeout: float = _SUBPROCESS_TIMEOUT,
+    exclusively: bool = False,
+) -> Generator[str, None, None]:
+    """Run cdk diff and yield stdout lines as they are produced.
+
+    Errors are raised once the stream is exhausted, like `run_cdk_diff`. Closing the
+    generator early kills the subprocess.
+    """
+    cmd = _diff_cmd(stack_names, app, exclusively)
+    # stderr goes to a file so a chatty cdk can never block on a full pipe
+    with tempfile.TemporaryFile(mode="w+") as stderr, \
+            span("cdk diff (streamed)", "subprocess", stacks=" ".join(stack_names) or "*"):
+        try:
+            proc = subprocess.Popen(
+                cmd, cwd=context_path, stdout=subprocess.PIPE, stderr=stderr, text=True,
+            )
+        except FileNotFoundError as e:
+            raise RuntimeError(f"cdk not found: {e}") from e
+        stdout = proc.stdout
+        if stdout is None:  # cannot happen with stdout=PIPE, but Popen types it optional
+            proc.kill()
+            proc.wait()
+            raise RuntimeError("cdk diff started without a stdout pipe")
+
+        timed_out = threading.Event()
+
+        def _expire() -> None:
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield from stdout
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            stdout.close()
+
+        if timed_out.is_set():
+            raise RuntimeError(f"cdk diff timed out after {timeout:g}s")
+        # cdk diff exits 1 when there are changes — not an error
+        if returncode not in (0, 1):
+            stderr.seek(0)
+            raise RuntimeError(f"cdk diff failed (exit {returncode}):\n{stderr.read()}")
+
+
+def run_cdk_diff_parallel(
+    stack_names: list[str],
+    context_path: str = ".",
+    jobs: int = 4,
+    app: str | None = None,
+    timeout: float = _SUBPROCESS_TIMEOUT,
+    timeouts: dict[str, float] | None = None,
+    priority: dict[str, float] | None = None,
+    dependencies: dict[str, list[str]] | None = None,
+    stop_when: Callable[[StackRun], bool] | None = None,
+) -> list[StackRun]:
+    """Diff each stack in its own `cdk diff --exclusively` process, at most `jobs` at a time.
+
+    Results come back in the order of `stack_names`. A stack that fails or times out
+    is reported through `StackRun.error` rather than aborting the other stacks.
+
+    `timeouts` overrides `timeout` per stack. Stacks start highest `priority` first
+    (input order by default), each only after the stacks it depends on per
+    `dependencies` have finished; if those form a cycle, the rest start anyway.
+
+    Once `stop_when` returns True for a finished run, no more stacks start, running
+    `cdk diff` processes are terminated, and only the runs finished so far are returned.
+    """
+    def _diff_one(name: str) -> StackRun:
+        limit = (timeouts or {}).get(name, timeout)
+        start = time.perf_counter()
+        try:
+            output = _run_cdk_diff([name], context_path, app, limit, processes,
+                                   exclusively=True)
+        except subprocess.TimeoutExpired:
+            return StackRun(name, error=f"cdk diff timed out after {limit:g}s",
+                            duration=time.perf_counter() - start)
+        except RuntimeError as e:
+            return StackRun(name, error=str(e), duration=time.perf_counter() - start)
+        return StackRun(name, output=output, duration=time.perf_counter() - start)
+
+    order = list(dict.fromkeys(stack_names))
+    rank = {name: i for i, name in enumerate(order)}
+    blockers = {
+        name: {d for d in (dependencies or {}).get(name, ()) if d in rank and d != name}
+        for name in order
+    }
+    pending = set(order)
+    results: dict[str, StackRun] = {}
+    running: dict[Future, str] = {}
+    processes = _Processes() if stop_when is not None else None
+
+    def _next() -> str | None:
+        ready = [n for n in pending if not blockers[n]]
+        if not ready and not running:
+            ready = list(pending)  # dependency cycle
+        if not ready:
+            return None
+        return min(ready, key=lambda n: (-(priority or {}).get(n, 0.0), rank[n]))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while (pending or running) and not (processes and processes.stopped):
+            while pending and len(running) < max(1, jobs) and (name := _next()) is not None:
+                pending.discard(name)
+                running[pool.submit(_diff_one, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = run = future.result()
+                for waiting in blockers.values():
+                    waiting.discard(name)
+                if processes is not None and stop_when is not None and stop_when(run):
+                    processes.stop()
+                    break
+    return [results[name] for name in stack_names if name in results]
+
+
+def synth(context_path: str = ".", output_dir: str = "cdk.out") -> str:
+    """Run `cdk synth` once and return the absolute path of the cloud assembly."""
+    assembly = os.path.abspath(os.path.join(context_path, output_dir))
+    try:
+        with span("cdk synth", "subprocess"):
+            result = subprocess.run(
+                ["cdk", "synth", "--quiet", "--output", assembly],
+                cwd=context_path,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=_SUBPROCESS_TIMEOUT,
+            )
+    except FileNotFoundError as e:
+        raise RuntimeError(f"cdk not found: {e}") from e
+    if result.returncode != 0:
+        raise RuntimeError(f"cdk synth failed (exit {result.returncode}):\n{result.stderr}")
+    return assembly
+
+
+def list_stacks(context_path: str = ".", app: str | None = None) -> list[str]:
     """Return all stack names from `cdk list`."""
     try:
-        result = subprocess.run(
-            ["cdk", "list"],
-            cwd=context_path,
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=_SUBPROCESS_TIMEOUT,
-        )
+        with span("cdk list", "subprocess"):
+            result = subprocess.run(
+                ["cdk", "list"] + _app_args(app),
+                cwd=context_path,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=_SUBPROCESS_TIMEOUT,
+            )
     except FileNotFoundError as e:
         raise RuntimeError(f"cdk not found: {e}") from e
     return [line.strip() for line in result.stdout.splitlines() if line.strip()]
 
 
-def expand_stack_patterns(patterns: list[str], context_path: str = ".") -> list[str]:
-    """Expand glob patterns against available stacks. Returns matching stack names."""
-    if not any("*" in p or "?" in p for p in patterns):
-        return patterns  # No globs — use as-is
+def _is_regex(pattern: str) -> bool:
+    return len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/")
+
 
-    all_stacks = list_stacks(context_path)
-    matched: list[str] = []
+def _is_plain(pattern: str) -> bool:
+    return not (pattern.startswith("!") or _is_regex(pattern) or any(c in pattern for c in "*?["))
+
+
+def compile_stack_patterns(patterns: list[str]) -> Callable[[str], bool]:
+    """Compile stack patterns into a single matcher.
+
+    A pattern is a glob (`Api*`) or a regular expression between slashes
+    (`/^Api(Stack|Worker)$/`, matched anywhere in the name). Prefixing either with `!`
+    excludes the stacks it matches. A name matches if it matches any including pattern
+    (or there are none) and no excluding one. Raises ValueError for an invalid regex.
+    """
+    include: list[str] = []
+    exclude: list[str] = []
     for pattern in patterns:
-        matched.extend(s for s in all_stacks if fnmatch.fnmatch(s, pattern))
-    return list(dict.fromkeys(matched))  # deduplicate, preserve order
+        (exclude if pattern.startswith("!") else include).append(pattern.removeprefix("!"))
+    included = _pattern_matchers(include)
+    excluded = _pattern_matchers(exclude)
+
+    def matches(name: str) -> bool:
+        return ((not included or any(match(name) for match in included))
+                and not any(match(name) for match in excluded))
+
+    return matches
+
+
+def _pattern_matchers(patterns: list[str]) -> list[Callable[[str], object]]:
+    # Each regex is compiled on its own so its group numbers and names stay its own;
+    # translated globs have no groups, so they share one alternation.
+    globs = [fnmatch.translate(p) for p in patterns if not _is_regex(p)]
+    try:
+        matchers: list[Callable[[str], object]] = [
+            re.compile(p[1:-1]).search for p in patterns if _is_regex(p)
+        ]
+        if globs:
+            matchers.append(re.compile("|".join(globs)).match)
+    except re.error as e:
+        raise ValueError(f"invalid stack pattern: {e}") from e
+    return matchers
+
+
+def expand_stack_patterns(
+    patterns: list[str],
+    context_path: str = ".",
+    app: str | None = None,
+    available: list[str] | None = None,
+) -> list[str]:
+    """Expand stack patterns against the app's stacks. Returns matching names in app order.
+
+    See `compile_stack_patterns` for the pattern forms. Plain names alone are returned
+    as-is. Pass `available` to match against a known stack list; otherwise it is read
+    from the assembly or a cached `cdk list`.
+    """
+    if all(_is_plain(p) for p in patterns):
+        return patterns  # No globs — use as-is
+
+    matches = compile_stack_patterns(patterns)
+    if available is None:
+        from cdkdiff.assembly import cached_stack_list
+        available = cached_stack_list(context_path, app, list_stacks)
+    return [s for s in dict.fromkeys(available) if matches(s)]
@@ -0,0 +1,83 @@
+"""Duration-aware scheduling of per-stack `cdk diff` processes.
+
+Each run records how long every stack took. The next run starts the stacks with the
+longest remaining chain of work first (a stack's own estimated time plus its slowest
+chain of dependents), so the slowest stacks are not left running alone at the tail of
+the pool. Each stack also gets a timeout sized from its own history instead of one
+fixed limit for every stack.
+"""
+from __future__ import annotations
+
+import os
+
+from cdkdiff.cache import default_cache_dir, load_state, save_state
+
+_STATE_FILE = "stack-durations.json"
+_MAX_APPS = 64  # apps remembered in the state file
+_SAMPLES = 5  # recent durations kept per stack
+DEFAULT_TIMEOUT = 300.0  # seconds, for stacks with no history
+_MIN_TIMEOUT = 60.0
+_MAX_TIMEOUT = 1800.0
+_TIMEOUT_FACTOR = 3.0  # headroom over the slowest recent run
+
+
+class DurationHistory:
+    """Recent `cdk diff` durations of one app's stacks, stored in the cache directory."""
+
+    def __init__(self, context_path: str = ".", path: str | None = None) -> None:
+        self.path = path or os.path.join(default_cache_dir(), _STATE_FILE)
+        self.key = os.path.abspath(context_path)
+        self._state = load_state(self.path)
+        samples = self._state.get(self.key)
+        self.samples: dict[str, list[float]] = samples if isinstance(samples, dict) else {}
+
+    def estimate(self, name: str) -> float | None:
+        """Return the mean of the stack's recent durations, or None without history."""
+        samples = self.samples.get(name)
+        return sum(samples) / len(samples) if samples else None
+
+    def timeout(self, name: str) -> float:
+        """Return a timeout for the stack's next diff, scaled from its slowest recent run."""
+        samples = self.samples.get(name)
+        if not samples:
+            return DEFAULT_TIMEOUT
+        return min(_MAX_TIMEOUT, max(_MIN_TIMEOUT, _TIMEOUT_FACTOR * max(samples)))
+
+    def record(self, name: str, seconds: float) -> None:
+        self.samples[name] = [*self.samples.get(name, []), round(seconds, 3)][-_SAMPLES:]
+
+    def save(self) -> None:
+        self._state.pop(self.key, None)
+        self._state[self.key] = self.samples
+        save_state(self.path, self._state, _MAX_APPS)
+
+    def priorities(self, names: list[str],
+                   dependencies: dict[str, list[str]] | None = None) -> dict[str, float]:
+        """Return each stack's estimated critical path: its own time plus its slowest chain
+        of dependents among `names`. Stacks without history count as the mean estimate.
+        """
+        known = [e for e in map(self.estimate, names) if e is not None]
+        fallback = sum(known) / len(known) if known else 1.0
+        selected = set(names)
+        dependents: dict[str, list[str]] = {name: [] for name in names}
+        for name in names:
+            for dep in (dependencies or {}).get(name, ()):
+                if dep in selected:
+                    dependents[dep].append(name)
+
+        result: dict[str, float] = {}
+        visiting: set[str] = set()
+
+        def path(name: str) -> float:
+            if name in result:
+                return result[name]
+            visiting.add(name)  # guards against dependency cycles
+            tail = max((path(d) for d in dependents[name] if d not in visiting), default=0.0)
+            visiting.discard(name)
+            own = self.estimate(name)
+            result[name] = (fallback if own is None else own) + tail
+            return result[name]
+
+        for name in names:
+            path(name)
+        return result
@@ -1,4 +1,12 @@
-from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel
+from __future__ import annotations
+
+from typing import cast
+
+from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
+from cdkdiff.rules import Rule, RuleSet
+
+# Bump whenever scoring behaviour changes so cached results are not reused
+RULES_VERSION = "3"
 
 _MEDIUM_RISK_TYPES = {
     "AWS::EC2::SecurityGroup",
@@ -8,28 +16,56 @@ _MEDIUM_RISK_TYPES = {
     "AWS::ElasticLoadBalancingV2::LoadBalancer",
 }
 
+_REMOVE = frozenset({ChangeType.REMOVE})
+_ADD = frozenset({ChangeType.ADD})
+_UPDATE = frozenset({ChangeType.UPDATE})
+
+# Always consulted after any user-supplied rules
+BUILTIN_RULES = RuleSet([
+    Rule("builtin:remove", RiskLevel.HIGH, change_types=_REMOVE),
+    Rule("builtin:add", RiskLevel.LOW, change_types=_ADD),
+    Rule("builtin:replacement", RiskLevel.HIGH, change_types=_UPDATE, replacement=True),
+    *(
+        Rule("builtin:sensitive-type", RiskLevel.MEDIUM, resource_type=t, change_types=_UPDATE)
+        for t in sorted(_MEDIUM_RISK_TYPES)
+    ),
+    Rule("builtin:default", RiskLevel.LOW),
+], version=RULES_VERSION)
+
 
-def score_change(change: Change) -> RiskLevel:
-    """Return the risk level for a single change."""
-    if change.change_type == ChangeType.REMOVE:
-        return RiskLevel.HIGH
+def _match(change: Change, rules: RuleSet | None, stack_name: str) -> Rule:
+    rule = rules.match(change, stack_name) if rules is not None else None
+    # builtin:default matches everything, so a rule is always found
+    return rule or cast(Rule, BUILTIN_RULES.match(change, stack_name))
 
-    if change.change_type == ChangeType.ADD:
-        return RiskLevel.LOW
 
-    # UPDATE
-    if change.requires_replacement:
-        return RiskLevel.HIGH
+def score_change(change: Change, rules: RuleSet | None = None, stack_name: str = "") -> RiskLevel:
+    """Return the risk level for a single change.
 
-    if change.resource_type in _MEDIUM_RISK_TYPES:
-        return RiskLevel.MEDIUM
+    `rules` (e.g. from `cdkdiff.rules.load_rules`) are consulted before the built-in rules.
+    """
+    return _match(change, rules, stack_name).risk
 
-    return RiskLevel.LOW
 
+def score_stack(stack: StackDiff, rules: RuleSet | None = None) -> StackDiff:
+    """Mutate risk levels on a single stack's changes in-place and return the stack.
 
-def score_summary(summary: DiffSummary) -> DiffSummary:
+    Each change records the id of the rule that scored it.
+    """
+    for change in stack.changes:
+        rule = _match(change, rules, stack.name)
+        stack.rescore(change, rule.risk)
+        change.rule = rule.id
+    return stack
+
+
+def score_summary(summary: DiffSummary, rules: RuleSet | None = None) -> DiffSummary:
     """Mutate risk levels on all changes in-place and return the summary."""
     for stack in summary.stacks:
-        for change in stack.changes:
-            change.risk = score_change(change)
+        score_stack(stack, rules)
     return summary
+
+
+def rules_version(rules: RuleSet | None) -> str:
+    """Identify the effective scoring rules, for keying cached results."""
+    return f"{RULES_VERSION}+{rules.version}" if rules is not None else RULES_VERSION
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socketserver
+import stat
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cdkdiff.assembly import ensure_assembly, stack_fingerprints, walk_sources
+from cdkdiff.formatters import get_formatter
+from cdkdiff.models import DiffSummary, StackDiff, in_request_order
+
+_MAX_WAIT = 300.0  # seconds a client may block waiting for a newer summary
+
+
+def source_snapshot(context_path: str = ".", output_dir: str = "cdk.out") -> str:
+    """Return a cheap hash of every source file's path, size and mtime.
+
+    Used to poll for edits; contents are only hashed (by `ensure_assembly`) once this
+    changes.
+    """
+    root = os.path.abspath(context_path)
+    skip_abs = os.path.abspath(os.path.join(root, output_dir))
+    digest = hashlib.sha256()
+    for dirpath, _, filenames in walk_sources(root, skip_abs):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # vanished mid-walk
+            rel = os.path.relpath(path, root)
+            digest.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+    return digest.hexdigest()
+
+
+class DiffService:
+    """Keeps the scored diff of one CDK app current while its sources change.
+
+    `refresh` re-synthesizes after an edit and re-diffs only the stacks whose template
+    or assets changed, reusing the previous results for the rest. Readers get the
+    latest summary and can block until a newer one is published.
+    """
+
+    def __init__(
+        self,
+        context_path: str,
+        diff: Callable[[list[str]], DiffSummary],
+        output_dir: str = "cdk.out",
+        synthesize: Callable[[str, str], str] = ensure_assembly,
+    ) -> None:
+        self.context_path = context_path
+        self.output_dir = output_dir
+        self._diff = diff
+        self._synthesize = synthesize
+        self._snapshot: str | None = None
+        self._fingerprints: dict[str, str] = {}
+        self._changed = threading.Condition()
+        self.summary = DiffSummary()
+        self.generation = 0  # bumped on every published result
+        self.error: str | None = None
+        self.updated: float | None = None
+
+    def refresh(self) -> bool:
+        """Re-diff if the sources changed since the last call; return True if they had."""
+        snapshot = source_snapshot(self.context_path, self.output_dir)
+        if snapshot == self._snapshot:
+            return False
+        self._snapshot = snapshot
+        try:
+            assembly = self._synthesize(self.context_path, self.output_dir)
+            fingerprints = stack_fingerprints(assembly)
+        except (RuntimeError, OSError, ValueError, KeyError) as e:
+            self._publish(self.summary, error=str(e))
+            return True
+
+        changed = [n for n, f in fingerprints.items() if self._fingerprints.get(n) != f]
+        if not changed and set(fingerprints) == set(self._fingerprints):
+            return True  # an edit that did not change the synthesized output
+        try:
+            fresh = self._diff(changed).stacks if changed else []
+        except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+            self._publish(self.summary, error=str(e))  # retried on the next edit
+            return True
+        previous = {s.name: s for s in self.summary.stacks}
+        stacks = in_request_order(
+            fingerprints, fresh, lambda name: previous.get(name) or StackDiff(name=name),
+        )
+        # Stacks that failed are retried on the next edit
+        failed = {s.name for s in stacks if s.error}
+        self._fingerprints = {n: f for n, f in fingerprints.items() if n not in failed}
+        self._publish(DiffSummary(stacks=stacks), error=None)
+        return True
+
+    def _publish(self, summary: DiffSummary, error: str | None) -> None:
+        with self._changed:
+            self.summary = summary
+            self.error = error
+            self.generation += 1
+            self.updated = time.time()
+            self._changed.notify_all()
+
+    def wait(self, after: int, timeout: float) -> bool:
+        """Block until a result newer than generation `after` exists, or `timeout` passes."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.generation > after, timeout)
+
+    def watch(self, stop: threading.Event, interval: float = 1.0) -> None:
+        """Poll for source changes until `stop` is set.
+
+        An error that escapes one refresh is published and does not end watching.
+        """
+        while not stop.is_set():
+            try:
+                self.refresh()
+            except (RuntimeError, OSError, ValueError, KeyError, subprocess.SubprocessError) as e:
+                self._publish(self.summary, error=f"refresh failed: {e!r}")
+            stop.wait(interval)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: DiffService  # set on the per-server subclass
+
+    def log_message(self, *args) -> None:
+        pass  # the daemon's output is for its own status, not access logs
+
+    def _send(self, status: int, body: str, content_type: str = "application/json") -> None:
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Cdkdiff-Generation", str(self.service.generation))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        service = self.service
+        if url.path == "/status":
+            self._send(200, json.dumps({
+                "generation": service.generation,
+                "updated": service.updated,
+                "error": service.error,
+                "stacks": len(service.summary.stacks),
+            }))
+        elif url.path == "/summary":
+            try:
+                if "wait" in query:
+                    timeout = min(float(query.get("timeout", 30)), _MAX_WAIT)
+                    service.wait(int(query["wait"]), timeout)
+                formatter = get_formatter(query.get("format", "json"))
+            except (KeyError, ValueError) as e:
+                self._send(400, json.dumps({"error": f"bad request: {e}"}))
+                return
+            content_type = "application/json" if query.get("format", "json") == "json" \
+                else "text/plain"
+            self._send(200, formatter(service.summary), content_type)
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("local", 0)  # BaseHTTPRequestHandler expects a (host, port) pair
+
+
+def remove_stale_socket(path: str) -> None:
+    """Delete a Unix socket left at `path` by an earlier run.
+
+    Raises ValueError if something other than a socket is there, so it is never removed.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+
+def make_server(
+    service: DiffService, host: str = "127.0.0.1", port: int = 0,
+    socket_path: str | None = None,
+) -> socketserver.BaseServer:
+    """Return an HTTP server (TCP, or on a Unix socket) exposing `service`.
+
+    Endpoints: `GET /summary[?format=json|pr-comment|...][&wait=GEN&timeout=S]`, which
+    with `wait` blocks until a summary newer than generation GEN is published, and
+    `GET /status`. Raises ValueError if `socket_path` names something other than a socket.
+    """
+    handler = type("Handler", (_Handler,), {"service": service})
+    if socket_path:
+        remove_stale_socket(socket_path)
+        return _UnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,17 @@
+import pytest
+from click.testing import CliRunner
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep the on-disk result cache out of the real home directory."""
+    monkeypatch.setenv("CDKDIFF_CACHE_DIR", str(tmp_path_factory.mktemp("cdkdiff-cache")))
+
+
+@pytest.fixture
+def split_runner():
+    """A CliRunner with stderr captured apart from stdout, on every supported click."""
+    try:
+        return CliRunner(mix_stderr=False)  # click < 8.2 mixes the streams by default
+    except TypeError:
+        return CliRunner()  # click >= 8.2 always captures them separately
@@ -0,0 +1,87 @@
+import pytest
+
+from cdkdiff.archive import is_archive, read_archive, write_archive
+from cdkdiff.formatters.github_fmt import format_github
+from cdkdiff.formatters.json_fmt import format_json
+from cdkdiff.models import (
+    Change,
+    ChangeType,
+    DiffSummary,
+    PropertyChange,
+    RiskLevel,
+    StackDiff,
+)
+
+
+def _summary() -> DiffSummary:
+    return DiffSummary(stacks=[
+        StackDiff("Stäck", changes=[
+            Change("AWS::DynamoDB::Table", "UsersTable", ChangeType.REMOVE, RiskLevel.HIGH,
+                   details="Resource will be deleted", rule="no-table-delete"),
+            Change("AWS::Lambda::Function", "Fn", ChangeType.UPDATE, RiskLevel.LOW,
+                   requires_replacement=True, properties=[
+                       PropertyChange("Runtime", ChangeType.UPDATE, old="python3.9",
+                                      new="python3.12"),
+                       PropertyChange("Layers", ChangeType.ADD, new="arn:λ\n",
+                                      requires_replacement=True),
+                   ]),
+        ]),
+        StackDiff("Broken", changes=[], error="cdk diff failed"),
+        StackDiff("Same", changes=[], unchanged=True),
+        StackDiff("Empty", changes=[]),
+    ])
+
+
+def _write(tmp_path, summary) -> str:
+    path = tmp_path / "diff.cdkdiff"
+    with open(path, "wb") as f:
+        write_archive(summary, f)
+    return str(path)
+
+
+def test_archive_round_trips(tmp_path):
+    summary = _summary()
+    loaded = read_archive(_write(tmp_path, summary))
+    assert loaded.to_summary() == summary
+    assert loaded.highest_risk == RiskLevel.HIGH
+    assert loaded.risk_counts == summary.risk_counts
+
+
+def test_loaded_archive_renders_like_the_original(tmp_path):
+    summary = _summary()
+    loaded = read_archive(_write(tmp_path, summary))
+    assert format_json(loaded) == format_json(summary)
+    assert format_github(loaded) == format_github(summary)
+
+
+def test_archive_of_columnar_summary_and_empty_summary(tmp_path):
+    loaded = read_archive(_write(tmp_path, _summary()))
+    assert read_archive(_write(tmp_path, loaded)).to_summary() == _summary()
+    assert read_archive(_write(tmp_path, DiffSummary())).stacks == []
+
+
+def test_archive_is_smaller_than_json(tmp_path):
+    summary = DiffSummary(stacks=[StackDiff("S", changes=[
+        Change("AWS::S3::Bucket", f"Bucket{i}", ChangeType.ADD, RiskLevel.LOW)
+        for i in range(1000)
+    ])])
+    with open(_write(tmp_path, summary), "rb") as f:
+        assert len(f.read()) * 5 < len(format_json(summary))
+
+
+def test_rejects_other_and_truncated_files(tmp_path):
+    other = tmp_path / "diff.json"
+    other.write_text('{"stacks": []}')
+    assert not is_archive(str(other))
+    with pytest.raises(ValueError, match="not a cdkdiff archive"):
+        read_archive(str(other))
+
+    path = _write(tmp_path, _summary())
+    assert is_archive(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    for cut in (40, len(data) - 3):
+        with open(path, "wb") as f:
+            f.write(data[:cut])
+        with pytest.raises(ValueError, match="truncated"):
+            read_archive(path)
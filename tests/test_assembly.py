@@ -0,0 +1,162 @@
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from cdkdiff.assembly import (
+    baseline_fingerprints,
+    ensure_assembly,
+    is_assembly,
+    source_fingerprint,
+    stack_dependencies,
+    stack_fingerprints,
+    template_hashes,
+)
+
+
+def _app(tmp_path: Path) -> Path:
+    (tmp_path / "cdk.json").write_text('{"app": "python app.py"}')
+    (tmp_path / "app.py").write_text("print('hi')\n")
+    return tmp_path
+
+
+def _fake_synth(context_path: str, output_dir: str = "cdk.out") -> str:
+    out = Path(context_path) / output_dir
+    out.mkdir(exist_ok=True)
+    (out / "manifest.json").write_text("{}")
+    return str(out.resolve())
+
+
+def test_fingerprint_stable(tmp_path):
+    app = _app(tmp_path)
+    assert source_fingerprint(str(app)) == source_fingerprint(str(app))
+
+
+def test_fingerprint_changes_with_source(tmp_path):
+    app = _app(tmp_path)
+    before = source_fingerprint(str(app))
+    (app / "app.py").write_text("print('changed')\n")
+    assert source_fingerprint(str(app)) != before
+
+
+def test_fingerprint_ignores_build_dirs(tmp_path):
+    app = _app(tmp_path)
+    before = source_fingerprint(str(app))
+    (app / "cdk.out").mkdir()
+    (app / "cdk.out" / "manifest.json").write_text("{}")
+    (app / "node_modules").mkdir()
+    (app / "node_modules" / "x.js").write_text("x")
+    assert source_fingerprint(str(app)) == before
+
+
+def test_is_assembly(tmp_path):
+    assert not is_assembly(str(tmp_path))
+    (tmp_path / "manifest.json").write_text("{}")
+    assert is_assembly(str(tmp_path))
+
+
+def test_ensure_assembly_reuses_fresh_assembly(tmp_path):
+    app = _app(tmp_path)
+    with patch("cdkdiff.assembly.synth", side_effect=_fake_synth) as mock_synth:
+        first = ensure_assembly(str(app))
+        second = ensure_assembly(str(app))
+    assert first == second == str(app / "cdk.out")
+    assert mock_synth.call_count == 1
+
+
+def test_ensure_assembly_resynths_when_stale(tmp_path):
+    app = _app(tmp_path)
+    with patch("cdkdiff.assembly.synth", side_effect=_fake_synth) as mock_synth:
+        ensure_assembly(str(app))
+        (app / "app.py").write_text("print('changed')\n")
+        ensure_assembly(str(app))
+    assert mock_synth.call_count == 2
+
+
+def test_template_hashes(tmp_path):
+    out = tmp_path / "cdk.out"
+    out.mkdir()
+    (out / "A.template.json").write_text('{"Resources": {}}')
+    (out / "B.template.json").write_text('{"Resources": {"X": {}}}')
+    hashes = template_hashes(str(out))
+    assert set(hashes) == {"A", "B"}
+    assert hashes["A"] != hashes["B"]
+
+
+def _write_assembly(out: Path, templates: dict[str, str], assets: dict[str, list[str]]) -> Path:
+    out.mkdir(parents=True, exist_ok=True)
+    artifacts = {}
+    for name, body in templates.items():
+        (out / f"{name}.template.json").write_text(body)
+        (out / f"{name}.assets.json").write_text(
+            json.dumps({"files": {h: {} for h in assets.get(name, [])}})
+        )
+        artifacts[f"{name}.assets"] = {
+            "type": "cdk:asset-manifest",
+            "properties": {"file": f"{name}.assets.json"},
+        }
+        artifacts[name] = {
+            "type": "aws:cloudformation:stack",
+            "properties": {"templateFile": f"{name}.template.json"},
+            "dependencies": [f"{name}.assets"],
+        }
+    (out / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+    return out
+
+
+def test_stack_fingerprints_track_templates_and_assets(tmp_path):
+    base = stack_fingerprints(str(_write_assembly(
+        tmp_path / "a", {"A": "{}", "B": "{}"}, {"A": ["h1"], "B": ["h2"]},
+    )))
+    template_changed = stack_fingerprints(str(_write_assembly(
+        tmp_path / "b", {"A": '{"x": 1}', "B": "{}"}, {"A": ["h1"], "B": ["h2"]},
+    )))
+    asset_changed = stack_fingerprints(str(_write_assembly(
+        tmp_path / "c", {"A": "{}", "B": "{}"}, {"A": ["h1"], "B": ["h3"]},
+    )))
+    assert template_changed["A"] != base["A"] and template_changed["B"] == base["B"]
+    assert asset_changed["A"] == base["A"] and asset_changed["B"] != base["B"]
+
+
+def test_baseline_fingerprints_from_directory_and_manifest(tmp_path):
+    old = _write_assembly(tmp_path / "old", {"A": "{}"}, {})
+    current = _write_assembly(tmp_path / "cdk.out", {"A": "{}"}, {})
+    expected = stack_fingerprints(str(old))
+    assert baseline_fingerprints(str(old), str(current)) == expected
+    assert baseline_fingerprints(str(old / "manifest.json"), str(current)) == expected
+
+
+def test_baseline_fingerprints_from_git_ref(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    out = _write_assembly(tmp_path / "app" / "cdk.out", {"A": "{}"}, {"A": ["h1"]})
+    git("init", "-q")
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base")
+    committed = stack_fingerprints(str(out))
+    (out / "A.template.json").write_text('{"changed": true}')
+
+    assert baseline_fingerprints("HEAD", str(out)) == committed
+    assert stack_fingerprints(str(out)) != committed
+
+
+def test_baseline_fingerprints_unknown_ref_raises(tmp_path):
+    out = _write_assembly(tmp_path / "cdk.out", {"A": "{}"}, {})
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    with pytest.raises(RuntimeError):
+        baseline_fingerprints("no-such-ref", str(out))
+
+
+def test_stack_dependencies_from_manifest(tmp_path):
+    stack = "aws:cloudformation:stack"
+    (tmp_path / "manifest.json").write_text(json.dumps({"artifacts": {
+        "Network": {"type": stack},
+        "App": {"type": stack, "displayName": "Prod/App",
+                "dependencies": ["Network", "App.assets"]},
+        "App.assets": {"type": "cdk:asset-manifest"},
+    }}))
+    assert stack_dependencies(str(tmp_path)) == {"Network": [], "Prod/App": ["Network"]}
+    assert stack_dependencies(str(tmp_path / "missing")) == {}
@@ -0,0 +1,65 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from cdkdiff.batch import discover_apps, run_batch
+from cdkdiff.cli import main
+from cdkdiff.models import RiskLevel
+
+# Prints one stack named after the app directory; the app called "broken" fails
+_FAKE_CDK = """\
+app=$(basename "$PWD")
+if [ "$app" = broken ]; then echo "synth error" >&2; exit 2; fi
+printf 'Stack %sStack\\n\\nResources\\n[-] AWS::SQS::Queue Q destroy\\n' "$app"
+exit 1
+"""
+
+
+def _apps(tmp_path, monkeypatch, *names):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    cdk = bin_dir / "cdk"
+    cdk.write_text("#!/bin/sh\n" + _FAKE_CDK)
+    cdk.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    root = tmp_path / "repo"
+    for name in names:
+        (root / name).mkdir(parents=True)
+        (root / name / "cdk.json").write_text("{}")
+    return root
+
+
+def test_discover_apps_stops_at_app_dirs(tmp_path):
+    for path in ("services/api", "services/api/nested", "infra", "node_modules/pkg"):
+        (tmp_path / path).mkdir(parents=True)
+        (tmp_path / path / "cdk.json").write_text("{}")
+    apps = discover_apps([str(tmp_path)])
+    assert apps == [str(tmp_path / "infra"), str(tmp_path / "services" / "api")]
+
+
+def test_run_batch_combines_apps_in_order(tmp_path, monkeypatch):
+    root = _apps(tmp_path, monkeypatch, "api", "broken", "web")
+    apps = [str(root / name) for name in ("web", "broken", "api")]
+    summary = run_batch(apps, jobs=2)
+    assert [s.name for s in summary.stacks] == [
+        f"{apps[0]}:webStack", apps[1], f"{apps[2]}:apiStack",
+    ]
+    assert "exit 2" in summary.stacks[1].error
+    assert summary.highest_risk == RiskLevel.HIGH
+
+
+def test_batch_command_reports_json(tmp_path, monkeypatch):
+    root = _apps(tmp_path, monkeypatch, "api", "web")
+    result = CliRunner().invoke(main, ["batch", str(root), "--output", "json", "-j", "2"])
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert [s["name"] for s in data["stacks"]] == [
+        f"{root / 'api'}:apiStack", f"{root / 'web'}:webStack",
+    ]
+
+
+def test_batch_command_without_apps_fails(tmp_path):
+    result = CliRunner().invoke(main, ["batch", str(tmp_path)])
+    assert result.exit_code != 0
+    assert "No CDK apps" in result.output
@@ -0,0 +1,33 @@
+from benchmarks.run import compare, run_benchmarks
+from benchmarks.synthetic import generate_diff
+from cdkdiff.models import ChangeType
+from cdkdiff.parser import parse
+
+
+def test_generate_diff_is_deterministic_and_parseable():
+    text = generate_diff(stacks=3, resources=20, iam_rows=4, property_lines=8)
+    assert text == generate_diff(stacks=3, resources=20, iam_rows=4, property_lines=8)
+    summary = parse(text)
+    assert [s.name for s in summary.stacks] == ["BenchStack0", "BenchStack1", "BenchStack2"]
+    assert all(len(s.changes) == 20 + 4 for s in summary.stacks)
+    updates = [c for s in summary.stacks for c in s.changes if c.change_type == ChangeType.UPDATE
+               and c.resource_type != "AWS::IAM::Statement"]
+    assert updates and all(len(c.properties) == 2 * 3 for c in updates)
+
+
+def test_run_benchmarks_reports_every_metric():
+    report = run_benchmarks(stacks=1, resources=5, iam_rows=1, property_lines=4, repeat=1)
+    assert report["params"]["changes"] == 6
+    assert set(report["results"]) == {
+        "parse", "parse_columnar", "score_summary", "format_json", "format_github", "print_summary",
+        "print_compact",
+    }
+    assert report["results"]["parse"]["lines_per_sec"] > 0
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"results": {"parse": {"seconds": 1.0, "lines_per_sec": 1000.0}}}
+    current = {"results": {"parse": {"seconds": 1.05, "lines_per_sec": 800.0}}}
+    assert compare(current, baseline, tolerance=0.10) == [
+        "parse.lines_per_sec: 1000 -> 800 (0.80x)",
+    ]
@@ -0,0 +1,90 @@
+import os
+import time
+from unittest.mock import patch
+
+from cdkdiff.cache import DiffCache, cache_key, load_state, save_state
+from cdkdiff.models import Change, ChangeType, RiskLevel, StackDiff
+
+
+def _stack(name: str = "MyStack") -> StackDiff:
+    return StackDiff(name, changes=[
+        Change("AWS::RDS::DBInstance", "Db", ChangeType.UPDATE, RiskLevel.HIGH,
+               details="replace", requires_replacement=True),
+    ])
+
+
+def test_cache_key_depends_on_every_component():
+    base = cache_key("Prod", "tmpl", "deployed", "1")
+    assert base == cache_key("Prod", "tmpl", "deployed", "1")
+    assert base != cache_key("Staging", "tmpl", "deployed", "1")
+    assert base != cache_key("Prod", "tmpl2", "deployed", "1")
+    assert base != cache_key("Prod", "tmpl", "deployed2", "1")
+    assert base != cache_key("Prod", "tmpl", "deployed", "2")
+    with patch("cdkdiff.cache.tool_version", return_value="99.0"):
+        assert base != cache_key("Prod", "tmpl", "deployed", "1")
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = DiffCache(root=str(tmp_path))
+    assert cache.get("k") is None
+    cache.put("k", _stack())
+    assert cache.get("k") == _stack()
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats == "cache: 1 hit(s), 1 miss(es)"
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    (tmp_path / "k.json").write_text("{not json")
+    cache = DiffCache(root=str(tmp_path))
+    assert cache.get("k") is None
+    assert cache.misses == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiffCache(root=str(tmp_path))
+    cache.put("old", _stack("Old"))
+    cache.put("used", _stack("Used"))
+    entry_size = os.path.getsize(tmp_path / "old.json")
+    past = time.time() - 100
+    os.utime(tmp_path / "old.json", (past, past))
+    os.utime(tmp_path / "used.json", (past, past))
+    cache.get("used")  # refreshes mtime
+
+    cache.max_bytes = entry_size * 2 + entry_size // 2
+    cache.put("new", _stack("New"))
+    assert (tmp_path / "old.json").exists()  # eviction runs once, at the end of a run
+    cache.evict()
+    assert not (tmp_path / "old.json").exists()
+    assert (tmp_path / "used.json").exists()
+    assert (tmp_path / "new.json").exists()
+
+
+def test_put_ignores_unwritable_root(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    DiffCache(root=str(blocker / "sub")).put("k", _stack())  # must not raise
+
+
+def test_eviction_leaves_state_files_alone(tmp_path, monkeypatch):
+    monkeypatch.setenv("CDKDIFF_CACHE_DIR", str(tmp_path))
+    state = tmp_path / "stack-durations.json"
+    state.write_text("{}")
+    cache = DiffCache(max_bytes=1)
+    cache.put("k", _stack())
+    cache.evict()
+    assert cache.root == str(tmp_path / "results")
+    assert state.exists()
+
+
+def test_state_files_keep_the_newest_entries(tmp_path):
+    path = str(tmp_path / "sub" / "state.json")
+    assert load_state(path) == {}
+    save_state(path, {"a": 1, "b": 2, "c": 3}, max_entries=2)
+    assert load_state(path) == {"b": 2, "c": 3}
+    (tmp_path / "sub" / "state.json").write_text("[1, 2]")
+    assert load_state(path) == {}
+    assert os.listdir(tmp_path / "sub") == ["state.json"]  # no temporary files left
+
+
+def test_evict_without_a_cache_directory(tmp_path):
+    DiffCache(root=str(tmp_path / "missing")).evict()  # must not raise
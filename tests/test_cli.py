@@ -1,3 +1,4 @@
+import json
 from click.testing import CliRunner
 from unittest.mock import patch
 from cdkdiff.cli import main
@@ -14,6 +15,13 @@ def test_help():
     assert "Usage" in result.output
 
 
+def test_short_help_lists_diff_options_and_subcommands():
+    result = CliRunner().invoke(main, ["-h"])
+    assert result.exit_code == 0
+    assert "--fail-on" in result.output and "--jobs" in result.output
+    assert "batch" in result.output and "serve" in result.output
+
+
 def test_output_json():
     with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()):
         runner = CliRunner()
@@ -58,8 +66,438 @@ def test_fail_on_medium_exits_1_when_medium_risk():
 
 
 def test_stack_name_args_passed_to_runner():
-    with patch("cdkdiff.cli.run_cdk_diff", return_value="") as mock_run, \
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=iter([])) as mock_run, \
          patch("cdkdiff.cli.expand_stack_patterns", return_value=["StackA"]):
         runner = CliRunner()
         runner.invoke(main, ["StackA"])
     mock_run.assert_called_once()
+    assert mock_run.call_args.kwargs["stack_names"] == ["StackA"]
+
+
+def test_terminal_output_streams_stacks():
+    lines = iter(_sample_diff_output().splitlines(keepends=True))
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=lines):
+        runner = CliRunner()
+        result = runner.invoke(main, [])
+    assert result.exit_code == 0
+    assert "MyStack" in result.output
+    assert "NewBucket" in result.output
+    assert "Changes: 1" in result.output
+
+
+def _stacks_then_destroy():
+    """cdk output of a low-risk stack, a high-risk one, then one that must not be read."""
+    closed = []
+
+    def lines():
+        try:
+            yield from (
+                _sample_diff_output()
+                + "Stack Risky\n\nResources\n[-] AWS::DynamoDB::Table T destroy\n\n"
+                + "Stack Later\n\nResources\n[+] AWS::S3::Bucket LaterBucket\n\n"
+                + "Stack Last\n"
+            ).splitlines(keepends=True)
+        finally:
+            closed.append(True)
+
+    return lines(), closed
+
+
+def test_fail_fast_stops_the_stream_at_the_first_breach():
+    lines, closed = _stacks_then_destroy()
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=lines):
+        result = CliRunner().invoke(main, ["--fail-on", "high", "--fail-fast", "--compact"])
+    assert result.exit_code == 1
+    assert "Risky" in result.output
+    assert "LaterBucket" not in result.output
+    assert "--fail-fast: Risky T (AWS::DynamoDB::Table) is high risk" in result.output
+    assert closed
+
+
+def test_fail_fast_renders_the_partial_summary(split_runner):
+    lines, closed = _stacks_then_destroy()
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=lines), \
+         patch("cdkdiff.cli.run_cdk_diff") as mock_run:
+        result = split_runner.invoke(
+            main, ["--output", "json", "--fail-on", "high", "--fail-fast"]
+        )
+    assert result.exit_code == 1
+    assert not mock_run.called
+    assert [s["name"] for s in json.loads(result.stdout)["stacks"]] == ["MyStack", "Risky"]
+    assert closed
+
+
+def test_fail_fast_parallel_stops_at_the_first_breach(split_runner):
+    from cdkdiff.runner import StackRun
+    runs = [
+        StackRun("Risky", output="Stack Risky\n\nResources\n[-] AWS::DynamoDB::Table T destroy\n"),
+        StackRun("Fine", output=_sample_diff_output()),
+    ]
+
+    def fake_parallel(names, stop_when=None, **kwargs):
+        finished = []
+        for run in runs:
+            finished.append(run)
+            if stop_when(run):
+                break
+        return finished
+
+    with patch("cdkdiff.cli.ensure_assembly", return_value="/tmp/cdk.out"), \
+         patch("cdkdiff.cli.run_cdk_diff_parallel", side_effect=fake_parallel):
+        result = split_runner.invoke(main, [
+            "--output", "json", "--jobs", "2", "--fail-on", "high", "--fail-fast",
+            "Risky", "Fine",
+        ])
+    assert result.exit_code == 1
+    assert [s["name"] for s in json.loads(result.stdout)["stacks"]] == ["Risky"]
+
+
+def test_fail_fast_requires_fail_on():
+    result = CliRunner().invoke(main, ["--fail-fast"])
+    assert result.exit_code == 2
+    assert "requires --fail-on" in result.output
+
+
+def test_compact_terminal_output():
+    lines = iter(_sample_diff_output().splitlines(keepends=True))
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=lines):
+        result = CliRunner().invoke(main, ["--compact"])
+    assert result.exit_code == 0
+    assert "  + LOW    AWS::S3::Bucket  NewBucket" in result.output
+    assert "Changes: 1" in result.output
+
+
+def test_archive_is_rendered_without_cdk(tmp_path):
+    import json
+    archive = str(tmp_path / "diff.cdkdiff")
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()):
+        first = CliRunner().invoke(main, ["--output", "json", "--archive", archive])
+    assert first.exit_code == 0
+    with patch("cdkdiff.cli.run_cdk_diff", side_effect=AssertionError("ran cdk")):
+        result = CliRunner().invoke(main, ["render", archive, "--output", "json"])
+        text = CliRunner().invoke(main, ["render", archive, "--compact"])
+    assert result.exit_code == 0
+    assert json.loads(result.output) == json.loads(first.output)
+    assert "NewBucket" in text.output
+
+
+def test_render_accepts_json_and_rejects_garbage(tmp_path):
+    saved = tmp_path / "diff.json"
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()):
+        saved.write_text(CliRunner().invoke(main, ["--output", "json"]).output)
+    result = CliRunner().invoke(main, ["render", str(saved), "--output", "pr-comment"])
+    assert result.exit_code == 0
+    assert "NewBucket" in result.output
+    saved.write_text("not json")
+    result = CliRunner().invoke(main, ["render", str(saved)])
+    assert result.exit_code == 1
+    assert "Could not load" in result.output
+
+
+def test_ndjson_output_streams_one_record_per_change():
+    import json
+    lines = iter(_sample_diff_output().splitlines(keepends=True))
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=lines):
+        result = CliRunner().invoke(main, ["--output", "ndjson"])
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [(r["stack"], r["logical_id"]) for r in records] == [("MyStack", "NewBucket")]
+
+
+def test_jobs_merges_per_stack_runs_in_order():
+    from cdkdiff.runner import StackRun
+    runs = [
+        StackRun("StackB", output="Stack StackB\n\nResources\n[+] AWS::S3::Bucket B\n"),
+        StackRun("StackA", output=""),
+    ]
+    with patch("cdkdiff.cli.ensure_assembly", return_value="/tmp/cdk.out"), \
+         patch("cdkdiff.cli.list_stacks", return_value=["StackB", "StackA"]), \
+         patch("cdkdiff.cli.run_cdk_diff_parallel", return_value=runs) as mock_run:
+        runner = CliRunner()
+        result = runner.invoke(main, ["--output", "json", "--jobs", "4"])
+    assert result.exit_code == 0
+    assert mock_run.call_args.kwargs["app"] == "/tmp/cdk.out"
+    assert mock_run.call_args.kwargs["jobs"] == 4
+    import json
+    data = json.loads(result.output)
+    assert [s["name"] for s in data["stacks"]] == ["StackB", "StackA"]
+
+
+def test_jobs_reports_a_shared_dependency_once():
+    from cdkdiff.runner import StackRun
+    network = "Stack Network\n\nResources\n[~] AWS::EC2::VPC Vpc\n"
+    runs = [
+        StackRun("Api", output=network + "Stack Api\n\nResources\n[+] AWS::S3::Bucket B\n"),
+        StackRun("Worker", output=network),
+        StackRun("Network", output=network),
+    ]
+    with patch("cdkdiff.cli.ensure_assembly", return_value="/tmp/cdk.out"), \
+         patch("cdkdiff.cli.run_cdk_diff_parallel", return_value=runs):
+        result = CliRunner().invoke(main, ["--output", "json", "--jobs", "2"] +
+                                    ["Api", "Worker", "Network"])
+    assert result.exit_code == 0
+    data = json.loads(result.output)
+    assert [s["name"] for s in data["stacks"]] == ["Api", "Worker", "Network"]
+    assert data["summary"]["total_changes"] == 2
+
+
+def test_jobs_reports_failed_stacks_and_exits_1():
+    from cdkdiff.runner import StackRun
+    runs = [
+        StackRun("Good", output="Stack Good\n\nResources\n[+] AWS::S3::Bucket B\n"),
+        StackRun("Bad", error="cdk diff timed out after 300s"),
+    ]
+    with patch("cdkdiff.cli.ensure_assembly", return_value="/tmp/cdk.out"), \
+         patch("cdkdiff.cli.run_cdk_diff_parallel", return_value=runs):
+        runner = CliRunner()
+        result = runner.invoke(main, ["--output", "pr-comment", "--jobs", "2", "Good", "Bad"])
+    assert result.exit_code == 1
+    assert "Diff failed" in result.output
+    assert "Bad" in result.output
+
+
+def test_app_option_uses_existing_assembly(tmp_path):
+    (tmp_path / "cdk.out").mkdir()
+    (tmp_path / "cdk.out" / "manifest.json").write_text("{}")
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()) as mock_run, \
+         patch("cdkdiff.cli.ensure_assembly") as mock_ensure:
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["--output", "json", "--context", str(tmp_path), "--app", "cdk.out"]
+        )
+    assert result.exit_code == 0
+    assert mock_run.call_args.kwargs["app"] == str(tmp_path / "cdk.out")
+    mock_ensure.assert_not_called()
+
+
+def test_app_option_rejects_non_assembly(tmp_path):
+    runner = CliRunner()
+    result = runner.invoke(main, ["--context", str(tmp_path), "--app", "missing"])
+    assert result.exit_code != 0
+    assert "not a cloud assembly" in result.output
+
+
+def test_synth_flag_reuses_assembly():
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()) as mock_run, \
+         patch("cdkdiff.cli.ensure_assembly", return_value="/tmp/cdk.out"):
+        runner = CliRunner()
+        result = runner.invoke(main, ["--output", "json", "--synth"])
+    assert result.exit_code == 0
+    assert mock_run.call_args.kwargs["app"] == "/tmp/cdk.out"
+
+
+def test_deployed_option_uses_native_differ(tmp_path):
+    out = tmp_path / "cdk.out"
+    out.mkdir()
+    (out / "manifest.json").write_text(
+        '{"artifacts": {"ApiStack": {"type": "aws:cloudformation:stack",'
+        ' "properties": {"templateFile": "ApiStack.template.json"}}}}'
+    )
+    (out / "ApiStack.template.json").write_text(
+        '{"Resources": {"B": {"Type": "AWS::S3::Bucket"}}}'
+    )
+    deployed = tmp_path / "deployed"
+    deployed.mkdir()
+    with patch("cdkdiff.cli.run_cdk_diff") as mock_run:
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "--output", "json", "--context", str(tmp_path), "--app", "cdk.out",
+            "--deployed", str(deployed), "Api*",
+        ])
+    assert result.exit_code == 0
+    mock_run.assert_not_called()
+    import json
+    data = json.loads(result.stdout)
+    assert data["stacks"][0]["name"] == "ApiStack"
+    assert data["stacks"][0]["changes"][0]["change_type"] == "add"
+
+
+def _single_stack_assembly(tmp_path):
+    out = tmp_path / "cdk.out"
+    out.mkdir()
+    (out / "manifest.json").write_text(
+        '{"artifacts": {"MyStack": {"type": "aws:cloudformation:stack",'
+        ' "properties": {"templateFile": "MyStack.template.json"}}}}'
+    )
+    (out / "MyStack.template.json").write_text('{"Resources": {}}')
+
+
+def test_cache_key_serves_repeat_runs_from_cache(tmp_path, split_runner):
+    _single_stack_assembly(tmp_path)
+    args = ["--output", "json", "--context", str(tmp_path), "--app", "cdk.out",
+            "--cache-key", "deployed-sha"]
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()) as mock_run:
+        first = split_runner.invoke(main, args)
+        second = split_runner.invoke(main, args + ["--cache"])
+    assert first.exit_code == second.exit_code == 0
+    mock_run.assert_called_once()
+    assert "hit(s)" not in first.stderr  # only reported when --cache is explicit
+    assert "1 hit(s)" in second.stderr
+    assert first.stdout == second.stdout
+
+
+def test_cache_keeps_stacks_sharing_a_template_apart(tmp_path):
+    out = tmp_path / "cdk.out"
+    out.mkdir()
+    (out / "manifest.json").write_text(json.dumps({"artifacts": {
+        name: {"type": "aws:cloudformation:stack",
+               "properties": {"templateFile": "App.template.json"}}
+        for name in ("Prod", "Staging")
+    }}))
+    (out / "App.template.json").write_text('{"Resources": {}}')
+    output = ("Stack Prod\n\nResources\n[+] AWS::S3::Bucket NewBucket\n\n"
+              "Stack Staging\n\nResources\n[+] AWS::S3::Bucket NewBucket\n\n")
+    args = ["--output", "json", "--context", str(tmp_path), "--app", "cdk.out",
+            "--cache-key", "deployed-sha"]
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=output) as mock_run:
+        runner = CliRunner()
+        first = runner.invoke(main, args)
+        second = runner.invoke(main, args)
+    mock_run.assert_called_once()
+    for result in (first, second):
+        assert result.exit_code == 0
+        assert [s["name"] for s in json.loads(result.output)["stacks"]] == ["Prod", "Staging"]
+
+
+def test_no_cache_always_runs_cdk(tmp_path):
+    _single_stack_assembly(tmp_path)
+    args = ["--output", "json", "--context", str(tmp_path), "--app", "cdk.out",
+            "--cache-key", "deployed-sha", "--no-cache"]
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()) as mock_run:
+        runner = CliRunner()
+        runner.invoke(main, args)
+        runner.invoke(main, args)
+    assert mock_run.call_count == 2
+
+
+def test_since_only_diffs_changed_stacks(tmp_path):
+    def write(out, body_b):
+        out.mkdir()
+        (out / "manifest.json").write_text(
+            '{"artifacts": {'
+            '"StackA": {"type": "aws:cloudformation:stack",'
+            ' "properties": {"templateFile": "StackA.template.json"}},'
+            '"StackB": {"type": "aws:cloudformation:stack",'
+            ' "properties": {"templateFile": "StackB.template.json"}}}}'
+        )
+        (out / "StackA.template.json").write_text("{}")
+        (out / "StackB.template.json").write_text(body_b)
+
+    write(tmp_path / "baseline", "{}")
+    write(tmp_path / "cdk.out", '{"Resources": {}}')
+    output = "Stack StackB\n\nResources\n[+] AWS::S3::Bucket NewBucket\n"
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=output) as mock_run:
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "--output", "json", "--context", str(tmp_path), "--app", "cdk.out",
+            "--since", str(tmp_path / "baseline"),
+        ])
+    assert result.exit_code == 0
+    assert mock_run.call_args.kwargs["stack_names"] == ["StackB"]
+    assert mock_run.call_args.kwargs["exclusively"] is True
+    stacks = json.loads(result.stdout)["stacks"]
+    assert [(s["name"], s["unchanged"]) for s in stacks] == [("StackA", True), ("StackB", False)]
+
+
+def test_since_with_nothing_changed_skips_cdk(tmp_path):
+    (tmp_path / "cdk.out").mkdir()
+    (tmp_path / "cdk.out" / "manifest.json").write_text(
+        '{"artifacts": {"StackA": {"type": "aws:cloudformation:stack",'
+        ' "properties": {"templateFile": "StackA.template.json"}}}}'
+    )
+    (tmp_path / "cdk.out" / "StackA.template.json").write_text("{}")
+    with patch("cdkdiff.cli.run_cdk_diff") as mock_run:
+        runner = CliRunner()
+        result = runner.invoke(main, [
+            "--output", "pr-comment", "--context", str(tmp_path), "--app", "cdk.out",
+            "--since", str(tmp_path / "cdk.out"),
+        ])
+    assert result.exit_code == 0
+    mock_run.assert_not_called()
+    assert "Unchanged since baseline" in result.output
+
+
+def test_rules_file_applies_custom_rules(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text('[{"id": "no-new-buckets", "resource_type": "AWS::S3::Bucket", '
+                     '"change_type": "add", "risk": "high"}]')
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()):
+        runner = CliRunner()
+        result = runner.invoke(main, ["--output", "json", "--rules", str(rules),
+                                      "--fail-on", "high"])
+    assert result.exit_code == 1
+    import json
+    change = json.loads(result.stdout)["stacks"][0]["changes"][0]
+    assert change["risk"] == "high"
+    assert change["rule"] == "no-new-buckets"
+
+
+def test_invalid_rules_file_is_reported(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text('[{"risk": "catastrophic"}]')
+    runner = CliRunner()
+    result = runner.invoke(main, ["--rules", str(rules)])
+    assert result.exit_code != 0
+    assert "Invalid rules file" in result.output
+
+
+def test_diff_subcommand_is_the_default():
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=_sample_diff_output()) as mock_run:
+        runner = CliRunner()
+        explicit = runner.invoke(main, ["diff", "MyStack", "--output", "json"])
+        implicit = runner.invoke(main, ["MyStack", "--output", "json"])
+    assert explicit.exit_code == implicit.exit_code == 0
+    assert explicit.output == implicit.output
+    assert mock_run.call_args_list[0] == mock_run.call_args_list[1]
+
+
+# Imported only on the code paths that need them
+_DEFERRED_MODULES = {
+    "rich", "requests", "multiprocessing", "cdkdiff.formatters.terminal",
+    "cdkdiff.formatters.github_fmt", "cdkdiff.batch", "cdkdiff.columnar",
+    "cdkdiff.github_client",
+}
+
+
+def _imported_modules(module: str) -> set[str]:
+    """Return the modules loaded by importing `module`, from `python -X importtime`."""
+    import subprocess
+    import sys
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    return {
+        fields[2].strip()
+        for fields in (line.split("|") for line in result.stderr.splitlines())
+        if len(fields) == 3 and fields[1].strip().isdigit()
+    }
+
+
+def test_cli_import_defers_heavy_modules():
+    modules = _imported_modules("cdkdiff.cli")
+    assert "cdkdiff.cli" in modules
+    assert not {m for m in modules
+                if m in _DEFERRED_MODULES or m.split(".")[0] in _DEFERRED_MODULES}
+
+
+def test_output_format_is_validated_lazily():
+    result = CliRunner().invoke(main, ["--output", "yaml"])
+    assert result.exit_code == 2
+    assert "terminal, json, ndjson, pr-comment" in result.output
+
+
+def test_serve_refuses_to_replace_a_regular_file(tmp_path):
+    target = tmp_path / "important.txt"
+    target.write_text("keep")
+    result = CliRunner().invoke(main, ["serve", "--context", str(tmp_path),
+                                       "--socket", str(target)])
+    assert result.exit_code == 2
+    assert "not a socket" in result.output
+    assert target.read_text() == "keep"
+
+
+def test_cache_flag_needs_a_deployed_state():
+    result = CliRunner().invoke(main, ["--cache"])
+    assert result.exit_code == 2
+    assert "--cache-key" in result.output
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from cdkdiff.columnar import ColumnarSummary
+from cdkdiff.formatters.github_fmt import format_github
+from cdkdiff.formatters.json_fmt import format_json
+from cdkdiff.models import Change, ChangeType, RiskLevel, StackDiff
+from cdkdiff.parser import parse, parse_columnar
+from cdkdiff.scorer import score_summary
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_columnar_matches_object_summary():
+    for name in ("mixed_changes.txt", "multi_stack.txt", "property_changes.txt"):
+        text = (FIXTURES / name).read_text()
+        summary = score_summary(parse(text))
+        columnar = score_summary(parse_columnar(text))
+        assert isinstance(columnar, ColumnarSummary)
+        assert columnar.to_summary() == summary
+        assert columnar.total_changes == summary.total_changes
+        assert columnar.highest_risk == summary.highest_risk
+        assert [s.risk for s in columnar.stacks] == [s.risk for s in summary.stacks]
+        assert format_json(columnar) == format_json(summary)
+        assert format_github(columnar) == format_github(summary)
+
+
+def test_change_view_writes_through_to_columns():
+    columnar = ColumnarSummary([
+        StackDiff("A", changes=[Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.LOW)]),
+        StackDiff("Empty", error="boom"),
+    ])
+    stack, empty = columnar.stacks
+    stack.changes[0].risk = RiskLevel.HIGH
+    stack.changes[-1].rule = "custom"
+    assert stack.changes[0].risk == RiskLevel.HIGH
+    assert stack.changes[0] == Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.HIGH,
+                                      rule="custom")
+    assert stack.risk == RiskLevel.HIGH
+    assert empty.risk is None and empty.error == "boom" and len(empty.changes) == 0
+
+
+def test_columnar_shares_low_cardinality_strings():
+    stacks = [
+        StackDiff(f"S{i}", changes=[
+            Change("AWS::Lambda::Function", f"Fn{j}", ChangeType.UPDATE, RiskLevel.LOW)
+            for j in range(50)
+        ])
+        for i in range(4)
+    ]
+    columnar = ColumnarSummary(stacks)
+    assert columnar.total_changes == 200
+    assert columnar._cols.strings == ["AWS::Lambda::Function", ""]
+
+
+def test_columnar_counters_match_object_summary():
+    text = (FIXTURES / "mixed_changes.txt").read_text()
+    summary = score_summary(parse(text))
+    columnar = score_summary(parse_columnar(text))
+    assert columnar.risk_counts == summary.risk_counts
+    assert columnar.change_type_counts == summary.change_type_counts
+    assert columnar.stacks[0].risk_counts == summary.stacks[0].risk_counts
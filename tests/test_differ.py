@@ -0,0 +1,111 @@
+import json
+from pathlib import Path
+
+from cdkdiff.assembly import assembly_stacks
+from cdkdiff.differ import diff_assembly, diff_templates
+from cdkdiff.models import ChangeType
+
+
+def _template(**resources) -> dict:
+    return {"Resources": resources}
+
+
+def _write_assembly(root: Path, templates: dict[str, dict]) -> Path:
+    out = root / "cdk.out"
+    out.mkdir()
+    artifacts = {}
+    for name, template in templates.items():
+        (out / f"{name}.template.json").write_text(json.dumps(template))
+        artifacts[name] = {
+            "type": "aws:cloudformation:stack",
+            "properties": {"templateFile": f"{name}.template.json"},
+        }
+    (out / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+    return out
+
+
+def test_diff_templates_add_remove_update():
+    deployed = _template(
+        Table={"Type": "AWS::DynamoDB::Table", "Properties": {"BillingMode": "PROVISIONED"}},
+        Fn={"Type": "AWS::Lambda::Function", "Properties": {"MemorySize": 128}},
+    )
+    current = _template(
+        Fn={"Type": "AWS::Lambda::Function", "Properties": {"MemorySize": 256}},
+        Bucket={"Type": "AWS::S3::Bucket"},
+    )
+    stack = diff_templates("MyStack", current, deployed)
+    by_id = {c.logical_id: c for c in stack.changes}
+    assert by_id["Bucket"].change_type == ChangeType.ADD
+    assert by_id["Table"].change_type == ChangeType.REMOVE
+    assert by_id["Fn"].change_type == ChangeType.UPDATE
+    assert by_id["Fn"].details == "MemorySize"
+    assert by_id["Fn"].requires_replacement is False
+    [memory] = by_id["Fn"].properties
+    assert (memory.path, memory.old, memory.new) == ("MemorySize", "128", "256")
+
+
+def test_diff_templates_ignores_metadata_only_changes():
+    deployed = _template(B={"Type": "AWS::S3::Bucket", "Metadata": {"aws:cdk:path": "a"}})
+    current = _template(B={"Type": "AWS::S3::Bucket", "Metadata": {"aws:cdk:path": "b"}})
+    assert diff_templates("S", current, deployed).changes == []
+
+
+def test_diff_templates_flags_replacement_properties():
+    deployed = _template(B={"Type": "AWS::S3::Bucket", "Properties": {"BucketName": "old"}})
+    current = _template(B={"Type": "AWS::S3::Bucket", "Properties": {"BucketName": "new"}})
+    change = diff_templates("S", current, deployed).changes[0]
+    assert change.requires_replacement is True
+    assert change.properties[0].requires_replacement is True
+
+
+def test_diff_templates_type_change_is_replacement():
+    deployed = _template(R={"Type": "AWS::SQS::Queue"})
+    current = _template(R={"Type": "AWS::SNS::Topic"})
+    change = diff_templates("S", current, deployed).changes[0]
+    assert change.change_type == ChangeType.UPDATE
+    assert change.requires_replacement is True
+
+
+def test_diff_templates_new_stack_is_all_adds():
+    current = _template(A={"Type": "AWS::S3::Bucket"}, B={"Type": "AWS::SQS::Queue"})
+    stack = diff_templates("S", current, None)
+    assert [c.change_type for c in stack.changes] == [ChangeType.ADD, ChangeType.ADD]
+
+
+def test_assembly_stacks_follows_nested_assemblies(tmp_path):
+    out = _write_assembly(tmp_path, {"Top": _template()})
+    nested = out / "assembly-Prod"
+    nested.mkdir()
+    (nested / "ProdApi.template.json").write_text("{}")
+    (nested / "manifest.json").write_text(json.dumps({"artifacts": {"ProdApi": {
+        "type": "aws:cloudformation:stack",
+        "properties": {"templateFile": "ProdApi.template.json"},
+    }}}))
+    manifest = json.loads((out / "manifest.json").read_text())
+    manifest["artifacts"]["assembly-Prod"] = {
+        "type": "cdk:cloud-assembly",
+        "properties": {"directoryName": "assembly-Prod"},
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest))
+    assert set(assembly_stacks(str(out))) == {"Top", "ProdApi"}
+
+
+def test_diff_assembly_against_snapshots(tmp_path):
+    out = _write_assembly(tmp_path, {
+        "StackA": _template(B={"Type": "AWS::S3::Bucket"}),
+        "StackB": _template(),
+    })
+    deployed = tmp_path / "deployed"
+    deployed.mkdir()
+    (deployed / "StackB.json").write_text(json.dumps(_template(T={"Type": "AWS::SNS::Topic"})))
+
+    summary = diff_assembly(str(out), str(deployed))
+    assert [s.name for s in summary.stacks] == ["StackA", "StackB"]
+    assert summary.stacks[0].changes[0].change_type == ChangeType.ADD
+    assert summary.stacks[1].changes[0].change_type == ChangeType.REMOVE
+
+
+def test_diff_assembly_unknown_stack_reports_error(tmp_path):
+    out = _write_assembly(tmp_path, {"StackA": _template()})
+    summary = diff_assembly(str(out), str(tmp_path), ["Missing"])
+    assert summary.stacks[0].error
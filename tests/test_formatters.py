@@ -1,6 +1,12 @@
+import io
 import json
-from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
-from cdkdiff.formatters.json_fmt import format_json
+import pytest
+from cdkdiff.models import (
+    Change, ChangeType, DiffSummary, PropertyChange, RiskLevel, StackDiff,
+)
+from cdkdiff.formatters.json_fmt import format_json, stack_from_dict, stack_to_dict, write_json
+from cdkdiff.formatters.compact import print_compact, print_compact_stream, stack_lines
+from cdkdiff.formatters.ndjson_fmt import format_ndjson, stream_ndjson
 from cdkdiff.formatters.github_fmt import format_github
 
 
@@ -51,6 +57,17 @@ def test_json_change_fields():
     assert "details" in change
 
 
+def test_json_round_trips_property_changes():
+    stack = StackDiff("S", changes=[
+        Change("AWS::Lambda::Function", "Fn", ChangeType.UPDATE, RiskLevel.LOW, properties=[
+            PropertyChange("MemorySize", ChangeType.UPDATE, old="128", new="256"),
+        ]),
+    ])
+    data = stack_to_dict(stack)
+    assert data["changes"][0]["properties"][0]["path"] == "MemorySize"
+    assert stack_from_dict(data) == stack
+
+
 def test_json_no_changes_stack():
     summary = DiffSummary(stacks=[StackDiff("EmptyStack")])
     output = json.loads(format_json(summary))
@@ -60,6 +77,95 @@ def test_json_no_changes_stack():
 
 # --- GitHub markdown formatter ---
 
+def test_json_is_streamed_in_the_same_layout():
+    for summary in (_sample_summary(), DiffSummary()):
+        expected = json.dumps({
+            "summary": json.loads(format_json(summary))["summary"],
+            "stacks": [stack_to_dict(s) for s in summary.stacks],
+        }, indent=2)
+        assert format_json(summary) == expected
+        out = io.StringIO()
+        write_json(summary, out)
+        assert out.getvalue() == expected + "\n"
+
+
+# --- NDJSON formatter ---
+
+def test_ndjson_has_one_record_per_change():
+    records = [json.loads(line) for line in format_ndjson(_sample_summary()).splitlines()]
+    assert [(r["stack"], r["logical_id"], r["risk"]) for r in records] == [
+        ("MyStack", "UsersTable", "high"),
+        ("MyStack", "NewBucket", "low"),
+        ("OtherStack", "Fn", "low"),
+    ]
+
+
+def test_ndjson_reports_stack_errors():
+    summary = DiffSummary(stacks=[StackDiff("Bad", changes=[], error="boom")])
+    assert json.loads(format_ndjson(summary)) == {"stack": "Bad", "error": "boom"}
+
+
+def test_ndjson_stream_writes_each_stack_as_it_arrives():
+    out = io.StringIO()
+
+    def stacks():
+        written = 0
+        for stack in _sample_summary().stacks:
+            yield stack
+            written += len(stack.changes)
+            assert out.getvalue().count("\n") == written  # flushed before the next stack
+
+    summary = stream_ndjson(stacks(), out)
+    assert summary.total_changes == 3
+    assert out.getvalue() == format_ndjson(_sample_summary())
+
+
+# --- Compact terminal formatter ---
+
+def _busy_stack(low: int, high: int) -> StackDiff:
+    return StackDiff("Busy", changes=[
+        *(Change("AWS::S3::Bucket", f"B{i}", ChangeType.ADD, RiskLevel.LOW) for i in range(low)),
+        *(Change("AWS::IAM::Role", f"R{i}", ChangeType.REMOVE, RiskLevel.HIGH)
+          for i in range(high)),
+    ])
+
+
+def test_compact_rows_are_aligned_and_plain():
+    lines = list(stack_lines(_sample_summary().stacks[0]))
+    assert lines[0] == "HIGH   MyStack  (2 changes)"
+    assert lines[1:] == [
+        "  - HIGH   AWS::DynamoDB::Table  UsersTable",
+        "  + LOW    AWS::S3::Bucket       NewBucket",
+    ]
+
+
+def test_compact_collapses_low_rows_above_threshold():
+    lines = list(stack_lines(_busy_stack(low=5, high=2), low_threshold=4))
+    assert [line for line in lines if "AWS::S3::Bucket" in line] == []
+    assert lines[-1] == "  5 low-risk changes collapsed (5 add)"
+    below = list(stack_lines(_busy_stack(low=4, high=2), low_threshold=4))
+    assert "  + LOW    AWS::S3::Bucket  B3" in below
+
+
+def test_compact_truncates_long_listings():
+    lines = list(stack_lines(_busy_stack(low=0, high=10), max_rows=3))
+    assert len(lines) == 1 + 3 + 1
+    assert lines[-1] == "  ... 7 more changes not shown"
+
+
+def test_compact_summary_and_stream_agree():
+    out = io.StringIO()
+    print_compact(_sample_summary(), out)
+    assert out.getvalue().startswith("CDK Diff | Stacks: 2 | Changes: 3 | Risk: HIGH\n")
+    assert "\x1b[" not in out.getvalue()  # no color codes when not writing to a terminal
+    streamed = io.StringIO()
+    summary = print_compact_stream(_sample_summary().stacks, streamed)
+    assert summary.total_changes == 3
+    assert set(streamed.getvalue().splitlines()) == set(out.getvalue().splitlines())
+
+
+# --- GitHub formatter ---
+
 def test_github_contains_header():
     output = format_github(_sample_summary())
     assert "CDK Diff" in output
@@ -85,3 +191,49 @@ def test_github_lists_stacks():
     output = format_github(_sample_summary())
     assert "MyStack" in output
     assert "OtherStack" in output
+
+
+def test_json_stack_error():
+    summary = DiffSummary(stacks=[StackDiff("BrokenStack", error="cdk diff timed out")])
+    output = json.loads(format_json(summary))
+    assert output["stacks"][0]["error"] == "cdk diff timed out"
+    assert json.loads(format_json(_sample_summary()))["stacks"][0]["error"] is None
+
+
+def test_github_shows_stack_error():
+    summary = DiffSummary(stacks=[
+        StackDiff("BrokenStack", error="cdk diff failed (exit 2):\nboom"),
+    ])
+    output = format_github(summary)
+    assert "Diff failed" in output
+    assert "exit 2" in output
+
+
+def test_split_comment_marks_parts_with_content_hash():
+    from cdkdiff.formatters.github_fmt import comment_marker, split_comment
+    body = format_github(_sample_summary())
+    [part] = split_comment(body)
+    assert comment_marker(part).startswith("<!-- cdkdiff-comment sha256=")
+    assert comment_marker(part).endswith(" part=1/1 -->")
+    assert split_comment(body) == [part]
+    assert split_comment(body.replace("MyStack", "Renamed")) != [part]
+    assert comment_marker("unrelated comment") is None
+
+
+def test_formatter_registry_resolves_builtins_and_plugins(monkeypatch):
+    import cdkdiff.formatters as registry
+
+    class _EntryPoint:
+        name = "upper"
+
+        def load(self):
+            return lambda summary: "PLUGIN"
+
+    assert registry.get_formatter("json") is format_json
+    monkeypatch.setattr(registry, "_entry_points", lambda: {"upper": _EntryPoint()})
+    assert registry.formatter_names() == [
+        "terminal", "json", "ndjson", "pr-comment", "upper",
+    ]
+    assert registry.get_formatter("upper")(_sample_summary()) == "PLUGIN"
+    with pytest.raises(KeyError):
+        registry.get_formatter("missing")
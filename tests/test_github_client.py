@@ -1,61 +1,206 @@
-from unittest.mock import patch, MagicMock
-from cdkdiff.github_client import post_pr_comment, find_existing_comment
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
+import pytest
 
-def _mock_response(json_data, status_code=200):
-    mock = MagicMock()
-    mock.json.return_value = json_data
-    mock.status_code = status_code
-    mock.raise_for_status = MagicMock()
-    return mock
+from cdkdiff.formatters.github_fmt import split_comment
+from cdkdiff.github_client import GitHubClient, find_existing_comment, post_pr_comment
 
 
-def test_post_pr_comment_creates_new():
-    with patch("requests.get") as mock_get, patch("requests.post") as mock_post:
-        mock_get.return_value = _mock_response([])  # no existing comments
-        mock_post.return_value = _mock_response({"id": 123}, status_code=201)
+class _FakeGitHub(ThreadingHTTPServer):
+    """A local stand-in for the parts of the GitHub API that cdkdiff uses."""
 
-        post_pr_comment(
-            token="fake-token",
-            repo="owner/repo",
-            pr_number=42,
-            body="## CDK Diff\n<!-- cdkdiff-comment -->",
-        )
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.comments: dict[int, str] = {}  # comment id -> body, all on PR 42
+        self.log: list[tuple[str, str, int]] = []  # (method, path, status)
+        self.throttle = 0  # answer this many upcoming requests with 429
+        self.next_id = 1000
+        self.client_ports: set[int] = set()
 
-    mock_post.assert_called_once()
-    call_args = mock_post.call_args
-    assert "issues/42/comments" in call_args[0][0]
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
 
+    def add_comment(self, body: str) -> int:
+        self.next_id += 1
+        self.comments[self.next_id] = body
+        return self.next_id
 
-def test_post_pr_comment_updates_existing():
-    existing = [{"id": 99, "body": "<!-- cdkdiff-comment -->\nold content"}]
-    with patch("requests.get") as mock_get, patch("requests.patch") as mock_patch:
-        mock_get.return_value = _mock_response(existing)
-        mock_patch.return_value = _mock_response({"id": 99})
 
-        post_pr_comment(
-            token="fake-token",
-            repo="owner/repo",
-            pr_number=42,
-            body="<!-- cdkdiff-comment -->\nnew content",
-        )
+class _Handler(BaseHTTPRequestHandler):
+    server: _FakeGitHub
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
 
-    mock_patch.assert_called_once()
-    call_args = mock_patch.call_args
-    assert "comments/99" in call_args[0][0]
+    def log_message(self, *args) -> None:
+        pass
 
+    def _send(self, status: int, payload=None) -> None:
+        data = json.dumps(payload).encode() if payload is not None else b""
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, data = 304, b""
+        self.server.log.append((self.command, urlparse(self.path).path, status))
+        self.server.client_ports.add(self.client_address[1])
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
 
-def test_find_existing_comment_returns_id():
-    comments = [
-        {"id": 1, "body": "some other comment"},
-        {"id": 2, "body": "<!-- cdkdiff-comment -->\ncontent"},
+    def _throttled(self) -> bool:
+        if self.server.throttle <= 0:
+            return False
+        self.server.throttle -= 1
+        self.server.log.append((self.command, urlparse(self.path).path, 429))
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def _body(self) -> str:
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))["body"]
+
+    def do_GET(self) -> None:
+        if self._throttled():
+            return
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        comments = self.server.comments
+        if parts[-1] == "comments":  # /repos/o/r/issues/42/comments
+            query = parse_qs(url.query)
+            per_page, page = int(query["per_page"][0]), int(query["page"][0])
+            ids = sorted(comments)[(page - 1) * per_page:page * per_page]
+            self._send(200, [{"id": i, "body": comments[i]} for i in ids])
+        elif int(parts[-1]) in comments:  # /repos/o/r/issues/comments/ID
+            self._send(200, {"id": int(parts[-1]), "body": comments[int(parts[-1])]})
+        else:
+            self._send(404, {"message": "Not Found"})
+
+    def do_POST(self) -> None:
+        if not self._throttled():
+            comment_id = self.server.add_comment(self._body())
+            self._send(201, {"id": comment_id, "body": self.server.comments[comment_id]})
+
+    def do_PATCH(self) -> None:
+        if not self._throttled():
+            comment_id = int(self.path.rsplit("/", 1)[1])
+            self.server.comments[comment_id] = self._body()
+            self._send(200, {"id": comment_id, "body": self.server.comments[comment_id]})
+
+    def do_DELETE(self) -> None:
+        if not self._throttled():
+            comment_id = int(self.path.rsplit("/", 1)[1])
+            self._send(204 if self.server.comments.pop(comment_id, None) else 404)
+
+
+@pytest.fixture
+def github(monkeypatch):
+    server = _FakeGitHub()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_pr_comment_creates_new(github):
+    github.add_comment("some other comment")
+    post_pr_comment("fake-token", "owner/repo", 42, "## CDK Diff\n<!-- cdkdiff-comment -->")
+    assert len(github.comments) == 2
+    assert github.log[-1] == ("POST", "/repos/owner/repo/issues/42/comments", 201)
+
+
+def test_post_pr_comment_updates_existing(github):
+    existing = github.add_comment("<!-- cdkdiff-comment -->\nold content")
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nnew content")
+    assert github.comments == {existing: split_comment("<!-- cdkdiff-comment -->\nnew content")[0]}
+    assert github.log[-1] == ("PATCH", f"/repos/owner/repo/issues/comments/{existing}", 200)
+
+
+def test_find_existing_comment_returns_id(github):
+    github.add_comment("some other comment")
+    ours = github.add_comment("<!-- cdkdiff-comment -->\ncontent")
+    assert find_existing_comment("fake-token", "owner/repo", 42) == ours
+
+
+def test_find_existing_comment_returns_none(github):
+    assert find_existing_comment("fake-token", "owner/repo", 42) is None
+
+
+def test_find_existing_comment_paginates(github):
+    for i in range(150):
+        github.add_comment(f"comment {i}")
+    ours = github.add_comment("<!-- cdkdiff-comment -->")
+    assert find_existing_comment("fake-token", "owner/repo", 42) == ours
+    assert [status for _, _, status in github.log] == [200, 200]
+    assert len(github.client_ports) == 1  # both pages over one pooled connection
+
+
+def test_unchanged_pages_are_revalidated_with_etags(github):
+    for i in range(150):
+        github.add_comment(f"comment {i}")
+    assert find_existing_comment("fake-token", "owner/repo", 42) is None
+    github.log.clear()
+    assert find_existing_comment("fake-token", "owner/repo", 42) is None
+    assert [status for _, _, status in github.log] == [304, 304]
+
+
+def test_remembered_comment_id_skips_the_scan(github):
+    for i in range(250):
+        github.add_comment(f"comment {i}")
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nv1")
+    github.log.clear()
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nv2")
+    ours = max(github.comments)
+    assert github.log == [
+        ("GET", f"/repos/owner/repo/issues/comments/{ours}", 304),
+        ("PATCH", f"/repos/owner/repo/issues/comments/{ours}", 200),
     ]
-    with patch("requests.get", return_value=_mock_response(comments)):
-        result = find_existing_comment("fake-token", "owner/repo", 42)
-    assert result == 2
 
 
-def test_find_existing_comment_returns_none():
-    with patch("requests.get", return_value=_mock_response([])):
-        result = find_existing_comment("fake-token", "owner/repo", 42)
-    assert result is None
+def test_deleted_comment_falls_back_to_scan(github):
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nv1")
+    github.comments.clear()
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nv2")
+    assert list(github.comments.values()) == split_comment("<!-- cdkdiff-comment -->\nv2")
+
+
+def test_rate_limited_requests_are_retried(github):
+    github.throttle = 2
+    with GitHubClient("fake-token") as client:
+        assert client.find_existing_comment("owner/repo", 42) is None
+    assert [status for _, _, status in github.log] == [429, 429, 200]
+
+
+def test_unchanged_body_is_not_rewritten(github):
+    body = "<!-- cdkdiff-comment -->\n## CDK Diff Summary"
+    assert post_pr_comment("fake-token", "owner/repo", 42, body) is True
+    github.log.clear()
+    assert post_pr_comment("fake-token", "owner/repo", 42, body) is False
+    assert [method for method, _, _ in github.log] == ["GET"]
+
+
+def test_legacy_comment_is_updated_in_place(github):
+    legacy = github.add_comment("<!-- cdkdiff-comment -->\nold content")
+    assert post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nnew")
+    assert list(github.comments) == [legacy]
+    assert "sha256=" in github.comments[legacy]
+
+
+def test_large_body_is_split_and_surplus_parts_deleted(github):
+    rows = "\n".join(f"| `AWS::S3::Bucket` | `Bucket{i}` | `+` | LOW |" for i in range(4000))
+    big = f"<!-- cdkdiff-comment -->\n<details>\n<summary>S</summary>\n\n{rows}\n</details>"
+    post_pr_comment("fake-token", "owner/repo", 42, big)
+    parts = list(github.comments.values())
+    assert len(parts) == len(split_comment(big)) > 1
+    assert all(len(p) <= 65536 for p in parts)
+    assert "part=1/" in parts[0] and rows.endswith(parts[-1].split("\n")[-2])
+
+    post_pr_comment("fake-token", "owner/repo", 42, "<!-- cdkdiff-comment -->\nsmall")
+    assert list(github.comments.values()) == split_comment("<!-- cdkdiff-comment -->\nsmall")
@@ -0,0 +1,99 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from cdkdiff.cli import main
+from cdkdiff.history import HistoryStore, parse_since
+from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
+
+_DAY = 86400
+
+
+def _summary(*changes: tuple[str, Change]) -> DiffSummary:
+    stacks: dict[str, StackDiff] = {}
+    for stack, change in changes:
+        stacks.setdefault(stack, StackDiff(stack, changes=[])).changes.append(change)
+    return DiffSummary(stacks=list(stacks.values()))
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / "history.sqlite")) as store:
+        now = time.time()
+        store.record(_summary(
+            ("Db", Change("AWS::RDS::DBInstance", "Main", ChangeType.UPDATE, RiskLevel.HIGH,
+                          requires_replacement=True)),
+        ), commit="aaaa1111", recorded_at=now - 120 * _DAY)
+        store.record(_summary(
+            ("Db", Change("AWS::RDS::DBInstance", "Main", ChangeType.UPDATE, RiskLevel.HIGH,
+                          requires_replacement=True, rule="rds-replace")),
+            ("Web", Change("AWS::S3::Bucket", "Assets", ChangeType.ADD, RiskLevel.LOW)),
+            ("Web", Change("AWS::IAM::Role", "Exec", ChangeType.UPDATE, RiskLevel.MEDIUM)),
+        ), commit="bbbb2222", recorded_at=now - 10 * _DAY)
+        yield store
+
+
+def test_query_filters(store):
+    assert len(store.query()) == 4
+    recent = store.query(since=time.time() - 90 * _DAY, min_risk=RiskLevel.HIGH, replacement=True)
+    assert [(e.stack, e.logical_id, e.commit, e.rule) for e in recent] == [
+        ("Db", "Main", "bbbb2222", "rds-replace"),
+    ]
+    assert [e.logical_id for e in store.query(resource_type="AWS::IAM::*")] == ["Exec"]
+    assert [e.logical_id for e in store.query(stack="W*", change_type=ChangeType.ADD)] == [
+        "Assets",
+    ]
+    assert [e.commit for e in store.query(commit="aaaa")] == ["aaaa1111"]
+    assert len(store.query(min_risk=RiskLevel.MEDIUM)) == 3
+
+
+def test_query_returns_newest_first_and_limits(store):
+    entries = store.query(logical_id="Main")
+    assert [e.commit for e in entries] == ["bbbb2222", "aaaa1111"]
+    assert entries[0].risk is RiskLevel.HIGH and entries[0].requires_replacement is True
+    assert len(store.query(limit=1)) == 1
+
+
+def test_large_run_is_one_transaction(tmp_path):
+    summary = DiffSummary(stacks=[StackDiff(f"S{s}", changes=[
+        Change("AWS::S3::Bucket", f"B{i}", ChangeType.ADD, RiskLevel.LOW) for i in range(2_000)
+    ]) for s in range(5)])
+    with HistoryStore(str(tmp_path / "history.sqlite")) as store:
+        statements: list[str] = []
+        store.conn.set_trace_callback(statements.append)
+        store.record(summary)
+        assert sum(s.startswith("BEGIN") for s in statements) == 1
+        assert sum(s == "COMMIT" for s in statements) == 1
+        assert store.conn.execute("SELECT COUNT(*) FROM changes").fetchone() == (10_000,)
+
+
+def test_parse_since():
+    assert parse_since("90d", now=100 * _DAY) == 10 * _DAY
+    assert parse_since("2w", now=14 * _DAY) == 0
+    assert parse_since("2026-01-01") > parse_since("2025-12-31")
+    with pytest.raises(ValueError):
+        parse_since("soon")
+
+
+def test_diff_records_history_and_history_queries_it(tmp_path):
+    db = str(tmp_path / "history.sqlite")
+    output = "Stack MyStack\n\nResources\n[-] AWS::DynamoDB::Table T destroy\n\n"
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=output):
+        result = CliRunner().invoke(main, [
+            "--output", "json", "--history", db, "--commit", "abc123",
+        ])
+    assert result.exit_code == 0
+
+    result = CliRunner().invoke(main, ["history", "--db", db, "--since", "1d", "--risk", "high"])
+    assert result.exit_code == 0
+    assert "abc123" in result.output and "AWS::DynamoDB::Table" in result.output
+
+    result = CliRunner().invoke(main, ["history", "--db", db, "--json", "--risk", "high"])
+    record = json.loads(result.output)
+    assert (record["stack"], record["logical_id"], record["risk"]) == ("MyStack", "T", "high")
+
+    result = CliRunner().invoke(main, ["history", "--db", db, "--since", "whenever"])
+    assert result.exit_code == 2
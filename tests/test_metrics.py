@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from cdkdiff.cli import main
+from cdkdiff.metrics import render_metrics, write_metrics
+from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
+from cdkdiff.profiling import Span, current
+
+
+def _summary() -> DiffSummary:
+    return DiffSummary(stacks=[
+        StackDiff("A", changes=[
+            Change("AWS::IAM::Role", "R", ChangeType.UPDATE, RiskLevel.HIGH),
+            Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.LOW),
+        ]),
+        StackDiff("B", changes=[]),
+        StackDiff("C", changes=[], error="boom"),
+    ])
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {
+        name: float(value)
+        for line in text.splitlines() if not line.startswith("#")
+        for name, value in [line.rsplit(" ", 1)]
+    }
+
+
+def test_histograms_from_spans():
+    spans = [
+        Span("cdk diff", "subprocess", 0.0, 3.0, 1, {"stacks": "A"}),
+        Span("cdk diff", "subprocess", 0.0, 45.0, 2, {"stacks": "B"}),
+        Span("parse", "cdkdiff", 0.0, 0.02, 1),
+        Span("render", "cdkdiff", 0.0, 1.0, 1),
+    ]
+    samples = _samples(render_metrics(_summary(), spans))
+    assert samples['cdkdiff_cdk_diff_duration_seconds_bucket{le="5.0"}'] == 1
+    assert samples['cdkdiff_cdk_diff_duration_seconds_bucket{le="60.0"}'] == 2
+    assert samples['cdkdiff_cdk_diff_duration_seconds_bucket{le="+Inf"}'] == 2
+    assert samples["cdkdiff_cdk_diff_duration_seconds_sum"] == 48.0
+    assert samples["cdkdiff_parse_duration_seconds_count"] == 1
+    assert current() is None  # tracing stops with the command
+
+
+def test_streamed_diff_is_exported_end_to_end():
+    spans = [Span("cdk diff (streamed)", "subprocess", 0.0, 30.0, 1)]
+    samples = _samples(render_metrics(_summary(), spans))
+    assert samples["cdkdiff_cdk_diff_duration_seconds_count"] == 0
+    assert samples["cdkdiff_streamed_diff_duration_seconds_count"] == 1
+    assert samples["cdkdiff_streamed_diff_duration_seconds_sum"] == 30.0
+
+
+def test_change_counts_and_stack_outcomes():
+    text = render_metrics(_summary())
+    samples = _samples(text)
+    assert samples['cdkdiff_changes_by_risk{risk="high"}'] == 1
+    assert samples['cdkdiff_changes_by_risk{risk="medium"}'] == 0
+    assert samples['cdkdiff_changes_by_type{change_type="add"}'] == 1
+    assert samples['cdkdiff_stack_changes_bucket{risk="high",le="0.0"}'] == 2
+    assert samples['cdkdiff_stack_changes_count{risk="high"}'] == 3
+    assert samples['cdkdiff_stacks{outcome="failed"}'] == 1
+    assert samples['cdkdiff_stacks{outcome="no_changes"}'] == 1
+    assert "cdkdiff_cache_lookups" not in text
+    assert text.endswith("# EOF\n")
+    assert "# TYPE cdkdiff_stack_changes histogram" in text
+
+
+def test_cache_lookups_and_atomic_write(tmp_path):
+    path = tmp_path / "cdkdiff.prom"
+    path.write_text("stale")
+    write_metrics(str(path), render_metrics(DiffSummary(), cache_hits=3, cache_misses=1))
+    samples = _samples(path.read_text())
+    assert samples['cdkdiff_cache_lookups{result="hit"}'] == 3
+    assert samples['cdkdiff_cache_lookups{result="miss"}'] == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["cdkdiff.prom"]
+
+
+def test_cli_writes_metrics_file(tmp_path):
+    output = "Stack MyStack\n\nResources\n[+] AWS::S3::Bucket NewBucket\n\n"
+    path = tmp_path / "cdkdiff.prom"
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=output):
+        result = CliRunner().invoke(main, ["--output", "json", "--metrics-file", str(path)])
+    assert result.exit_code == 0
+    samples = _samples(path.read_text())
+    assert samples['cdkdiff_changes_by_risk{risk="low"}'] == 1
+    assert samples["cdkdiff_parse_duration_seconds_count"] == 1
+    assert current() is None  # tracing stops with the command
+
+
+def test_cli_streamed_diff_records_parse_per_stack(tmp_path):
+    output = ("Stack A\n\nResources\n[+] AWS::S3::Bucket B\n\n"
+              "Stack B\n\nResources\n[-] AWS::SNS::Topic T\n\n")
+    path = tmp_path / "cdkdiff.prom"
+    with patch("cdkdiff.cli.stream_cdk_diff", return_value=iter(output.splitlines(True))):
+        result = CliRunner().invoke(main, ["--output", "ndjson", "--metrics-file", str(path)])
+    assert result.exit_code == 0
+    samples = _samples(path.read_text())
+    assert samples["cdkdiff_parse_duration_seconds_count"] == 2
+    assert samples["cdkdiff_cdk_diff_duration_seconds_count"] == 0
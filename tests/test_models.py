@@ -1,4 +1,6 @@
-from cdkdiff.models import RiskLevel, ChangeType, Change, StackDiff, DiffSummary
+from cdkdiff.models import (
+    RiskLevel, ChangeType, Change, StackDiff, DiffSummary, in_request_order,
+)
 
 
 def test_risk_level_ordering():
@@ -42,3 +44,89 @@ def test_diff_summary_totals():
     assert summary.total_changes == 3
     assert summary.highest_risk == RiskLevel.HIGH
     assert len(summary.stacks) == 2
+
+
+def test_change_interns_resource_type():
+    service = "AWS::S3::"  # built at runtime, so the two strings start out distinct
+    a = Change(service + "Bucket", "A", ChangeType.ADD, RiskLevel.LOW)
+    b = Change(service + "Bucket", "B", ChangeType.ADD, RiskLevel.LOW)
+    assert a.resource_type is b.resource_type
+
+
+def test_risk_level_ranks():
+    assert [r.rank for r in (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH)] == [0, 1, 2]
+    assert max([RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.LOW]) == RiskLevel.HIGH
+
+
+def test_stack_counters_follow_list_mutations():
+    sd = StackDiff("S", changes=[Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.LOW)])
+    table = Change("AWS::DynamoDB::Table", "T", ChangeType.REMOVE, RiskLevel.HIGH)
+    sd.changes.append(table)
+    assert sd.risk == RiskLevel.HIGH
+    assert sd.risk_counts == {RiskLevel.LOW: 1, RiskLevel.MEDIUM: 0, RiskLevel.HIGH: 1}
+    assert sd.change_type_counts[ChangeType.REMOVE] == 1
+
+    sd.changes[1] = Change("AWS::SNS::Topic", "N", ChangeType.UPDATE, RiskLevel.MEDIUM)
+    assert sd.risk == RiskLevel.MEDIUM
+    del sd.changes[1:]
+    sd.changes.extend([table])
+    sd.changes.pop()
+    assert sd.risk_counts == {RiskLevel.LOW: 1, RiskLevel.MEDIUM: 0, RiskLevel.HIGH: 0}
+    assert sd.change_type_counts == {ChangeType.ADD: 1, ChangeType.REMOVE: 0,
+                                     ChangeType.UPDATE: 0}
+
+
+def test_stack_rescore_updates_counters():
+    change = Change("AWS::S3::Bucket", "B", ChangeType.UPDATE, RiskLevel.LOW)
+    sd = StackDiff("S", changes=[change])
+    sd.rescore(change, RiskLevel.HIGH)
+    assert change.risk == RiskLevel.HIGH
+    assert sd.risk == RiskLevel.HIGH
+    assert sd.risk_counts[RiskLevel.LOW] == 0
+
+
+def test_reassigned_changes_keep_counters():
+    sd = StackDiff("S")
+    sd.changes = [Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.MEDIUM)]
+    assert sd.risk == RiskLevel.MEDIUM
+    assert sd.risk_counts[RiskLevel.MEDIUM] == 1
+
+
+def test_counters_are_stable_under_concurrent_reads():
+    from concurrent.futures import ThreadPoolExecutor
+    sd = StackDiff("S", changes=[
+        Change("AWS::S3::Bucket", f"B{i}", ChangeType.ADD, RiskLevel.LOW) for i in range(20_000)
+    ])
+    with ThreadPoolExecutor(4) as pool:
+        counts = list(pool.map(lambda _: sd.risk_counts[RiskLevel.LOW], range(8)))
+    assert counts == [20_000] * 8
+    assert sd.risk_counts[RiskLevel.LOW] == 20_000
+
+
+def test_stack_diff_pickles_with_counters():
+    import pickle
+    sd = StackDiff("S", changes=[Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.HIGH)])
+    restored = pickle.loads(pickle.dumps(sd))
+    assert restored == sd
+    assert restored.risk == RiskLevel.HIGH
+
+
+def test_diff_summary_counters():
+    summary = DiffSummary(stacks=[
+        StackDiff("A", changes=[Change("AWS::S3::Bucket", "B", ChangeType.ADD, RiskLevel.LOW)]),
+        StackDiff("B", changes=[
+            Change("AWS::DynamoDB::Table", "T", ChangeType.REMOVE, RiskLevel.HIGH),
+        ]),
+        StackDiff("C"),
+    ])
+    assert summary.risk_counts == {RiskLevel.LOW: 1, RiskLevel.MEDIUM: 0, RiskLevel.HIGH: 1}
+    assert summary.change_type_counts == {ChangeType.ADD: 1, ChangeType.REMOVE: 1,
+                                          ChangeType.UPDATE: 0}
+
+
+def test_in_request_order_fills_gaps_and_keeps_unexpected_stacks():
+    diffed = [StackDiff("Extra"), StackDiff("B", error="boom")]
+    stacks = in_request_order(["A", "B"], diffed, lambda name: StackDiff(name, unchanged=True))
+    assert [(s.name, s.unchanged, s.error) for s in stacks] == [
+        ("A", True, None), ("B", False, "boom"), ("Extra", False, None),
+    ]
@@ -1,5 +1,5 @@
 from pathlib import Path
-from cdkdiff.parser import parse
+from cdkdiff.parser import parse, parse_stream
 from cdkdiff.models import ChangeType
 
 FIXTURES = Path(__file__).parent / "fixtures"
@@ -84,3 +84,68 @@ def test_parse_multi_stack():
     stack_two = next(s for s in result.stacks if s.name == "StackTwo")
     removal = next(c for c in stack_two.changes if c.change_type == ChangeType.REMOVE)
     assert removal.resource_type == "AWS::DynamoDB::Table"
+
+
+def test_parse_stream_yields_stacks_incrementally():
+    consumed = []
+
+    def lines():
+        for line in _fixture("multi_stack.txt").splitlines(keepends=True):
+            consumed.append(line)
+            yield line
+
+    stream = parse_stream(lines())
+    first = next(stream)
+    assert first.name == "StackOne"
+    assert len(first.changes) == 1
+    # StackTwo's resources have not been read yet when StackOne is yielded
+    assert not any("OldTable" in line for line in consumed)
+    second = next(stream)
+    assert second.name == "StackTwo"
+    assert len(second.changes) == 2
+
+
+def test_parse_stream_matches_parse():
+    text = _fixture("mixed_changes.txt")
+    streamed = list(parse_stream(text.splitlines(keepends=True)))
+    assert streamed == parse(text).stacks
+
+
+def test_parse_property_changes():
+    stack = parse(_fixture("property_changes.txt")).stacks[0]
+    handler, table, queue = stack.changes
+    props = {p.path: p for p in handler.properties}
+    assert list(props) == [
+        "Environment.Variables.LEGACY_FLAG",
+        "Environment.Variables.LOG_LEVEL",
+        "Environment.Variables.TABLE_NAME",
+        "MemorySize",
+        "Timeout",
+    ]
+    # cdk names keys added to or removed from an object without printing their value
+    assert props["Environment.Variables.LEGACY_FLAG"].change_type == ChangeType.REMOVE
+    assert props["Environment.Variables.LEGACY_FLAG"].old is None
+    assert props["Environment.Variables.LOG_LEVEL"].change_type == ChangeType.ADD
+    assert props["Environment.Variables.LOG_LEVEL"].new is None
+    assert (props["Environment.Variables.TABLE_NAME"].old,
+            props["Environment.Variables.TABLE_NAME"].new) == ("users-v1", "users-v2")
+    assert (props["MemorySize"].old, props["MemorySize"].new) == ("128", "512")
+    assert props["Timeout"].change_type == ChangeType.ADD
+    assert (props["Timeout"].old, props["Timeout"].new) == (None, "30")
+
+    [key_schema] = table.properties
+    assert key_schema.path == "KeySchema"
+    assert key_schema.requires_replacement is True
+    assert key_schema.old == '    "AttributeName": "id",'
+    assert key_schema.new == '    "AttributeName": "userId",'
+    assert queue.properties == ()
+
+
+def test_parse_property_values_without_properties_wrapper():
+    stack = parse(_fixture("replacement_changes.txt")).stacks[0]
+    db, sg = stack.changes
+    [instance_class] = db.properties
+    assert instance_class.path == "DBInstanceClass"
+    assert (instance_class.old, instance_class.new) == ("db.t3.micro", "db.m5.large")
+    assert sg.properties[0].path == "SecurityGroupIngress"
+    assert sg.properties[0].new.startswith('{"CidrIp":"10.0.0.0/8"')
@@ -0,0 +1,72 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from cdkdiff import profiling
+from cdkdiff.cli import main
+
+
+@pytest.fixture
+def tracer():
+    tracer = profiling.enable()
+    yield tracer
+    profiling.disable()
+
+
+def test_spans_are_free_when_disabled():
+    with profiling.span("ignored", stacks="A") as args:
+        args["status"] = 200
+    assert profiling._active is None
+
+
+def test_spans_record_args_and_threads(tracer):
+    def work() -> None:
+        with profiling.span("worker"):
+            pass
+
+    with profiling.span("outer"):
+        with profiling.span("inner", "subprocess", stacks="A") as args:
+            args["status"] = 200
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+    inner, in_worker, outer = tracer.spans
+    assert [inner.name, in_worker.name, outer.name] == ["inner", "worker", "outer"]
+    assert inner.category == "subprocess" and inner.args == {"stacks": "A", "status": 200}
+    assert outer.duration >= inner.duration
+    assert in_worker.thread != outer.thread == inner.thread
+
+
+def test_report_and_chrome_trace(tracer, tmp_path):
+    for _ in range(3):
+        with profiling.span("cdk diff", "subprocess"):
+            pass
+    with profiling.span("render"):
+        pass
+    report = tracer.report().splitlines()
+    assert report[0].split() == ["span", "total", "count", "max"]
+    assert [line.split()[-2] for line in report if line.startswith("cdk diff")] == ["3"]
+    assert len(report) == 3
+
+    path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["cdk diff"] * 3 + ["render"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 and "tid" in e for e in events)
+    assert events == sorted(events, key=lambda e: e["ts"])
+
+
+def test_cli_profile_prints_breakdown_and_writes_trace(tmp_path, split_runner):
+    output = "Stack MyStack\n\nResources\n[+] AWS::S3::Bucket NewBucket\n\n"
+    trace = tmp_path / "trace.json"
+    with patch("cdkdiff.cli.run_cdk_diff", return_value=output):
+        result = split_runner.invoke(main, [
+            "--output", "json", "--profile", "--trace-file", str(trace),
+        ])
+    assert result.exit_code == 0
+    assert profiling._active is None
+    names = {e["name"] for e in json.loads(trace.read_text())["traceEvents"]}
+    assert {"cdkdiff diff", "assembly", "parse", "score", "render"} <= names
+    assert "cdkdiff diff" in result.stderr
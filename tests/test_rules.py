@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+from cdkdiff.models import Change, ChangeType, PropertyChange, RiskLevel
+from cdkdiff.rules import Rule, RuleSet, load_rules, parse_rules
+
+
+def _change(resource_type: str, change_type: ChangeType = ChangeType.UPDATE,
+            requires_replacement: bool = False) -> Change:
+    return Change(resource_type, "Id", change_type, RiskLevel.LOW,
+                  requires_replacement=requires_replacement)
+
+
+def test_first_matching_rule_wins():
+    rules = RuleSet([
+        Rule("specific", RiskLevel.HIGH, resource_type="AWS::S3::Bucket"),
+        Rule("any", RiskLevel.LOW),
+    ])
+    assert rules.match(_change("AWS::S3::Bucket")).id == "specific"
+    assert rules.match(_change("AWS::SNS::Topic")).id == "any"
+
+
+def test_file_order_beats_index_bucket():
+    rules = RuleSet([
+        Rule("glob", RiskLevel.MEDIUM, resource_type="AWS::IAM::*"),
+        Rule("exact", RiskLevel.HIGH, resource_type="AWS::IAM::Role"),
+    ])
+    assert rules.match(_change("AWS::IAM::Role")).id == "glob"
+
+
+def test_regex_resource_type():
+    rules = RuleSet([Rule("ec2", RiskLevel.MEDIUM, resource_type="re:^AWS::EC2::")])
+    assert rules.match(_change("AWS::EC2::Instance")).id == "ec2"
+    assert rules.match(_change("AWS::ECS::Service")) is None
+
+
+def test_change_type_replacement_and_stack_criteria():
+    rules = RuleSet([
+        Rule("prod-replace", RiskLevel.HIGH, change_types=frozenset({ChangeType.UPDATE}),
+             replacement=True, stack="Prod*"),
+    ])
+    replace = _change("AWS::RDS::DBInstance", requires_replacement=True)
+    assert rules.match(replace, "ProdDb").id == "prod-replace"
+    assert rules.match(replace, "DevDb") is None
+    assert rules.match(_change("AWS::RDS::DBInstance"), "ProdDb") is None
+    assert rules.match(_change("AWS::RDS::DBInstance", ChangeType.ADD), "ProdDb") is None
+
+
+def test_match_scales_with_many_rules():
+    rules = RuleSet(
+        [Rule(f"r{i}", RiskLevel.MEDIUM, resource_type=f"AWS::Svc{i}::Thing") for i in range(5000)]
+        + [Rule("fallback", RiskLevel.LOW)]
+    )
+    assert rules.match(_change("AWS::Svc4321::Thing")).id == "r4321"
+    assert rules.match(_change("AWS::Other::Thing")).id == "fallback"
+    assert len(rules._memo[("AWS::Svc4321::Thing", ChangeType.UPDATE)]) == 2
+
+
+def test_parse_json_rules():
+    data = json.dumps({"rules": [
+        {"id": "sg", "resource_type": "AWS::EC2::SecurityGroup", "change_type": ["update"],
+         "risk": "HIGH"},
+    ]}).encode()
+    [rule] = parse_rules("rules.json", data)
+    assert rule == Rule("sg", RiskLevel.HIGH, resource_type="AWS::EC2::SecurityGroup",
+                        change_types=frozenset({ChangeType.UPDATE}))
+
+
+def test_parse_toml_rules():
+    pytest.importorskip("tomllib", reason="tomllib needs Python 3.11+")
+    data = b'[[rules]]\nresource_type = "AWS::KMS::Key"\nrisk = "high"\n'
+    [rule] = parse_rules("rules.toml", data)
+    assert rule.id == "rule-1"
+    assert rule.risk == RiskLevel.HIGH
+
+
+def test_parse_yaml_rules():
+    pytest.importorskip("yaml")
+    data = b"- resource_type: AWS::Lambda::*\n  risk: medium\n  stack: Prod*\n"
+    [rule] = parse_rules("rules.yaml", data)
+    assert rule.resource_type == "AWS::Lambda::*"
+    assert rule.stack == "Prod*"
+
+
+def test_parse_rejects_malformed_yaml():
+    pytest.importorskip("yaml")
+    with pytest.raises(ValueError, match="invalid YAML"):
+        parse_rules("rules.yaml", b"- resource_type: [AWS::S3::Bucket\n  risk: high\n")
+
+
+@pytest.mark.parametrize("raw, message", [
+    ([{"resource_type": "AWS::S3::Bucket"}], "missing required key 'risk'"),
+    ([{"risk": "extreme"}], "invalid risk"),
+    ([{"risk": "low", "change_type": "rename"}], "invalid change_type"),
+    ([{"risk": "low", "colour": "red"}], "unknown key"),
+    ([{"risk": "low", "replacement": "yes"}], "replacement must be"),
+    ([{"risk": "low", "resource_type": "re:AWS::(EC2"}], "rule #1: invalid resource_type"),
+    ([{"risk": "low", "change_type": 5}], "change_type must be"),
+    ([{"risk": "low", "resource_type": ["AWS::S3::Bucket"]}], "resource_type must be"),
+    ([{"risk": "low", "stack": {"name": "Api"}}], "stack must be"),
+])
+def test_parse_rejects_invalid_rules(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse_rules("rules.json", json.dumps(raw).encode())
+
+
+@pytest.mark.parametrize("doc", [{"rules": {"risk": "low"}}, ["high"]])
+def test_parse_rejects_rules_of_the_wrong_shape(doc):
+    with pytest.raises(TypeError, match="list of rules|expected a mapping"):
+        parse_rules("rules.json", json.dumps(doc).encode())
+
+
+def test_load_rules_versions_by_contents(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"id": "x", "risk": "high"}]))
+    first = load_rules(str(path))
+    assert load_rules(str(path)).version == first.version
+    path.write_text(json.dumps([{"id": "y", "risk": "low"}]))
+    second = load_rules(str(path))
+    assert second.rules[0].id == "y"
+    assert second.version != first.version
+
+
+def test_property_criterion_matches_any_changed_path():
+    rules = RuleSet([Rule("env", RiskLevel.MEDIUM, property="Environment.Variables.*")])
+    change = _change("AWS::Lambda::Function")
+    assert rules.match(change) is None
+    change.properties = [
+        PropertyChange("MemorySize", ChangeType.UPDATE),
+        PropertyChange("Environment.Variables.TABLE", ChangeType.ADD),
+    ]
+    assert rules.match(change).id == "env"
+    assert parse_rules("r.json", b'[{"risk": "high", "property": "KeySchema"}]')[0].property \
+        == "KeySchema"
@@ -1,6 +1,14 @@
+import json
+import os
+import subprocess
+import threading
+from typing import ClassVar
 from unittest.mock import patch, MagicMock
 import pytest
-from cdkdiff.runner import run_cdk_diff, list_stacks, expand_stack_patterns
+from cdkdiff.runner import (
+    run_cdk_diff, run_cdk_diff_parallel, list_stacks, expand_stack_patterns, stream_cdk_diff,
+    synth,
+)
 
 
 def _mock_run(stdout: str, returncode: int = 0):
@@ -57,3 +65,185 @@ def test_run_cdk_diff_raises_on_real_error():
     with patch("subprocess.run", side_effect=FileNotFoundError("cdk not found")):
         with pytest.raises(RuntimeError, match="cdk not found"):
             run_cdk_diff(stack_names=[])
+
+
+def test_run_cdk_diff_passes_app():
+    with patch("subprocess.run", return_value=_mock_run("", returncode=0)) as mock:
+        run_cdk_diff(stack_names=["StackA"], app="/tmp/cdk.out")
+    cmd = mock.call_args[0][0]
+    assert cmd[cmd.index("--app") + 1] == "/tmp/cdk.out"
+
+
+def test_run_cdk_diff_parallel_preserves_order():
+    def fake_run(cmd, **kwargs):
+        return _mock_run(f"Stack {cmd[-1]}\n", returncode=1)
+
+    with patch("subprocess.run", side_effect=fake_run):
+        runs = run_cdk_diff_parallel(["C", "A", "B"], jobs=3)
+    assert [r.name for r in runs] == ["C", "A", "B"]
+    assert runs[1].output == "Stack A\n"
+    assert all(r.error is None for r in runs)
+
+
+def test_run_cdk_diff_parallel_diffs_each_stack_exclusively():
+    with patch("subprocess.run", return_value=_mock_run("", returncode=0)) as mock:
+        run_cdk_diff_parallel(["A"], jobs=2)
+        run_cdk_diff(stack_names=["A"])
+    parallel, single = (c.args[0] for c in mock.call_args_list)
+    assert parallel[-2:] == ["--exclusively", "A"]
+    assert "--exclusively" not in single
+
+
+def test_run_cdk_diff_parallel_reports_failures_per_stack():
+    def fake_run(cmd, **kwargs):
+        if cmd[-1] == "Slow":
+            raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+        if cmd[-1] == "Broken":
+            return _mock_run("", returncode=2)
+        return _mock_run("Stack Ok\n", returncode=0)
+
+    with patch("subprocess.run", side_effect=fake_run):
+        runs = run_cdk_diff_parallel(["Ok", "Slow", "Broken"], jobs=2, timeout=5)
+    assert runs[0].error is None
+    assert "timed out" in runs[1].error
+    assert "exit 2" in runs[2].error
+
+
+def test_run_cdk_diff_parallel_longest_first_after_dependencies():
+    started = []
+
+    def fake_run(cmd, **kwargs):
+        started.append((cmd[-1], kwargs["timeout"]))
+        return _mock_run("", returncode=0)
+
+    with patch("subprocess.run", side_effect=fake_run):
+        runs = run_cdk_diff_parallel(
+            ["Small", "Big", "Db", "Cycle1", "Cycle2"], jobs=1,
+            priority={"Small": 1, "Big": 9, "Db": 5, "Cycle1": 3, "Cycle2": 3},
+            dependencies={"Big": ["Db"], "Cycle1": ["Cycle2"], "Cycle2": ["Cycle1"]},
+            timeouts={"Big": 900},
+        )
+    assert [name for name, _ in started] == ["Db", "Big", "Small", "Cycle1", "Cycle2"]
+    assert dict(started)["Big"] == 900
+    assert dict(started)["Small"] == 300
+    assert [r.name for r in runs] == ["Small", "Big", "Db", "Cycle1", "Cycle2"]
+    assert all(r.duration >= 0 for r in runs)
+
+
+class _FakeProcess:
+    """A `cdk diff` Popen stand-in; `Slow` runs until terminated."""
+    started: ClassVar[list[str]] = []
+
+    def __init__(self, cmd, **kwargs):
+        self.name = cmd[-1]
+        self.returncode = None
+        self.terminated = threading.Event()
+        _FakeProcess.started.append(self.name)
+
+    def communicate(self, timeout=None):
+        if self.name == "Slow":
+            self.terminated.wait(5)
+            self.returncode = -15
+            return "", ""
+        self.returncode = 1
+        return f"Stack {self.name}\n", ""
+
+    def terminate(self):
+        self.terminated.set()
+
+    def kill(self):
+        self.terminated.set()
+
+
+def test_run_cdk_diff_parallel_stop_when_terminates_outstanding_runs():
+    _FakeProcess.started = []
+    with patch("subprocess.Popen", _FakeProcess):
+        runs = run_cdk_diff_parallel(
+            ["Slow", "Bad", "Never"], jobs=2, stop_when=lambda run: run.name == "Bad",
+        )
+    assert [r.name for r in runs] == ["Bad"]
+    assert runs[0].output == "Stack Bad\n"
+    assert "Never" not in _FakeProcess.started
+
+
+def test_synth_returns_absolute_assembly_path(tmp_path):
+    with patch("subprocess.run", return_value=_mock_run("", returncode=0)) as mock:
+        assembly = synth(context_path=str(tmp_path))
+    assert assembly == str(tmp_path / "cdk.out")
+    assert mock.call_args[0][0][:2] == ["cdk", "synth"]
+
+
+def test_synth_raises_on_failure():
+    with patch("subprocess.run", return_value=_mock_run("", returncode=1)), \
+            pytest.raises(RuntimeError, match="cdk synth failed"):
+        synth()
+
+
+def _fake_cdk(tmp_path, monkeypatch, script: str) -> None:
+    cdk = tmp_path / "cdk"
+    cdk.write_text("#!/bin/sh\n" + script)
+    cdk.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_stream_cdk_diff_yields_lines(tmp_path, monkeypatch):
+    _fake_cdk(tmp_path, monkeypatch, 'echo "Stack A"; echo "[+] AWS::S3::Bucket B"; exit 1\n')
+    lines = list(stream_cdk_diff(stack_names=["A"]))
+    assert lines == ["Stack A\n", "[+] AWS::S3::Bucket B\n"]
+
+
+def test_stream_cdk_diff_raises_on_real_error(tmp_path, monkeypatch):
+    _fake_cdk(tmp_path, monkeypatch, 'echo "boom" >&2; exit 2\n')
+    with pytest.raises(RuntimeError, match="exit 2"):
+        list(stream_cdk_diff(stack_names=[]))
+
+
+def test_stream_cdk_diff_times_out(tmp_path, monkeypatch):
+    _fake_cdk(tmp_path, monkeypatch, "exec sleep 10\n")
+    with pytest.raises(RuntimeError, match="timed out"):
+        list(stream_cdk_diff(stack_names=[], timeout=0.2))
+
+
+def test_expand_patterns_negation_and_regex():
+    stacks = ["ApiStack", "ApiWorker", "DataStack", "LegacyApiStack"]
+    assert expand_stack_patterns(["*Stack", "!Legacy*"], available=stacks) == [
+        "ApiStack", "DataStack",
+    ]
+    assert expand_stack_patterns(["/Api(Stack|Worker)$/"], available=stacks) == [
+        "ApiStack", "ApiWorker", "LegacyApiStack",
+    ]
+    assert expand_stack_patterns(["!/^Api/"], available=stacks) == ["DataStack", "LegacyApiStack"]
+    with pytest.raises(ValueError, match="invalid stack pattern"):
+        expand_stack_patterns(["/(unclosed/"], available=stacks)
+
+
+def test_expand_patterns_keeps_each_regex_groups_apart():
+    stacks = ["AAStack", "AbStack", "DataStack"]
+    # A backreference counts groups from its own pattern, not from the ones before it
+    assert expand_stack_patterns(["/(D)ata/", r"/^(.)\1/"], available=stacks) == [
+        "AAStack", "DataStack",
+    ]
+    assert expand_stack_patterns(["/(?P<x>Data)/", "/(?P<x>Ab)/"], available=stacks) == [
+        "AbStack", "DataStack",
+    ]
+
+
+def test_expand_patterns_reads_assembly_instead_of_cdk_list(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps({"artifacts": {
+        name: {"type": "aws:cloudformation:stack",
+               "properties": {"templateFile": f"{name}.template.json"}}
+        for name in ("ApiStack", "DataStack")
+    }}))
+    with patch("cdkdiff.runner.list_stacks", side_effect=AssertionError("ran cdk list")):
+        assert expand_stack_patterns(["Api*"], app=str(tmp_path)) == ["ApiStack"]
+
+
+def test_expand_patterns_caches_cdk_list_until_sources_change(tmp_path):
+    (tmp_path / "cdk.json").write_text('{"app": "python app.py"}')
+    with patch("cdkdiff.runner.list_stacks", return_value=["ApiStack", "DataStack"]) as mock:
+        assert expand_stack_patterns(["Api*"], context_path=str(tmp_path)) == ["ApiStack"]
+        assert expand_stack_patterns(["Data*"], context_path=str(tmp_path)) == ["DataStack"]
+        assert mock.call_count == 1
+        (tmp_path / "cdk.json").write_text('{"app": "python other.py"}')
+        expand_stack_patterns(["Api*"], context_path=str(tmp_path))
+        assert mock.call_count == 2
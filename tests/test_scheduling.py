@@ -0,0 +1,59 @@
+import json
+
+from cdkdiff.scheduling import DEFAULT_TIMEOUT, DurationHistory
+
+
+def test_history_round_trips_per_app(tmp_path):
+    path = str(tmp_path / "durations.json")
+    history = DurationHistory("app-a", path=path)
+    for seconds in (10, 20, 30, 40, 50, 60):
+        history.record("Api", seconds)
+    history.save()
+    DurationHistory("app-b", path=path).save()
+
+    reloaded = DurationHistory("app-a", path=path)
+    assert reloaded.samples["Api"] == [20, 30, 40, 50, 60]  # last five kept
+    assert reloaded.estimate("Api") == 40
+    assert reloaded.estimate("Other") is None
+    assert DurationHistory("app-b", path=path).samples == {}
+
+
+def test_history_ignores_corrupt_state(tmp_path):
+    path = tmp_path / "durations.json"
+    path.write_text("[not json")
+    assert DurationHistory(path=str(path)).samples == {}
+    path.write_text(json.dumps([1, 2]))
+    assert DurationHistory(path=str(path)).samples == {}
+
+
+def test_timeout_scales_with_slowest_run_within_bounds(tmp_path):
+    history = DurationHistory(path=str(tmp_path / "d.json"))
+    history.record("Fast", 2)
+    history.record("Mid", 100)
+    history.record("Mid", 150)
+    history.record("Huge", 5000)
+    assert history.timeout("New") == DEFAULT_TIMEOUT
+    assert history.timeout("Fast") == 60
+    assert history.timeout("Mid") == 450
+    assert history.timeout("Huge") == 1800
+
+
+def test_priorities_follow_the_critical_path(tmp_path):
+    history = DurationHistory(path=str(tmp_path / "d.json"))
+    history.record("Network", 10)
+    history.record("App", 30)
+    history.record("Solo", 35)
+    priorities = history.priorities(
+        ["Network", "App", "Solo", "New"], {"App": ["Network", "Elsewhere"]},
+    )
+    # Network gates App, so its chain (10 + 30) outranks the slower standalone stack
+    assert priorities["Network"] == 40
+    assert priorities["App"] == 30
+    assert priorities["Solo"] == 35
+    assert priorities["New"] == 25  # mean of known estimates
+
+
+def test_priorities_tolerate_cycles(tmp_path):
+    history = DurationHistory(path=str(tmp_path / "d.json"))
+    priorities = history.priorities(["A", "B"], {"A": ["B"], "B": ["A"]})
+    assert set(priorities) == {"A", "B"}
@@ -1,5 +1,6 @@
 from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
-from cdkdiff.scorer import score_change, score_summary
+from cdkdiff.rules import Rule, RuleSet
+from cdkdiff.scorer import rules_version, score_change, score_stack, score_summary
 
 
 def _change(resource_type: str, change_type: ChangeType, requires_replacement: bool = False) -> Change:
@@ -57,3 +58,30 @@ def test_score_summary_sets_risk_on_changes():
     assert dynamo.risk == RiskLevel.HIGH
     s3 = next(c for c in scored.stacks[0].changes if c.resource_type == "AWS::S3::Bucket")
     assert s3.risk == RiskLevel.LOW
+
+
+def test_custom_rules_take_precedence():
+    rules = RuleSet([Rule("lambda-sensitive", RiskLevel.MEDIUM, resource_type="AWS::Lambda::*")])
+    assert score_change(_change("AWS::Lambda::Function", ChangeType.UPDATE), rules) == \
+        RiskLevel.MEDIUM
+    # Changes no custom rule covers fall through to the built-in rules
+    assert score_change(_change("AWS::S3::Bucket", ChangeType.REMOVE), rules) == RiskLevel.HIGH
+
+
+def test_score_stack_records_rule():
+    stack = StackDiff("ProdStack", changes=[
+        _change("AWS::KMS::Key", ChangeType.UPDATE),
+        _change("AWS::S3::Bucket", ChangeType.ADD),
+    ])
+    rules = RuleSet([Rule("prod-adds", RiskLevel.MEDIUM, change_types=frozenset({ChangeType.ADD}),
+                          stack="Prod*")])
+    score_stack(stack, rules)
+    assert [(c.risk, c.rule) for c in stack.changes] == [
+        (RiskLevel.MEDIUM, "builtin:sensitive-type"),
+        (RiskLevel.MEDIUM, "prod-adds"),
+    ]
+
+
+def test_rules_version_includes_custom_rules():
+    rules = RuleSet([Rule("x", RiskLevel.HIGH)])
+    assert rules_version(None) != rules_version(rules)
@@ -0,0 +1,243 @@
+import json
+import os
+import socket
+import subprocess
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from cdkdiff.models import Change, ChangeType, DiffSummary, RiskLevel, StackDiff
+from cdkdiff.server import DiffService, make_server, remove_stale_socket, source_snapshot
+
+
+def _app(tmp_path: Path, **stacks: str) -> Path:
+    (tmp_path / "cdk.json").write_text('{"app": "python app.py"}')
+    (tmp_path / "stacks").mkdir(exist_ok=True)
+    for name, body in stacks.items():
+        _edit(tmp_path, name, body)
+    return tmp_path
+
+
+def _edit(app: Path, stack: str, body: str) -> None:
+    path = app / "stacks" / f"{stack}.txt"
+    path.write_text(body)
+    # Make the edit visible even on filesystems with coarse mtimes
+    stamp = path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _synth(context_path: str, output_dir: str = "cdk.out") -> str:
+    """Stand-in for `cdk synth`: one stack per file under stacks/."""
+    out = Path(context_path) / output_dir
+    out.mkdir(exist_ok=True)
+    artifacts = {}
+    for source in sorted((Path(context_path) / "stacks").iterdir()):
+        name = source.stem
+        (out / f"{name}.template.json").write_text(json.dumps({"Body": source.read_text()}))
+        artifacts[name] = {
+            "type": "aws:cloudformation:stack",
+            "properties": {"templateFile": f"{name}.template.json"},
+        }
+    (out / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+    return str(out.resolve())
+
+
+class _Differ:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+        self.fail: set[str] = set()
+
+    def __call__(self, names: list[str]) -> DiffSummary:
+        self.calls.append(sorted(names))
+        return DiffSummary(stacks=[
+            StackDiff(name=n, error="boom") if n in self.fail else StackDiff(name=n, changes=[
+                Change("AWS::S3::Bucket", f"{n}Bucket", ChangeType.UPDATE, RiskLevel.LOW),
+            ])
+            for n in names
+        ])
+
+
+@pytest.fixture
+def service(tmp_path):
+    app = _app(tmp_path, Alpha="a1", Beta="b1")
+    differ = _Differ()
+    return DiffService(str(app), differ, synthesize=_synth), app, differ
+
+
+def test_snapshot_tracks_edits_but_not_build_output(tmp_path):
+    app = _app(tmp_path, Alpha="a1")
+    before = source_snapshot(str(app))
+    _synth(str(app))
+    assert source_snapshot(str(app)) == before
+    _edit(app, "Alpha", "a2")
+    assert source_snapshot(str(app)) != before
+
+
+def test_first_refresh_diffs_every_stack(service):
+    svc, _, differ = service
+    assert svc.refresh() is True
+    assert differ.calls == [["Alpha", "Beta"]]
+    assert [s.name for s in svc.summary.stacks] == ["Alpha", "Beta"]
+    assert svc.generation == 1
+
+
+def test_unchanged_tree_is_not_rediffed(service):
+    svc, _, differ = service
+    svc.refresh()
+    assert svc.refresh() is False
+    assert differ.calls == [["Alpha", "Beta"]]
+    assert svc.generation == 1
+
+
+def test_only_edited_stack_is_rediffed(service):
+    svc, app, differ = service
+    svc.refresh()
+    first_beta = svc.summary.stacks[1]
+    _edit(app, "Alpha", "a2")
+    svc.refresh()
+    assert differ.calls[-1] == ["Alpha"]
+    assert svc.summary.stacks[1] is first_beta
+    assert svc.generation == 2
+
+
+def test_removed_stack_is_dropped(service):
+    svc, app, differ = service
+    svc.refresh()
+    (app / "stacks" / "Beta.txt").unlink()
+    svc.refresh()
+    assert [s.name for s in svc.summary.stacks] == ["Alpha"]
+    assert differ.calls == [["Alpha", "Beta"]]
+
+
+def test_failed_stack_is_retried_on_next_edit(service):
+    svc, app, differ = service
+    differ.fail = {"Beta"}
+    svc.refresh()
+    assert svc.summary.stacks[1].error == "boom"
+    differ.fail = set()
+    _edit(app, "Alpha", "a2")
+    svc.refresh()
+    assert differ.calls[-1] == ["Alpha", "Beta"]
+    assert svc.summary.stacks[1].error is None
+
+
+def test_synth_failure_keeps_last_summary(service):
+    svc, app, _ = service
+    svc.refresh()
+    previous = svc.summary
+    svc._synthesize = lambda *args: (_ for _ in ()).throw(RuntimeError("cdk synth failed"))
+    _edit(app, "Alpha", "broken")
+    svc.refresh()
+    assert svc.summary is previous
+    assert svc.error == "cdk synth failed"
+
+
+def test_diff_failure_is_published_and_retried(service):
+    svc, app, differ = service
+    svc.refresh()
+    previous = svc.summary
+
+    def timeout(names):
+        raise subprocess.TimeoutExpired(["cdk", "diff"], 300)
+
+    svc._diff = timeout
+    _edit(app, "Alpha", "a2")
+    assert svc.refresh() is True
+    assert svc.summary is previous
+    assert svc.generation == 2
+    assert "timed out" in svc.error
+    svc._diff = differ
+    _edit(app, "Alpha", "a3")
+    svc.refresh()
+    assert differ.calls[-1] == ["Alpha"]
+    assert svc.error is None
+
+
+def test_watch_survives_a_failing_refresh(service):
+    svc, _, _ = service
+    calls = []
+    stop = threading.Event()
+
+    def refresh():
+        calls.append(None)
+        if len(calls) == 1:
+            raise KeyError("manifest")
+        stop.set()
+
+    svc.refresh = refresh
+    svc.watch(stop, interval=0)
+    assert len(calls) == 2
+    assert "KeyError" in svc.error
+
+
+def test_stale_socket_is_removed_but_other_files_are_not(tmp_path):
+    path = str(tmp_path / "s.sock")
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(path)
+    remove_stale_socket(path)
+    assert not os.path.exists(path)
+    remove_stale_socket(path)  # already gone
+    regular = tmp_path / "notes.txt"
+    regular.write_text("keep")
+    with pytest.raises(ValueError, match="not a socket"):
+        make_server(DiffService(str(tmp_path), _Differ()), socket_path=str(regular))
+    assert regular.read_text() == "keep"
+
+
+def _get(url: str) -> tuple[int, dict, str]:
+    with urllib.request.urlopen(url, timeout=10) as resp:
+        return resp.status, dict(resp.headers), resp.read().decode()
+
+
+@pytest.fixture
+def http(service):
+    svc, app, _differ = service
+    server = make_server(svc, port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", svc, app
+    server.shutdown()
+    server.server_close()
+
+
+def test_summary_endpoint_serves_latest_json(http):
+    url, svc, _ = http
+    svc.refresh()
+    status, headers, body = _get(f"{url}/summary")
+    assert status == 200
+    assert headers["X-Cdkdiff-Generation"] == "1"
+    assert [s["name"] for s in json.loads(body)["stacks"]] == ["Alpha", "Beta"]
+
+
+def test_summary_endpoint_selects_formatter(http):
+    url, svc, _ = http
+    svc.refresh()
+    _, headers, body = _get(f"{url}/summary?format=pr-comment")
+    assert headers["Content-Type"].startswith("text/plain")
+    assert "cdkdiff-comment" in body
+
+
+def test_summary_wait_blocks_until_next_generation(http):
+    url, svc, app = http
+    svc.refresh()
+    _edit(app, "Beta", "b2")
+    threading.Timer(0.1, svc.refresh).start()
+    _, headers, _ = _get(f"{url}/summary?wait=1&timeout=10")
+    assert headers["X-Cdkdiff-Generation"] == "2"
+
+
+def test_status_and_unknown_paths(http):
+    url, svc, _ = http
+    svc.refresh()
+    status, _, body = _get(f"{url}/status")
+    assert status == 200
+    assert json.loads(body)["stacks"] == 2
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _get(f"{url}/nope")
+    assert e.value.code == 404
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _get(f"{url}/summary?format=nope")
+    assert e.value.code == 400